@@ -1,16 +1,170 @@
+import json
+
+from django.conf import settings
 from django.contrib import admin
-from .models import SpotifyAccount, Playlist
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.postgres.search import SearchQuery
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .models import SpotifyAccount, Playlist, Track
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that stops counting rows past ADMIN_EXACT_COUNT_LIMIT.
+
+    Small results are counted exactly with a bounded `COUNT(*) ... LIMIT`. Beyond the
+    limit the count comes from Postgres' planner statistics: `pg_class.reltuples` for
+    the unfiltered table, or the row estimate of EXPLAIN for a filtered or searched
+    changelist. Page numbers far down a huge table are then approximate, which the
+    admin tolerates (it only needs the count to draw the pager).
+    """
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list
+        if not limit or not hasattr(queryset, "query"):
+            return super().count
+        counted = queryset.order_by()[: limit + 1].count()
+        if counted <= limit:
+            return counted
+        return max(counted, estimated_count(queryset))
+
+
+def estimated_count(queryset) -> int:
+    """Planner estimate of the rows in `queryset`; 0 when the database has none to offer."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return 0
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+        else:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        row = cursor.fetchone()
+    if row is None:
+        return 0
+    if isinstance(row[0], int):
+        return max(row[0], 0)
+    plan = row[0] if isinstance(row[0], list) else json.loads(row[0])
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class UserFilter(admin.SimpleListFilter):
+    """
+    Sidebar filter by owner that never lists every user.
+
+    The sidebar shows only the selected user, plus a box that looks users up as you
+    type through the admin's autocomplete endpoint (the User admin's search_fields).
+    """
+
+    title = "user"
+    parameter_name = "user"
+    template = "admin/backend/user_filter.html"
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        if not value or not value.isdigit():
+            return []
+        user = get_user_model().objects.filter(pk=value).only("username").first()
+        return [(value, user.username if user else f"#{value}")]
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(user_id=value)
+        return queryset
+
+    def choices(self, changelist):
+        self.app_label = changelist.model._meta.app_label
+        self.model_name = changelist.model._meta.model_name
+        # Other filters and the search term, kept when a user is picked from the box.
+        self.hidden_params = [
+            (key, value)
+            for key, values in changelist.get_filters_params().items()
+            if key != self.parameter_name
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        if changelist.query:
+            self.hidden_params.append(("q", changelist.query))
+        yield from super().choices(changelist)
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables with millions of rows.
+
+    - Counts are bounded or estimated (EstimatedCountPaginator), and the "N total"
+      link that needs a second full COUNT(*) is hidden.
+    - Rows are ordered by primary key, so a page is an index scan plus LIMIT.
+    - Foreign keys shown in list_display are joined (list_select_related) and edited
+      through autocomplete widgets instead of a <select> of every row.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ["-pk"]
+    autocomplete_fields = ["user"]
+    list_select_related = ["user"]
 
 
 @admin.register(SpotifyAccount)
-class SpotifyAccountAdmin(admin.ModelAdmin):
-    list_display = [field.name for field in SpotifyAccount._meta.fields]
-    search_fields = ["spotify_id", "user__username"]
+class SpotifyAccountAdmin(ScalableAdmin):
+    # Tokens and the seen-track filter stay off the list: secrets and large blobs.
+    list_display = ["id", "user", "spotify_id", "token_expires_at", "seen_tracks_count"]
+    # "=" is an exact (case-insensitive) match, served by account_spotify_id_upper_idx.
+    search_fields = ["=spotify_id"]
     list_filter = ["token_expires_at"]
 
 
 @admin.register(Playlist)
-class PlaylistAdmin(admin.ModelAdmin):
-    list_display = [field.name for field in Playlist._meta.fields]
-    search_fields = ["name", "description", "mood_prompt", "user__username"]
-    list_filter = ["created_at", "user"]
+class PlaylistAdmin(ScalableAdmin):
+    list_display = ["id", "name", "user", "status", "spotify_id", "created_at", "updated_at"]
+    # Substring search served by the trigram indexes of migration 0009.
+    search_fields = ["name", "mood_prompt"]
+    list_filter = ["status", "created_at", UserFilter]
+
+
+admin.site.unregister(get_user_model())
+
+
+@admin.register(get_user_model())
+class ScalableUserAdmin(UserAdmin):
+    # Accounts sign up with their email as username: one trigram-indexed field
+    # (auth_user_username_upper_trgm) serves the search and the user autocompletes.
+    search_fields = ["username"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Track)
+class TrackAdmin(ScalableAdmin):
+    list_display = ["uri", "name", "artist", "genre", "popularity", "updated_at"]
+    # Searched through get_search_results, never with icontains scans of the catalog.
+    search_fields = ["uri", "name", "artist"]
+    search_help_text = "A spotify: URI, or words of the name, artist or genre."
+    autocomplete_fields = []
+    list_select_related = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Match a URI exactly (the unique index) and anything else as words against the
+        full-text vector (track_search_gin).
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.startswith("spotify:"):
+            return queryset.filter(uri=term), False
+        return queryset.filter(search=SearchQuery(term, config="english", search_type="websearch")), False
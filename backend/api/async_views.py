@@ -0,0 +1,116 @@
+import json
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+
+from backend.api.serializers import PlaylistSerializer
+from backend.authentication import CachedJWTAuthentication
+from backend.models import Playlist, SpotifyAccount
+from backend.tasks import arun_generation
+from backend.utils import spotify_async as sa
+
+log = logging.getLogger(__name__)
+
+
+async def authenticate_jwt(request):
+    """
+    Resolves the user from the request's `Authorization: Bearer` header.
+
+    Returns:
+        The authenticated user, or None when the header is missing or invalid.
+    """
+    try:
+        result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    except APIException:
+        return None
+    return result[0] if result else None
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncPlaylistCreateView(View):
+    """
+    Native async counterpart of POST /api/playlists/.
+
+    POST:
+        Validates the payload with PlaylistSerializer, saves the playlist and generates
+        it on Spotify inside the request, awaiting every Spotify call on the event loop.
+        Returns 201 with the serialized playlist, or 502 if Spotify generation failed.
+
+    Authentication:
+        - Requires a JWT in the `Authorization: Bearer` header (no session/CSRF path).
+    """
+
+    async def post(self, request):
+        user = await authenticate_jwt(request)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"detail": "Malformed JSON."}, status=400)
+
+        serializer = PlaylistSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+
+        playlist = await Playlist.objects.acreate(user=user, **serializer.validated_data)
+
+        try:
+            await arun_generation(playlist)
+        except Exception as exc:
+            log.exception("Playlist generation failed")
+            return JsonResponse({"detail": str(exc), **PlaylistSerializer(playlist).data}, status=502)
+
+        return JsonResponse(PlaylistSerializer(playlist).data, status=201)
+
+
+class AsyncSpotifyCallbackView(View):
+    """
+    Native async counterpart of GET /api/auth/spotify/callback/.
+
+    GET:
+        Exchanges the `code` query parameter for tokens, reads the Spotify profile and
+        updates or creates the user's SpotifyAccount, then redirects to the playlists page.
+
+    Authentication:
+        - JWT in the `Authorization: Bearer` header or an active session.
+    """
+
+    async def get(self, request):
+        user = await authenticate_jwt(request)
+        if user is None:
+            user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        code = request.GET.get("code")
+        if not code:
+            return JsonResponse({"detail": "Missing ?code"}, status=400)
+
+        try:
+            token_data = await sa.exchange_code(code)
+            profile = await sa.get_profile(token_data["access_token"])
+        except Exception as exc:
+            log.exception("Spotify callback failed")
+            return JsonResponse({"detail": str(exc)}, status=500)
+
+        await SpotifyAccount.objects.aupdate_or_create(
+            user=user,
+            defaults=dict(
+                spotify_id=profile["id"],
+                access_token=token_data["access_token"],
+                refresh_token=token_data["refresh_token"],
+                token_expires_at=timezone.now()
+                + timedelta(seconds=token_data["expires_in"]),
+            ),
+        )
+        return redirect("/spotify-playlists/")
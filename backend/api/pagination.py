@@ -0,0 +1,20 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PlaylistCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination for a user's playlists, newest first.
+
+    Pages are fetched with `WHERE created_at < <cursor>` on the (user, -created_at, -id)
+    index instead of OFFSET, so the last page costs the same as the first no matter how
+    many playlists the user has. `id` breaks ties between rows with the same timestamp.
+
+    Query parameters:
+        - cursor: Opaque position returned in the `next`/`previous` links.
+        - page_size: Rows per page (default 50, at most 200).
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
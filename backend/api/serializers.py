@@ -11,10 +11,11 @@ class PlaylistSerializer(serializers.ModelSerializer):
         - description: Description of the playlist.
         - mood_prompt: Mood or prompt associated with the playlist.
         - spotify_id: Spotify identifier for the playlist (read-only).
+        - status: Generation state - pending, running, done or failed (read-only).
         - created_at: Timestamp when the playlist was created (read-only).
     """
     class Meta:
         model  = Playlist
         fields = ("id", "name", "description", "mood_prompt",
-                  "spotify_id", "created_at")
-        read_only_fields = ("spotify_id", "created_at")
+                  "spotify_id", "status", "created_at")
+        read_only_fields = ("spotify_id", "status", "created_at")
@@ -1,15 +1,33 @@
+import hashlib
 import logging
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from rest_framework import viewsets, permissions
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from backend.models import Playlist, SpotifyAccount
+from backend.api.pagination import PlaylistCursorPagination
 from backend.api.serializers import PlaylistSerializer
+from backend.utils import export
 from backend.utils import spotify_helpers as sh
+from backend.utils.page_cache import playlist_page_cache
+from backend.utils.rate_limit import limiter
+from backend.utils.spotify_cache import prompt_cache
+from backend.tasks import (
+    generate_playlist, generate_playlists, regenerate_playlist, run_bulk_generation, run_generation,
+    run_regeneration,
+)
 
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework.authentication import SessionAuthentication
@@ -106,6 +124,30 @@ class SpotifyCallbackView(APIView):
         )
         return redirect("/spotify-playlists/")
 
+class SpotifyStatsView(APIView):
+    """
+    Staff-only view exposing the Spotify client registry, prompt cache, rate limiter
+    and playlist page cache counters.
+
+    GET:
+        Returns the hit/miss counters of the per-user client registry and of the
+        prompt cache, including the cache hit rate and p95 latency of hits vs misses,
+        plus rate limiter queue wait times and 429 throttle events, and the hit rate
+        and render time saved by the cached playlists page.
+        The numbers are per process (per web worker).
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "clients": sh.clients.stats(),
+            "prompt_cache": prompt_cache.stats(),
+            "rate_limit": limiter.stats(),
+            "playlist_page_cache": playlist_page_cache.stats(),
+        })
+
+
 class PlaylistViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing user playlists.
@@ -116,51 +158,231 @@ class PlaylistViewSet(viewsets.ModelViewSet):
     Key Behaviors:
         - Only authenticated users can access these endpoints.
         - Queryset is limited to playlists owned by the requesting user, ordered by creation date (descending).
+        - The list is cursor-paginated (`?cursor=`, `?page_size=`), see PlaylistCursorPagination.
         - On creation (POST):
-            1. Saves the playlist record to the database.
-            2. Ensures a valid Spotify client for the user.
-            3. Creates a new Spotify playlist and adds recommended tracks based on the mood prompt.
-            4. Updates the playlist record with the generated Spotify playlist ID.
+            1. Saves the playlist record to the database with status "pending".
+            2. Queues a `generate_playlist` Celery job and answers 202 Accepted.
+            3. The worker creates the Spotify playlist, adds recommended tracks
+               and stores the generated Spotify playlist ID (status "done" or "failed").
+        - GET /api/playlists/{id}/status/ is a lightweight poll of the job state.
+        - List and retrieve answer with a strong ETag and Last-Modified derived from
+          max(updated_at) and the row count; a matching If-None-Match or
+          If-Modified-Since gets 304 Not Modified without any rows being loaded.
+        - POST /api/playlists/bulk/ takes a JSON list of playlists and creates them
+          with one INSERT, one shared Spotify client and one UPDATE of the results.
+        - POST /api/playlists/{id}/regenerate/ refreshes the tracks from new
+          recommendations, sending Spotify only the removed and added tracks.
+        - GET /api/playlists/export/ streams every matching playlist as NDJSON or CSV
+          (optionally zstd-compressed) without loading the rows into memory.
 
     Notes:
-        - All operations are performed synchronously (no background tasks).
-        - Exceptions during Spotify operations are logged and propagated.
-    /api/playlists/  - CRUD for playlists.
-    POST performs all heavy lifting synchronously (no Celery).
+        - With PLAYLIST_GENERATION_ASYNC disabled, generation runs synchronously
+          inside the request and the response is 201 Created, as before.
+        - Exceptions during Spotify operations are logged and recorded on the playlist.
     """
 
     serializer_class = PlaylistSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PlaylistCursorPagination
 
     def get_queryset(self):
-        return Playlist.objects.filter(user=self.request.user).order_by("-created_at")
+        return Playlist.objects.filter(user=self.request.user).order_by("-created_at", "-id")
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(
+            self.get_queryset(), lambda: super(PlaylistViewSet, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        def respond():
+            return super(PlaylistViewSet, self).retrieve(request, *args, **kwargs)
+
+        try:
+            queryset = self.get_queryset().filter(pk=kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except (TypeError, ValueError):
+            return respond()  # malformed pk; let the regular lookup answer 404
+        return self.conditional(queryset, respond)
+
+    def conditional(self, queryset, respond):
+        """
+        Answer 304 when the client's validators still match `queryset`, else call `respond`.
+
+        The validators come from one aggregate query (latest updated_at and row count),
+        mixed with the user, URL and media type into a strong ETag. The count catches
+        deletions, which do not move max(updated_at).
+        """
+        request = self.request
+        state = queryset.aggregate(modified=Max("updated_at"), count=Count("pk"))
+        if not state["count"]:
+            return respond()
+
+        source = "|".join([
+            str(request.user.pk), request.get_full_path(), str(request.accepted_media_type),
+            str(state["count"]), state["modified"].isoformat(),
+        ])
+        etag = quote_etag(hashlib.sha1(source.encode()).hexdigest())
+        # HTTP dates have one-second resolution: while the newest change is still inside
+        # the current second another change could follow unseen, so send only the ETag.
+        last_modified = None
+        if timezone.now() - state["modified"] >= timedelta(seconds=1):
+            last_modified = int(state["modified"].timestamp())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization", "Cookie"])
+        return response
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        if settings.PLAYLIST_GENERATION_ASYNC:
+            response.status_code = status.HTTP_202_ACCEPTED
+        return response
 
     def perform_create(self, serializer):
         """
         1. Save DB record.
-        2. Make / refresh Spotify client.
-        3. Create playlist + add tracks.
-        4. Update spotify_id on the model.
+        2. Queue the generation job (or run it inline in synchronous mode).
         """
         playlist: Playlist = serializer.save(user=self.request.user)
 
-        sp = sh.make_client(self.request.user)
+        if settings.PLAYLIST_GENERATION_ASYNC:
+            transaction.on_commit(lambda: generate_playlist.delay(playlist.pk))
+            return
 
         try:
-            spotify_id = sh.create_playlist(
-                sp=sp,
-                owner_id=self.request.user.spotifyaccount.spotify_id,
-                name=playlist.name,
-                description=playlist.description or playlist.mood_prompt,
-            )
-            tracks = sh.generate_recommendations(
-                sp=sp, prompt=playlist.mood_prompt, size=30
-            )
-            if tracks:
-                sh.add_tracks(sp, spotify_id, tracks)
+            run_generation(playlist)
         except Exception as exc:
             log.exception("Playlist generation failed")
             raise
 
-        playlist.spotify_id = spotify_id
-        playlist.save(update_fields=["spotify_id"])
+    @action(detail=True, methods=["get"], url_path="status")
+    def job_status(self, request, pk=None):
+        """Return the generation state of a playlist without the full record."""
+        playlist = self.get_object()
+        return Response({
+            "id": playlist.id,
+            "status": playlist.status,
+            "spotify_id": playlist.spotify_id,
+        })
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export_playlists(self, request):
+        """
+        Stream playlists as a file download, oldest first.
+
+        Query parameters:
+            output: "ndjson" (default) or "csv". (`format` is taken by DRF's content negotiation.)
+            compress: "zstd" to compress the file.
+            since, until: ISO date or datetime bounds on created_at; a bare `until` date
+                includes that day.
+            user: Staff only; export this user's playlists. Without it staff export
+                every user's playlists, everyone else only their own.
+        """
+        params = request.query_params
+        fmt = params.get("output", "ndjson")
+        if fmt not in export.FORMATS:
+            raise ValidationError({"output": f"Choose one of: {', '.join(export.FORMATS)}."})
+        compress = params.get("compress", "")
+        if compress not in ("", "zstd"):
+            raise ValidationError({"compress": "Only zstd is supported."})
+
+        bounds = {}
+        for name in ("since", "until"):
+            if params.get(name):
+                try:
+                    bounds[name] = export.parse_bound(params[name], end=name == "until")
+                except ValueError as exc:
+                    raise ValidationError({name: str(exc)})
+
+        user_id = request.user.pk
+        if request.user.is_staff:
+            user_id = params.get("user") or None
+            if user_id is not None and not user_id.isdigit():
+                raise ValidationError({"user": "Expected a user ID."})
+        elif params.get("user") not in (None, str(request.user.pk)):
+            raise PermissionDenied("You can only export your own playlists.")
+
+        # Under ASGI a sync iterator would be read whole before the first byte is sent.
+        encode = export.astream if isinstance(request._request, ASGIRequest) else export.stream
+        response = StreamingHttpResponse(
+            encode(export.playlists(user_id, **bounds), fmt, compress=bool(compress)),
+            content_type=export.ZSTD_CONTENT_TYPE if compress else export.FORMATS[fmt],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{export.filename(fmt, bool(compress))}"'
+        patch_cache_control(response, private=True, no_store=True)
+        return response
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create up to PLAYLIST_BULK_MAX playlists from one JSON list.
+
+        Returns the per-item results in request order. In async mode all items are
+        queued as a single job (202); otherwise they are generated inline and the
+        response is 201, or 207 with an "error" on each failed item.
+        """
+        serializer = self.get_serializer(
+            data=request.data, many=True, allow_empty=False, max_length=settings.PLAYLIST_BULK_MAX
+        )
+        serializer.is_valid(raise_exception=True)
+
+        playlists = Playlist.objects.bulk_create(
+            [Playlist(user=request.user, **item) for item in serializer.validated_data]
+        )
+        # bulk_create sends no post_save signals.
+        transaction.on_commit(lambda: playlist_page_cache.invalidate(request.user.pk))
+
+        if settings.PLAYLIST_GENERATION_ASYNC:
+            ids = [p.pk for p in playlists]
+            transaction.on_commit(lambda: generate_playlists.delay(ids))
+            return Response(
+                self.get_serializer(playlists, many=True).data, status=status.HTTP_202_ACCEPTED
+            )
+
+        errors = run_bulk_generation(request.user, playlists)
+        results = []
+        for playlist in playlists:
+            item = self.get_serializer(playlist).data
+            if playlist.pk in errors:
+                item["error"] = errors[playlist.pk]
+            results.append(item)
+        return Response(
+            results, status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED
+        )
+
+    @action(detail=True, methods=["post"], url_path="regenerate")
+    def regenerate(self, request, pk=None):
+        """
+        Refresh the playlist's tracks from new recommendations for its mood prompt.
+
+        Only finished (done or failed) playlists can be regenerated; while a generation
+        is queued or running the answer is 409 Conflict. In async mode the refresh is
+        queued (202), otherwise it runs inline and the updated playlist is returned (200).
+        """
+        playlist = self.get_object()
+        claimed = Playlist.objects.filter(
+            pk=playlist.pk, status__in=[Playlist.Status.DONE, Playlist.Status.FAILED]
+        ).update(status=Playlist.Status.PENDING, updated_at=timezone.now())
+        if not claimed:
+            return Response(
+                {"detail": "This playlist is already being generated."}, status=status.HTTP_409_CONFLICT
+            )
+        # update() sends no post_save signal.
+        transaction.on_commit(lambda: playlist_page_cache.invalidate(request.user.pk))
+        playlist.refresh_from_db()
+
+        if settings.PLAYLIST_GENERATION_ASYNC:
+            transaction.on_commit(lambda: regenerate_playlist.delay(playlist.pk))
+            return Response(self.get_serializer(playlist).data, status=status.HTTP_202_ACCEPTED)
+
+        try:
+            run_regeneration(playlist)
+        except Exception:
+            log.exception("Playlist regeneration failed")
+            raise
+        return Response(self.get_serializer(playlist).data)
@@ -5,7 +5,9 @@ from backend.api.views import (
     SpotifyLoginView,
     SpotifyCallbackView,
     SessionTokenView,          # ← the bridge view
+    SpotifyStatsView,
 )
+from backend.api.async_views import AsyncPlaylistCreateView, AsyncSpotifyCallbackView
 
 router = DefaultRouter()
 router.register(r"playlists", PlaylistViewSet, basename="playlist")
@@ -15,6 +17,11 @@ urlpatterns = [
     path('token/session/', SessionTokenView.as_view(), name='jwt_from_session'),
     path('auth/spotify/login/',    SpotifyLoginView.as_view()),
     path('auth/spotify/callback/', SpotifyCallbackView.as_view()),
+    path('stats/spotify/', SpotifyStatsView.as_view(), name='spotify_stats'),
+
+    # native async endpoints (serve through ASGI to keep Spotify calls on the event loop)
+    path('async/playlists/', AsyncPlaylistCreateView.as_view(), name='async_playlist_create'),
+    path('async/auth/spotify/callback/', AsyncSpotifyCallbackView.as_view(), name='async_spotify_callback'),
 
     path('', include(router.urls)),
 ]
\ No newline at end of file
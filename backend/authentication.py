@@ -0,0 +1,49 @@
+from django.contrib.auth.backends import ModelBackend
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from backend.utils import user_cache
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose session lookups go through `user_cache`.
+
+    AuthenticationMiddleware calls `get_user` on every request with a session, so with
+    the cached_db session engine a logged-in page view needs no auth query at all.
+    """
+
+    def get_user(self, user_id):
+        user = user_cache.get_user(user_id)
+        return user if self.user_can_authenticate(user) else None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user through `user_cache`.
+
+    Performs the same checks as simplejwt (active user, revoked token) on the cached
+    row. Users are looked up by primary key, which is simplejwt's default USER_ID_FIELD.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
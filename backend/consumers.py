@@ -0,0 +1,57 @@
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.utils.progress import group_name
+
+
+class PlaylistProgressConsumer(AsyncJsonWebsocketConsumer):
+    """
+    WebSocket at /ws/playlists/ that streams generation progress of the user's playlists.
+
+    Each message is a JSON object such as
+    `{"playlist": 7, "stage": "tracks_added", "status": "running", "spotify_id": "...", "tracks": 30}`
+    with stages created, tracks_fetched, tracks_added, done and failed.
+
+    Authentication:
+        - The Django session cookie (the playlists page), or
+        - an access token in the query string (`/ws/playlists/?token=<jwt>`), checked by
+          signature only so connecting costs no database query.
+
+    Sockets only listen: an idle connection is one coroutine and one group membership,
+    so a node holds tens of thousands of them. Unauthenticated sockets are closed with
+    code 4401.
+    """
+
+    async def connect(self):
+        self.user_id = self.authenticate()
+        if self.user_id is None:
+            await self.close(code=4401)
+            return
+        self.group = group_name(self.user_id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    def authenticate(self):
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        token = (query.get("token") or [""])[-1]
+        if token:
+            try:
+                return AccessToken(token)[api_settings.USER_ID_CLAIM]
+            except (TokenError, KeyError):
+                return None
+        user = self.scope.get("user")
+        return user.pk if user is not None and user.is_authenticated else None
+
+    async def disconnect(self, code):
+        if getattr(self, "group", None):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        pass  # progress sockets are receive-only
+
+    async def playlist_progress(self, event):
+        await self.send_json({key: value for key, value in event.items() if key != "type"})
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.models import Track
+from backend.utils.track_index import TrackIndex
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the embedding index from the local track catalog and saves it to disk.
+
+    Worker processes memory-map the saved index on first use; restart them (or let
+    them pick it up on the next start) after a rebuild.
+
+    Usage:
+        python manage.py build_track_index --path var/track_index
+    """
+
+    help = "Rebuild the track embedding index from the catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=settings.TRACK_INDEX_PATH)
+        parser.add_argument("--dim", type=int, default=settings.TRACK_INDEX_DIM)
+        parser.add_argument("--chunk-size", type=int, default=10000)
+
+    def handle(self, *args, path, dim, chunk_size, **options):
+        tracks = (
+            Track.objects.order_by("id")
+            .values_list("uri", "name", "artist", "genre")
+            .iterator(chunk_size=chunk_size)
+        )
+        index = TrackIndex(dim=dim)
+        index.rebuild(tracks, batch_size=chunk_size)
+        index.save(path)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {len(index)} tracks into {path}."))
@@ -0,0 +1,65 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.utils import export
+
+
+class Command(BaseCommand):
+    """
+    Exports playlists as NDJSON or CSV, optionally zstd-compressed.
+
+    Rows are streamed from a server-side cursor (see backend.utils.export), so exporting
+    the whole site uses as little memory as exporting one user. Output goes to stdout
+    unless --output is given.
+
+    Usage:
+        python manage.py export_playlists --format csv --since 2025-01-01 --output playlists.csv
+        python manage.py export_playlists --user listener@example.com --compress > mine.ndjson.zst
+    """
+
+    help = "Stream playlists to a NDJSON or CSV file (optionally zstd-compressed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(export.FORMATS), default="ndjson")
+        parser.add_argument("--user", help="Only this user's playlists (ID or username).")
+        parser.add_argument("--since", help="Created at or after this ISO date/datetime.")
+        parser.add_argument("--until", help="Created before this ISO datetime (a date includes that day).")
+        parser.add_argument("--compress", action="store_true", help="Compress the output with zstd.")
+        parser.add_argument("--output", help="File to write (default: stdout).")
+
+    def handle(self, *args, format, user, since, until, compress, output, **options):
+        try:
+            bounds = {
+                "since": export.parse_bound(since) if since else None,
+                "until": export.parse_bound(until, end=True) if until else None,
+            }
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        user_id = self.resolve_user(user) if user else None
+
+        chunks = export.stream(export.playlists(user_id, **bounds), format, compress=compress)
+        if output:
+            with open(output, "wb") as handle:
+                written = self.write(chunks, handle)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes to {output}."))
+        else:
+            self.write(chunks, sys.stdout.buffer)
+
+    @staticmethod
+    def write(chunks, handle) -> int:
+        written = 0
+        for chunk in chunks:
+            handle.write(chunk)
+            written += len(chunk)
+        handle.flush()
+        return written
+
+    @staticmethod
+    def resolve_user(value: str) -> int:
+        lookup = {"pk": int(value)} if value.isdigit() else {"username": value}
+        try:
+            return User.objects.only("pk").get(**lookup).pk
+        except User.DoesNotExist:
+            raise CommandError(f"No user {value!r}.")
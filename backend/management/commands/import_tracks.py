@@ -0,0 +1,63 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.models import Track
+
+
+class Command(BaseCommand):
+    """
+    Bulk-imports tracks into the local catalog.
+
+    Accepts a CSV file with a header row (uri, name, artist, genre, popularity) or an
+    NDJSON file (.ndjson/.jsonl) with one object per line using the same keys. Rows are
+    upserted on `uri` in batches, so re-importing a file updates existing tracks.
+
+    Usage:
+        python manage.py import_tracks tracks.csv --batch-size 5000
+    """
+
+    help = "Bulk-import tracks into the local catalog from CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, path, batch_size, **options):
+        try:
+            handle = open(path, newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with handle:
+            if path.endswith((".ndjson", ".jsonl")):
+                rows = (json.loads(line) for line in handle if line.strip())
+            else:
+                rows = csv.DictReader(handle)
+
+            tracks = (self.to_track(row) for row in rows if row.get("uri"))
+            imported = 0
+            while batch := list(islice(tracks, batch_size)):
+                batch = list({track.uri: track for track in batch}.values())
+                Track.objects.bulk_create(
+                    batch,
+                    update_conflicts=True,
+                    unique_fields=["uri"],
+                    update_fields=["name", "artist", "genre", "popularity"],
+                )
+                imported += len(batch)
+                self.stdout.write(f"{imported} tracks imported...")
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} tracks."))
+
+    @staticmethod
+    def to_track(row: dict) -> Track:
+        return Track(
+            uri=row["uri"],
+            name=(row.get("name") or "")[:255],
+            artist=(row.get("artist") or "")[:255],
+            genre=(row.get("genre") or "")[:120],
+            popularity=int(row.get("popularity") or 0),
+        )
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.utils.profiling import make_token
+
+
+class Command(BaseCommand):
+    """
+    Prints a signed token that makes ProfilingMiddleware profile a request.
+
+    Usage:
+        curl -H "X-Profile-Token: $(python manage.py profile_token)" ...
+    """
+
+    help = "Print a signed X-Profile-Token header value for on-demand request profiling."
+
+    def handle(self, *args, **options):
+        if not settings.PROFILING_ENABLED:
+            self.stderr.write("Warning: PROFILING_ENABLED is off, the token will be ignored.")
+        self.stdout.write(make_token())
@@ -0,0 +1,221 @@
+import cProfile
+import logging
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from backend.utils import metrics, profiling
+
+log = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """Counts the queries, and their total duration, made while it is the current counter."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+# The counter of the request being answered. A context variable, so that it follows an
+# async request into the sync_to_async threads where its views and ORM calls run.
+current_queries: ContextVar[QueryCounter | None] = ContextVar("current_queries", default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper installed on every DB connection (see backend.signals); feeds `current_queries`."""
+    counter = current_queries.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def view_label(request) -> str:
+    """URL name of the matched route, so label cardinality stays bounded."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route or "unnamed"
+
+
+class MetricsMiddleware:
+    """
+    Records Prometheus request metrics for every request (exported at /metrics).
+
+    - Latency histogram labelled by URL name, method and response status.
+    - In-flight request gauge.
+    - DB query count and total query time per request, on both the sync and the
+      async path: queries made from the request's context (including the threads
+      sync_to_async runs ORM code in) are counted; those of unrelated thread pools
+      are not.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        queries = QueryCounter()
+        token = current_queries.set(queries)
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+            current_queries.reset(token)
+
+        self.observe(request, response, queries, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        queries = QueryCounter()
+        token = current_queries.set(queries)
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+            current_queries.reset(token)
+
+        self.observe(request, response, queries, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def observe(request, response, queries: QueryCounter, elapsed: float) -> None:
+        view = view_label(request)
+        metrics.REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(elapsed)
+        metrics.DB_QUERIES.labels(view).observe(queries.count)
+        metrics.DB_TIME.labels(view).observe(queries.duration)
+
+
+class ProfilingMiddleware:
+    """
+    Runs selected requests under cProfile and stores the profile on disk.
+
+    A request is profiled when it carries a valid signed `X-Profile-Token` header
+    (see `manage.py profile_token`), when a staff user adds `?_profile` to the URL, or
+    for 1 in PROFILING_SAMPLE_RATE requests. Profiles are saved as `.prof`, `.folded`
+    (flame graph) and `.json` metadata under a new id, which is returned in the
+    `X-Profile-Id` response header (a client's X-Request-ID is only recorded in the
+    metadata and echoed back); staff can browse them at /django-admin/profiles/.
+
+    One request per process is profiled at a time: every ASGI request shares the
+    event-loop thread, where a second profiler would replace the first one's hook
+    (and from Python 3.12 on, fail to start). Requests arriving meanwhile run
+    unprofiled.
+
+    Under ASGI the request is profiled on two threads and the results merged: the
+    event loop (async middleware and views; other requests' coroutines running
+    meanwhile show up too) and the request's sync_to_async thread, where sync views
+    and ORM calls run. From Python 3.12 on one profiler sees every thread.
+
+    Unless PROFILING_ENABLED is set the middleware removes itself at startup, so it
+    costs nothing.
+    """
+
+    sync_capable = True
+    async_capable = True
+    # Held while a request is profiled; taken without waiting, so never blocks the event loop.
+    active = threading.Lock()
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        reason = profiling.trigger(request)
+        if reason is None:
+            return self.get_response(request)
+
+        if not self.active.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profile = cProfile.Profile()
+            started_at = timezone.now()
+            started = time.perf_counter()
+            response = profile.runcall(self.get_response, request)
+        finally:
+            self.active.release()
+        return self.store(request, response, reason, started_at, time.perf_counter() - started, profile)
+
+    async def __acall__(self, request):
+        # trigger() may load request.user from the database.
+        reason = await sync_to_async(profiling.trigger)(request)
+        if reason is None or not self.active.acquire(blocking=False):
+            return await self.get_response(request)
+
+        try:
+            profiles = [cProfile.Profile()]
+            if sys.version_info < (3, 12):
+                profiles.append(cProfile.Profile())
+            started_at = timezone.now()
+            started = time.perf_counter()
+            # Thread-sensitive calls of one request share a thread, so this is the one
+            # the sync views and ORM calls of this request will run on.
+            for profile in profiles[1:]:
+                await sync_to_async(profile.enable)()
+            profiles[0].enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiles[0].disable()
+                for profile in profiles[1:]:
+                    await sync_to_async(profile.disable)()
+        finally:
+            self.active.release()
+        elapsed = time.perf_counter() - started
+        return await sync_to_async(self.store)(request, response, reason, started_at, elapsed, *profiles)
+
+    @staticmethod
+    def store(request, response, reason: str, started_at, elapsed: float, *profiles):
+        """Save the profile(s) of `request` and tag `response` with its id."""
+        rid = profiling.profile_id()
+        client_id = profiling.client_request_id(request)
+        try:
+            profiling.save(profiles[0], rid, {
+                "request_id": client_id,
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+                "trigger": reason,
+                "user": getattr(getattr(request, "user", None), "pk", None),
+                "started_at": started_at.isoformat(),
+            }, *profiles[1:])
+        except OSError:
+            log.exception("Could not store request profile %s", rid)
+            return response
+
+        response["X-Profile-Id"] = rid
+        if client_id:
+            response["X-Request-ID"] = client_id
+        return response
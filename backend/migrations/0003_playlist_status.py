@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:17
+
+from django.db import migrations, models
+
+
+def mark_generated_playlists_done(apps, schema_editor):
+    # Older rows were generated inside the request: no spotify_id means it failed.
+    Playlist = apps.get_model("backend", "Playlist")
+    Playlist.objects.exclude(spotify_id="").update(status="done")
+    Playlist.objects.filter(spotify_id="").update(status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0002_playlist_spotifyaccount_delete_spotify'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16),
+        ),
+        migrations.RunPython(mark_generated_playlists_done, migrations.RunPython.noop),
+    ]
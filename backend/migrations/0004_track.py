@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:24
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0003_playlist_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Track',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uri', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('artist', models.CharField(blank=True, max_length=255)),
+                ('genre', models.CharField(blank=True, max_length=120)),
+                ('popularity', models.PositiveSmallIntegerField(default=0)),
+                ('search', models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('name', 'artist', 'genre', config='english'), output_field=django.contrib.postgres.search.SearchVectorField())),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search'], name='track_search_gin')],
+            },
+        ),
+    ]
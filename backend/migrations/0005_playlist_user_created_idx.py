@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:30
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking writes on large playlist tables.
+    atomic = False
+
+    dependencies = [
+        ('backend', '0004_track'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='playlist',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='playlist_user_created_idx'),
+        ),
+    ]
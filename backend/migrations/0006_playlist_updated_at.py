@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:52
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    Playlist = apps.get_model("backend", "Playlist")
+    Playlist.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_playlist_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
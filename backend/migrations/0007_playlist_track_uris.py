@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:58
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_playlist_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='snapshot_id',
+            field=models.CharField(blank=True, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='track_uris',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=64), blank=True, default=list, size=None),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_playlist_track_uris'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spotifyaccount',
+            name='seen_tracks',
+            field=models.BinaryField(blank=True, default=bytes),
+        ),
+        migrations.AddField(
+            model_name='spotifyaccount',
+            name='seen_tracks_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,59 @@
+import logging
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+log = logging.getLogger(__name__)
+
+# Trigram indexes for the admin's substring search. Django's icontains compiles to
+# UPPER(col) LIKE UPPER('%term%'), so the indexed expression is UPPER(col).
+TRIGRAM_INDEXES = {
+    "playlist_name_upper_trgm": ("backend_playlist", "name"),
+    "playlist_mood_prompt_upper_trgm": ("backend_playlist", "mood_prompt"),
+    "auth_user_username_upper_trgm": ("auth_user", "username"),
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            log.warning("pg_trgm is not available; admin search will scan the tables.")
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, (table, column) in TRIGRAM_INDEXES.items():
+            cursor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+                f'ON "{table}" USING gin (UPPER("{column}") gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name in TRIGRAM_INDEXES:
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on large tables.
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('backend', '0008_spotifyaccount_seen_tracks'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='spotifyaccount',
+            index=models.Index(
+                django.db.models.functions.text.Upper('spotify_id'), name='account_spotify_id_upper_idx'
+            ),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,5 +1,9 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Upper
 
 
 class SpotifyAccount(models.Model):
@@ -8,12 +12,54 @@ class SpotifyAccount(models.Model):
     access_token = models.TextField()
     refresh_token = models.TextField()
     token_expires_at = models.DateTimeField()
+    # Bloom filter of tracks already put in this user's playlists (backend.utils.seen_tracks).
+    seen_tracks = models.BinaryField(default=bytes, blank=True)
+    seen_tracks_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Serves the admin's exact, case-insensitive search ("=spotify_id").
+        indexes = [models.Index(Upper("spotify_id"), name="account_spotify_id_upper_idx")]
 
 
 class Playlist(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     name = models.CharField(max_length=120)
     description = models.TextField(blank=True)
     mood_prompt = models.CharField(max_length=240)
     spotify_id = models.CharField(max_length=120, blank=True)  # filled later
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    # Tracks on Spotify in playlist order, and the snapshot_id they belong to; a
+    # regeneration only sends the difference (see spotify_helpers.sync_tracks).
+    track_uris = ArrayField(models.CharField(max_length=64), default=list, blank=True)
+    snapshot_id = models.CharField(max_length=120, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Serves the newest-first keyset pagination of one user's playlists.
+        indexes = [models.Index(fields=["user", "-created_at", "-id"], name="playlist_user_created_idx")]
+
+
+class Track(models.Model):
+    """Local catalog of Spotify tracks seen in search/recommendation responses or imported in bulk."""
+
+    uri = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    artist = models.CharField(max_length=255, blank=True)
+    genre = models.CharField(max_length=120, blank=True)
+    popularity = models.PositiveSmallIntegerField(default=0)
+    search = models.GeneratedField(
+        expression=SearchVector("name", "artist", "genre", config="english"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [GinIndex(fields=["search"], name="track_search_gin")]
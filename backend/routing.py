@@ -0,0 +1,7 @@
+from django.urls import path
+
+from backend.consumers import PlaylistProgressConsumer
+
+websocket_urlpatterns = [
+    path("ws/playlists/", PlaylistProgressConsumer.as_asgi(), name="playlist_progress"),
+]
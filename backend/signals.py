@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.middleware import count_queries
+from backend.models import Playlist
+from backend.utils import user_cache
+from backend.utils.page_cache import playlist_page_cache
+
+
+@receiver(post_save, sender=Playlist)
+@receiver(post_delete, sender=Playlist)
+def invalidate_playlist_page(sender, instance: Playlist, **kwargs):
+    """
+    Drops the owner's cached playlists page once the change is committed.
+
+    Waiting for the commit keeps a concurrent request from caching the old rows under
+    the new version. Bulk writes (bulk_create, update, bulk_update) send no signals and
+    call `playlist_page_cache.invalidate` themselves.
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: playlist_page_cache.invalidate(user_id))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drops the cached user row used by authentication (see backend.utils.user_cache).
+
+    The entry is dropped right away, so this process sees the change, and again after
+    the commit, in case a concurrent request cached the old row in between.
+    """
+    user_id = instance.pk
+    user_cache.invalidate(user_id)
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    """Lets MetricsMiddleware count the queries of each request (see `count_queries`)."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
@@ -0,0 +1,329 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import Dict, List, Tuple
+
+from asgiref.sync import sync_to_async
+from celery import shared_task
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from backend.models import Playlist
+from backend.utils import progress, seen_tracks
+from backend.utils import spotify_async as sa
+from backend.utils import spotify_helpers as sh
+from backend.utils.page_cache import playlist_page_cache
+
+log = logging.getLogger(__name__)
+
+
+def _build(sp, user, playlist: Playlist, skip=None) -> Tuple[str, List[str], str]:
+    """
+    Create one playlist on Spotify and fill it; returns its Spotify ID, tracks and snapshot_id.
+
+    `skip` leaves out tracks the user already got (see `seen_tracks.skip_seen`).
+    Each step is pushed to the owner's progress sockets (see `backend.utils.progress`).
+    """
+    # Creating the playlist and finding tracks are independent; run them side by side.
+    created = sh.submit(
+        user.pk,
+        sh.create_playlist,
+        sp=sp,
+        owner_id=user.spotifyaccount.spotify_id,
+        name=playlist.name,
+        description=playlist.description or playlist.mood_prompt,
+    )
+    tracks = sh.generate_recommendations(
+        sp=sp, prompt=playlist.mood_prompt, size=30, user_id=user.pk, skip=skip
+    )
+    # Stages go out in their documented order (see backend.utils.progress), as on the async path.
+    spotify_id = created.result()
+    progress.publish(playlist, progress.CREATED, spotify_id=spotify_id)
+    progress.publish(playlist, progress.TRACKS_FETCHED, tracks=len(tracks))
+    snapshot_id = sh.add_tracks(sp, spotify_id, tracks) if tracks else None
+    progress.publish(playlist, progress.TRACKS_ADDED, spotify_id=spotify_id, tracks=len(tracks))
+    return spotify_id, tracks, snapshot_id or ""
+
+
+def _finished(playlist: Playlist, **extra) -> None:
+    """Push the final stage once the status change is committed, so clients can read it back."""
+    stage = progress.DONE if playlist.status == Playlist.Status.DONE else progress.FAILED
+    transaction.on_commit(lambda: progress.publish(playlist, stage, **extra))
+
+
+def run_generation(playlist: Playlist) -> None:
+    """
+    Runs the Spotify side of playlist generation for an already saved record.
+
+    Args:
+        playlist (Playlist): The playlist record to build on Spotify.
+
+    Notes:
+        - Moves the playlist through RUNNING to DONE, storing the new spotify_id,
+          its track list and snapshot_id.
+        - Tracks from the user's earlier playlists are avoided and the new ones are
+          added to their seen-track filter.
+        - On any Spotify error the playlist is marked FAILED and the exception is re-raised.
+    """
+    playlist.status = Playlist.Status.RUNNING
+    playlist.save(update_fields=["status", "updated_at"])
+
+    user = playlist.user
+    try:
+        sp = sh.make_client(user)
+        skip = seen_tracks.skip_seen(user.spotifyaccount)
+        playlist.spotify_id, playlist.track_uris, playlist.snapshot_id = _build(sp, user, playlist, skip)
+    except Exception as exc:
+        playlist.status = Playlist.Status.FAILED
+        playlist.save(update_fields=["status", "updated_at"])
+        _finished(playlist, error=str(exc))
+        raise
+
+    playlist.status = Playlist.Status.DONE
+    playlist.save(update_fields=["spotify_id", "track_uris", "snapshot_id", "status", "updated_at"])
+    seen_tracks.remember(user.spotifyaccount.pk, playlist.track_uris)
+    _finished(playlist, tracks=len(playlist.track_uris))
+
+
+def run_regeneration(playlist: Playlist) -> None:
+    """
+    Refreshes the tracks of a playlist in place from new recommendations.
+
+    Args:
+        playlist (Playlist): The playlist record to refresh.
+
+    Notes:
+        - Only the difference between the stored and the new track list is sent to
+          Spotify (see `spotify_helpers.sync_tracks`); an unchanged playlist costs no
+          playlist call at all.
+        - Without a stored snapshot_id the current tracks are read from Spotify first.
+        - Tracks from the user's other playlists are avoided, the playlist's own tracks
+          stay eligible.
+        - A playlist that never reached Spotify is generated from scratch instead.
+        - On any Spotify error the playlist is marked FAILED and its snapshot_id cleared,
+          since a partly applied diff leaves the stored track list out of date.
+    """
+    if not playlist.spotify_id:
+        return run_generation(playlist)
+
+    playlist.status = Playlist.Status.RUNNING
+    playlist.save(update_fields=["status", "updated_at"])
+
+    user = playlist.user
+    try:
+        sp = sh.make_client(user)
+        skip = seen_tracks.skip_seen(user.spotifyaccount, keep=playlist.track_uris)
+        tracks = sh.generate_recommendations(
+            sp=sp, prompt=playlist.mood_prompt, size=30, user_id=user.pk, skip=skip
+        )
+        progress.publish(playlist, progress.TRACKS_FETCHED, tracks=len(tracks))
+        old, snapshot_id = playlist.track_uris, playlist.snapshot_id
+        if not snapshot_id:
+            old, snapshot_id = sh.get_playlist_tracks(sp, playlist.spotify_id)
+        playlist.track_uris, playlist.snapshot_id = sh.sync_tracks(
+            sp, playlist.spotify_id, old, tracks, snapshot_id
+        )
+        progress.publish(playlist, progress.TRACKS_ADDED, tracks=len(playlist.track_uris))
+    except Exception as exc:
+        playlist.status = Playlist.Status.FAILED
+        playlist.snapshot_id = ""
+        playlist.save(update_fields=["status", "snapshot_id", "updated_at"])
+        _finished(playlist, error=str(exc))
+        raise
+
+    playlist.status = Playlist.Status.DONE
+    playlist.save(update_fields=["track_uris", "snapshot_id", "status", "updated_at"])
+    seen_tracks.remember(user.spotifyaccount.pk, playlist.track_uris)
+    _finished(playlist, tracks=len(playlist.track_uris))
+
+
+def run_bulk_generation(user, playlists: List[Playlist]) -> Dict[int, str]:
+    """
+    Generates several already saved playlists of one user on Spotify.
+
+    Args:
+        user: Owner of every playlist in `playlists`.
+        playlists (List[Playlist]): Saved playlist records to build.
+
+    Returns:
+        Dict[int, str]: Error messages keyed by playlist ID for the items that failed.
+
+    Notes:
+        - One Spotify client (and so at most one token refresh) is shared by all items.
+        - Items are built concurrently, at most SPOTIFY_PER_USER_CONCURRENCY at a time.
+        - Status changes are written with one UPDATE before and one bulk_update after,
+          instead of two saves per playlist; `playlists` are updated in place.
+        - Every item avoids the tracks of the user's earlier playlists (but not of its
+          siblings, which are built at the same time); all new tracks are added to the
+          seen-track filter in one write at the end.
+    """
+    Playlist.objects.filter(pk__in=[p.pk for p in playlists]).update(
+        status=Playlist.Status.RUNNING, updated_at=timezone.now()
+    )
+    # update() and bulk_update() send no post_save, so invalidate the page cache here.
+    transaction.on_commit(lambda: playlist_page_cache.invalidate(user.pk))
+
+    errors: Dict[int, str] = {}
+    try:
+        sp = sh.make_client(user)
+        skip = seen_tracks.skip_seen(user.spotifyaccount)
+    except Exception as exc:
+        log.exception("Bulk playlist generation failed (user=%s)", user.pk)
+        errors = {p.pk: str(exc) for p in playlists}
+        sp = None
+
+    def build(playlist: Playlist) -> Tuple[str, List[str], str]:
+        try:
+            return _build(sp, user, playlist, skip)
+        finally:
+            # Catalog reads/writes open a connection in this pool thread.
+            connections.close_all()
+
+    if sp is not None:
+        workers = max(1, min(len(playlists), settings.SPOTIFY_PER_USER_CONCURRENCY))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk") as pool:
+            futures = [pool.submit(build, p) for p in playlists]
+            for playlist, future in zip(playlists, futures):
+                try:
+                    playlist.spotify_id, playlist.track_uris, playlist.snapshot_id = future.result()
+                    playlist.status = Playlist.Status.DONE
+                except Exception as exc:
+                    log.exception("Playlist generation failed (playlist=%s)", playlist.pk)
+                    errors[playlist.pk] = str(exc)
+
+    finished = timezone.now()
+    for playlist in playlists:
+        playlist.updated_at = finished
+        if playlist.pk in errors:
+            playlist.status = Playlist.Status.FAILED
+    Playlist.objects.bulk_update(
+        playlists, ["spotify_id", "track_uris", "snapshot_id", "status", "updated_at"]
+    )
+    if sp is not None:
+        seen_tracks.remember(
+            user.spotifyaccount.pk,
+            [uri for p in playlists if p.pk not in errors for uri in p.track_uris],
+        )
+    transaction.on_commit(lambda: playlist_page_cache.invalidate(user.pk))
+    for playlist in playlists:
+        if playlist.pk in errors:
+            _finished(playlist, error=errors[playlist.pk])
+        else:
+            _finished(playlist, tracks=len(playlist.track_uris))
+    return errors
+
+
+async def arun_generation(playlist: Playlist) -> None:
+    """
+    Async counterpart of `run_generation` used by the native async API views.
+
+    Playlist creation and track lookup are awaited together on the event loop, so a
+    single worker can keep many generations in flight without a thread for each.
+    """
+    playlist.status = Playlist.Status.RUNNING
+    await playlist.asave(update_fields=["status", "updated_at"])
+
+    async def create(account):
+        spotify_id = await sa.create_playlist(
+            account.access_token,
+            owner_id=account.spotify_id,
+            name=playlist.name,
+            description=playlist.description or playlist.mood_prompt,
+        )
+        await progress.apublish(playlist, progress.CREATED, spotify_id=spotify_id)
+        return spotify_id
+
+    async def fetch(account):
+        tracks = await sa.generate_recommendations(
+            account.access_token, playlist.mood_prompt, size=30, skip=seen_tracks.skip_seen(account)
+        )
+        await progress.apublish(playlist, progress.TRACKS_FETCHED, tracks=len(tracks))
+        return tracks
+
+    try:
+        account = await sa.get_account(playlist.user_id)
+        spotify_id, tracks = await asyncio.gather(create(account), fetch(account))
+        snapshot_id = await sa.add_tracks(account.access_token, spotify_id, tracks) if tracks else None
+        await progress.apublish(playlist, progress.TRACKS_ADDED, spotify_id=spotify_id, tracks=len(tracks))
+    except Exception as exc:
+        playlist.status = Playlist.Status.FAILED
+        await playlist.asave(update_fields=["status", "updated_at"])
+        await progress.apublish(playlist, progress.FAILED, error=str(exc))
+        raise
+
+    playlist.spotify_id = spotify_id
+    playlist.track_uris = tracks
+    playlist.snapshot_id = snapshot_id or ""
+    playlist.status = Playlist.Status.DONE
+    await playlist.asave(update_fields=["spotify_id", "track_uris", "snapshot_id", "status", "updated_at"])
+    await sync_to_async(seen_tracks.remember)(account.pk, tracks)
+    await progress.apublish(playlist, progress.DONE, tracks=len(tracks))
+
+
+def _claim(playlist_ids: List[int]) -> List[int]:
+    """
+    Move the still pending playlists among `playlist_ids` to RUNNING; returns their IDs.
+
+    Jobs are acknowledged late, so a worker crash or a broker redelivery runs a job
+    again: only the run that claims a row builds it, and a repeat finds nothing left.
+    """
+    with transaction.atomic():
+        claimed = list(
+            Playlist.objects.select_for_update()
+            .filter(pk__in=playlist_ids, status=Playlist.Status.PENDING)
+            .values_list("pk", flat=True)
+        )
+        Playlist.objects.filter(pk__in=claimed).update(status=Playlist.Status.RUNNING, updated_at=timezone.now())
+    if len(claimed) < len(playlist_ids):
+        log.info("Skipping playlists that are no longer pending: %s", sorted(set(playlist_ids) - set(claimed)))
+    return claimed
+
+
+@shared_task
+def generate_playlist(playlist_id: int) -> None:
+    """
+    Celery job that generates the Spotify playlist for a pending Playlist row.
+
+    Failures are logged and recorded on the playlist status rather than retried,
+    so clients polling the playlist see "failed" instead of waiting forever. A row
+    that is no longer pending (a redelivered job) is left alone.
+    """
+    if not _claim([playlist_id]):
+        return
+    playlist = Playlist.objects.select_related("user__spotifyaccount").get(pk=playlist_id)
+    try:
+        run_generation(playlist)
+    except Exception:
+        log.exception("Playlist generation failed (playlist=%s)", playlist_id)
+
+
+@shared_task
+def regenerate_playlist(playlist_id: int) -> None:
+    """Celery job that refreshes the tracks of a pending playlist (see `run_regeneration`)."""
+    if not _claim([playlist_id]):
+        return
+    playlist = Playlist.objects.select_related("user__spotifyaccount").get(pk=playlist_id)
+    try:
+        run_regeneration(playlist)
+    except Exception:
+        log.exception("Playlist regeneration failed (playlist=%s)", playlist_id)
+
+
+@shared_task
+def generate_playlists(playlist_ids: List[int]) -> None:
+    """
+    Celery job for a bulk request: generates many pending playlists in one worker run.
+
+    Playlists are grouped per owner so each user's items share one Spotify client;
+    only the ones still pending are built.
+    """
+    playlists = (
+        Playlist.objects.filter(pk__in=_claim(playlist_ids))
+        .select_related("user__spotifyaccount")
+        .order_by("user_id", "pk")
+    )
+    for _, group in groupby(playlists, key=lambda p: p.user_id):
+        group = list(group)
+        run_bulk_generation(group[0].user, group)
@@ -1,3 +1,1107 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import numpy as np
+import zstandard
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from spotipy.exceptions import SpotifyException
+
+from backend.middleware import MetricsMiddleware, ProfilingMiddleware
+from backend.models import Playlist, SpotifyAccount, Track
+from benchmarks import cold_start
+from benchmarks.fake_spotify import Faults, FakeSpotifyServer
+from backend import tasks
+from backend.utils import catalog, export, profiling, progress, seen_tracks
+from backend.utils import spotify_async as sa
+from backend.utils import track_index
+from backend.utils.bloom import BloomFilter
+from backend.utils.rate_limit import RESERVE, LocalBucket, Priority, RateLimiter, Throttled
+from backend.utils import spotify_helpers as sh
+from backend.utils.spotify_cache import PromptCache, prompt_cache
+from backend.utils.spotify_helpers import ClientRegistry
+from software.asgi import application
+from software.celery import app as celery_app
+
+
+def make_user(username="listener@example.com"):
+    user = User.objects.create_user(username=username, password="secret-pass-123")
+    SpotifyAccount.objects.create(
+        user=user,
+        spotify_id="spotify-user",
+        access_token="access",
+        refresh_token="refresh",
+        token_expires_at=timezone.now() + timedelta(hours=1),
+    )
+    return user
+
+
+@override_settings(PLAYLIST_GENERATION_ASYNC=True)
+class PlaylistJobTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Run queued jobs in-process instead of going through the broker.
+        # The app reads Django settings under the CELERY namespace, so that key wins.
+        always_eager = celery_app.conf.CELERY_TASK_ALWAYS_EAGER
+        celery_app.conf.CELERY_TASK_ALWAYS_EAGER = True
+        self.addCleanup(setattr, celery_app.conf, "CELERY_TASK_ALWAYS_EAGER", always_eager)
+
+    def post_playlist(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/playlists/",
+                {"name": "Mood", "mood_prompt": "calm lo-fi"},
+                format="json",
+            )
+
+    @mock.patch.multiple(sh, make_client=mock.DEFAULT, create_playlist=mock.DEFAULT,
+                         generate_recommendations=mock.DEFAULT, add_tracks=mock.DEFAULT)
+    def test_post_queues_job_and_returns_202(self, **spotify):
+        spotify["create_playlist"].return_value = "sp-123"
+        spotify["generate_recommendations"].return_value = ["spotify:track:1"]
+        spotify["add_tracks"].return_value = "snap-1"
+
+        response = self.post_playlist()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], Playlist.Status.PENDING)
+        status = self.client.get(f"/api/playlists/{response.data['id']}/status/").data
+        self.assertEqual(status["status"], Playlist.Status.DONE)
+        self.assertEqual(status["spotify_id"], "sp-123")
+        spotify["add_tracks"].assert_called_once_with(mock.ANY, "sp-123", ["spotify:track:1"])
+        playlist = Playlist.objects.get(pk=response.data["id"])
+        self.assertEqual((playlist.track_uris, playlist.snapshot_id), (["spotify:track:1"], "snap-1"))
+
+        self.post_playlist()
+        skip = spotify["generate_recommendations"].call_args.kwargs["skip"]
+        self.assertTrue(skip("spotify:track:1"))
+
+    @mock.patch.multiple(sh, make_client=mock.DEFAULT, create_playlist=mock.DEFAULT,
+                         generate_recommendations=mock.DEFAULT, add_tracks=mock.DEFAULT)
+    def test_failed_job_is_recorded(self, **spotify):
+        spotify["create_playlist"].side_effect = RuntimeError("spotify down")
+
+        with self.assertLogs("backend.tasks", "ERROR"):
+            response = self.post_playlist()
+
+        playlist = Playlist.objects.get(pk=response.data["id"])
+        self.assertEqual(playlist.status, Playlist.Status.FAILED)
+        self.assertEqual(playlist.spotify_id, "")
+
+    @mock.patch.multiple(sh, make_client=mock.DEFAULT, create_playlist=mock.DEFAULT,
+                         generate_recommendations=mock.DEFAULT, add_tracks=mock.DEFAULT)
+    def test_redelivered_job_builds_nothing(self, **spotify):
+        spotify["create_playlist"].return_value = "sp-123"
+        spotify["generate_recommendations"].return_value = ["spotify:track:1"]
+        spotify["add_tracks"].return_value = "snap-1"
+        response = self.post_playlist()
+
+        tasks.generate_playlist(response.data["id"])
+        tasks.generate_playlists([response.data["id"]])
+
+        spotify["create_playlist"].assert_called_once()
+        self.assertEqual(Playlist.objects.get(pk=response.data["id"]).status, Playlist.Status.DONE)
+
+    @mock.patch.multiple(sh, make_client=mock.DEFAULT, create_playlist=mock.DEFAULT,
+                         generate_recommendations=mock.DEFAULT, add_tracks=mock.DEFAULT)
+    def test_bulk_create_shares_one_client(self, **spotify):
+        spotify["create_playlist"].side_effect = lambda name, **kw: f"sp-{name}"
+        spotify["generate_recommendations"].return_value = ["spotify:track:1"]
+        spotify["add_tracks"].return_value = "snap-1"
+        items = [{"name": f"Mix {i}", "mood_prompt": "upbeat indie"} for i in range(5)]
+
+        with override_settings(PLAYLIST_GENERATION_ASYNC=False):
+            response = self.client.post("/api/playlists/bulk/", items, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([r["spotify_id"] for r in response.data], [f"sp-Mix {i}" for i in range(5)])
+        spotify["make_client"].assert_called_once()
+        self.assertEqual(
+            Playlist.objects.filter(user=self.user, status=Playlist.Status.DONE).count(), 5
+        )
+
+    @mock.patch.multiple(sh, make_client=mock.DEFAULT, create_playlist=mock.DEFAULT,
+                         generate_recommendations=mock.DEFAULT, add_tracks=mock.DEFAULT)
+    def test_bulk_reports_per_item_errors(self, **spotify):
+        def create(name, **kw):
+            if name == "Bad":
+                raise RuntimeError("spotify down")
+            return "sp-good"
+
+        spotify["create_playlist"].side_effect = create
+        spotify["generate_recommendations"].return_value = []
+        items = [{"name": "Good", "mood_prompt": "calm"}, {"name": "Bad", "mood_prompt": "calm"}]
+
+        with override_settings(PLAYLIST_GENERATION_ASYNC=False), self.assertLogs("backend.tasks", "ERROR"):
+            response = self.client.post("/api/playlists/bulk/", items, format="json")
+
+        self.assertEqual(response.status_code, 207)
+        good, bad = response.data
+        self.assertEqual((good["status"], good["spotify_id"]), (Playlist.Status.DONE, "sp-good"))
+        self.assertNotIn("error", good)
+        self.assertEqual((bad["status"], bad["error"]), (Playlist.Status.FAILED, "spotify down"))
+
+    @mock.patch.multiple(sh, make_client=mock.DEFAULT, generate_recommendations=mock.DEFAULT,
+                         sync_tracks=mock.DEFAULT, get_playlist_tracks=mock.DEFAULT)
+    def test_regenerate_sends_only_the_diff(self, **spotify):
+        playlist = Playlist.objects.create(
+            user=self.user, name="Mix", mood_prompt="calm", spotify_id="sp-1", status=Playlist.Status.DONE,
+            track_uris=["spotify:track:1", "spotify:track:2"], snapshot_id="snap-1",
+        )
+        spotify["generate_recommendations"].return_value = ["spotify:track:1", "spotify:track:3"]
+        spotify["sync_tracks"].return_value = (["spotify:track:1", "spotify:track:3"], "snap-2")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/playlists/{playlist.pk}/regenerate/")
+
+        self.assertEqual(response.status_code, 202)
+        spotify["sync_tracks"].assert_called_once_with(
+            mock.ANY, "sp-1", ["spotify:track:1", "spotify:track:2"],
+            ["spotify:track:1", "spotify:track:3"], "snap-1",
+        )
+        spotify["get_playlist_tracks"].assert_not_called()
+        playlist.refresh_from_db()
+        self.assertEqual(playlist.status, Playlist.Status.DONE)
+        self.assertEqual((playlist.track_uris, playlist.snapshot_id), (["spotify:track:1", "spotify:track:3"], "snap-2"))
+
+    def test_regenerate_refuses_running_playlist(self):
+        playlist = Playlist.objects.create(
+            user=self.user, name="Mix", mood_prompt="calm", spotify_id="sp-1", status=Playlist.Status.RUNNING
+        )
+        response = self.client.post(f"/api/playlists/{playlist.pk}/regenerate/")
+        self.assertEqual(response.status_code, 409)
+
+    def test_bulk_rejects_too_many_items(self):
+        items = [{"name": "Mix", "mood_prompt": "calm"}] * 3
+        with override_settings(PLAYLIST_BULK_MAX=2):
+            response = self.client.post("/api/playlists/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Playlist.objects.exists())
+
+
+class PlaylistExportTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.other = User.objects.create_user(username="other@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            Playlist.objects.create(user=self.user, name=f"Mix {i}", mood_prompt="calm",
+                                    track_uris=["spotify:track:a", "spotify:track:b"])
+        Playlist.objects.create(user=self.other, name="Not mine", mood_prompt="loud")
+
+    def download(self, **params):
+        response = self.client.get("/api/playlists/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_streams_own_playlists_as_ndjson(self):
+        response, body = self.download()
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["Mix 0", "Mix 1", "Mix 2"])
+        self.assertEqual(rows[0]["track_uris"], ["spotify:track:a", "spotify:track:b"])
+
+    def test_csv_with_zstd_and_date_filter(self):
+        Playlist.objects.filter(name="Mix 0").update(created_at=timezone.now() - timedelta(days=10))
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+
+        response, body = self.download(output="csv", compress="zstd", since=since)
+
+        self.assertEqual(response["Content-Type"], "application/zstd")
+        self.assertIn(".csv.zst", response["Content-Disposition"])
+        text = zstandard.ZstdDecompressor().decompressobj().decompress(body).decode()
+        rows = list(csv.DictReader(text.splitlines()))
+        self.assertEqual([row["name"] for row in rows], ["Mix 1", "Mix 2"])
+        self.assertEqual(rows[0]["track_uris"], "spotify:track:a spotify:track:b")
+
+    def test_only_staff_export_other_users(self):
+        response = self.client.get("/api/playlists/export/", {"user": self.other.pk})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get("/api/playlists/export/", {"since": "soon"}).status_code, 400)
+
+        self.user.is_staff = True
+        self.user.save()
+        _, body = self.download()
+        self.assertEqual(len(body.splitlines()), 4)
+        _, body = self.download(user=self.other.pk)
+        self.assertEqual(json.loads(body)["name"], "Not mine")
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    async def test_asgi_export_is_streamed(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+
+        with mock.patch.object(export, "BUFFER_BYTES", 1), \
+                mock.patch.object(export, "ndjson_row", wraps=export.ndjson_row) as encoded:
+            response = await client.get("/api/playlists/export/")
+            self.assertTrue(response.is_async)
+            chunks = aiter(response.streaming_content)
+            first = await anext(chunks)
+            # Only the first row has been fetched and encoded when its chunk goes out.
+            self.assertEqual(encoded.call_count, 1)
+            rest = [chunk async for chunk in chunks]
+
+        rows = [json.loads(line) for line in b"".join([first, *rest]).decode().splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["Mix 0", "Mix 1", "Mix 2"])
+
+    def test_management_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "playlists.ndjson")
+            call_command("export_playlists", user=self.other.username, output=path, stderr=mock.Mock())
+            with open(path) as handle:
+                self.assertEqual([json.loads(line)["name"] for line in handle], ["Not mine"])
+
+
+class PlaylistPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        Playlist.objects.bulk_create(
+            [Playlist(user=self.user, name=f"Mix {i}", mood_prompt="calm") for i in range(5)]
+        )
+        self.expected = list(
+            Playlist.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+    def test_api_walks_every_playlist_once(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        seen, url = [], "/api/playlists/?page_size=2"
+        while url:
+            page = client.get(url).data
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+
+        # Rows share a created_at (one bulk insert), so this also checks the id tie-break.
+        self.assertEqual(seen, self.expected)
+
+    def test_html_page_links_to_older_playlists(self):
+        caches["pages"].clear()
+        self.client.force_login(self.user)
+
+        response = self.client.get("/spotify-playlists/?page_size=3")
+
+        self.assertEqual([p.id for p in response.context["playlists"]], self.expected[:3])
+        self.assertIn("cursor=", response.context["next_url"])
+        self.assertIsNone(response.context["previous_url"])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.playlist = Playlist.objects.create(user=self.user, name="Mix", mood_prompt="calm")
+        Playlist.objects.create(user=self.user, name="Other", mood_prompt="calm")
+
+    def test_matching_etag_gets_304_with_one_query(self):
+        etag = self.client.get("/api/playlists/")["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/playlists/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_changes_and_deletes_change_the_etag(self):
+        etag = self.client.get("/api/playlists/")["ETag"]
+
+        self.playlist.status = Playlist.Status.DONE
+        self.playlist.save(update_fields=["status", "updated_at"])
+        response = self.client.get("/api/playlists/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        self.playlist.delete()
+        self.assertEqual(self.client.get("/api/playlists/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_retrieve_honours_if_modified_since(self):
+        Playlist.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+        url = f"/api/playlists/{self.playlist.pk}/"
+
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get("/api/playlists/999999/").status_code, 404)
+
+    def test_malformed_pk_is_404(self):
+        self.assertEqual(self.client.get("/api/playlists/abc/").status_code, 404)
+
+    def test_no_last_modified_within_the_current_second(self):
+        # A second change in the same second would be invisible to If-Modified-Since.
+        response = self.client.get("/api/playlists/")
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("ETag", response)
+
+
+class SharedCacheSettingsTests(SimpleTestCase):
+    """Caches that workers invalidate default to shared Redis (software.settings)."""
+
+    def load_settings(self, **env):
+        unset = ("PAGE_CACHE_URL", "AUTH_CACHE_URL", "CHANNEL_LAYER_URL")
+        env = {**{k: v for k, v in os.environ.items() if k not in unset},
+               "CELERY_TASK_ALWAYS_EAGER": "0", "PLAYLIST_GENERATION_ASYNC": "1", **env}
+        code = "from software import settings as s; print(s.CACHES['pages']['LOCATION'], s.CACHES['auth']['LOCATION'])"
+        return subprocess.run([sys.executable, "-c", code], cwd=settings.BASE_DIR, env=env,
+                              capture_output=True, text=True)
+
+    def test_generation_on_workers_uses_the_brokers_redis(self):
+        loaded = self.load_settings(CELERY_BROKER_URL="redis://redis:6379/0")
+
+        self.assertEqual(loaded.stdout.split(), ["redis://redis:6379/3", "redis://redis:6379/4"], loaded.stderr)
+
+    def test_refuses_local_memory_without_a_redis_broker(self):
+        loaded = self.load_settings(CELERY_BROKER_URL="amqp://rabbit//", CHANNEL_LAYER_URL="redis://redis:6379/5")
+
+        self.assertNotEqual(loaded.returncode, 0)
+        self.assertIn("PAGE_CACHE_URL", loaded.stderr)
+
+
+class MetricsTests(TestCase):
+    def test_request_metrics_are_exported(self):
+        client = APIClient()
+        client.force_authenticate(make_user())
+        client.get("/api/playlists/")
+
+        body = self.client.get("/metrics").content.decode()
+
+        self.assertIn(
+            'filipy_http_request_duration_seconds_count{method="GET",status="200",view="playlist-list"}', body
+        )
+        self.assertIn('filipy_db_queries_per_request_count{view="playlist-list"}', body)
+        self.assertIn("filipy_http_requests_in_flight", body)
+
+    async def test_async_path_counts_queries(self):
+        async def view(request):
+            await sync_to_async(User.objects.count)()
+            return HttpResponse()
+
+        middleware = MetricsMiddleware(view)
+        labels = {"view": "unmatched"}
+        before = REGISTRY.get_sample_value("filipy_db_queries_per_request_sum", labels) or 0
+
+        await middleware(RequestFactory().get("/nowhere/"))
+
+        self.assertEqual(REGISTRY.get_sample_value("filipy_db_queries_per_request_sum", labels), before + 1)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, 200)
+
+
+class AuthCacheTests(TestCase):
+    def setUp(self):
+        caches["auth"].clear()
+        caches["sessions"].clear()
+        self.user = make_user()
+
+    def auth_queries(self, client, url="/api/playlists/", **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"] or "django_session" in q["sql"]]
+
+    def test_warm_jwt_request_makes_no_auth_queries(self):
+        bearer = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.assertEqual(len(self.auth_queries(self.client, **bearer)), 1)
+        self.assertEqual(self.auth_queries(self.client, **bearer), [])
+
+    def test_warm_session_request_makes_no_auth_queries(self):
+        self.client.force_login(self.user)
+        self.auth_queries(self.client)
+        self.assertEqual(self.auth_queries(self.client), [])
+        self.assertEqual(self.auth_queries(self.client, "/spotify-playlists/"), [])
+
+    def test_user_changes_invalidate_the_cache(self):
+        bearer = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.auth_queries(self.client, **bearer)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get("/api/playlists/", **bearer).status_code, 401)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        enabled = override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.tmp.name)
+        enabled.enable()
+        self.addCleanup(enabled.disable)
+
+    def test_token_request_is_profiled(self):
+        client = APIClient()
+        client.force_authenticate(make_user())
+        response = client.get("/api/playlists/", HTTP_X_PROFILE_TOKEN=profiling.make_token(),
+                              HTTP_X_REQUEST_ID="req-abcdef12")
+
+        # The client's id is only echoed: the profile is stored under a fresh one.
+        self.assertEqual(response["X-Request-ID"], "req-abcdef12")
+        self.assertNotEqual(response["X-Profile-Id"], "req-abcdef12")
+        [meta] = profiling.list_profiles()
+        self.assertEqual((meta["path"], meta["status"], meta["trigger"]), ("/api/playlists/", 200, "token"))
+        self.assertEqual(meta["request_id"], "req-abcdef12")
+        folded = profiling.profile_file(response["X-Profile-Id"], "folded").read_text()
+        self.assertIn("list (views.py:", folded)
+
+    async def test_async_request_is_profiled(self):
+        user = await sync_to_async(make_user)()
+        client = AsyncClient()
+        await client.aforce_login(user)
+
+        response = await client.get("/api/playlists/", headers={
+            "X-Profile-Token": profiling.make_token(), "X-Request-Id": "req-async123",
+        })
+
+        self.assertEqual(response["X-Request-ID"], "req-async123")
+        folded = profiling.profile_file(response["X-Profile-Id"], "folded").read_text()
+        # The sync view ran on the request's thread, not the event loop.
+        self.assertIn("list (views.py:", folded)
+
+    async def test_one_request_is_profiled_at_a_time(self):
+        user = await sync_to_async(make_user)()
+        client = AsyncClient()
+        await client.aforce_login(user)
+
+        # As if another request on the event loop were being profiled.
+        with ProfilingMiddleware.active:
+            response = await client.get("/api/playlists/", headers={"X-Profile-Token": profiling.make_token()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+
+    def test_unmarked_and_forged_requests_are_not_profiled(self):
+        client = APIClient()
+        client.force_authenticate(make_user())
+        client.get("/api/playlists/")
+        response = client.get("/api/playlists/", HTTP_X_PROFILE_TOKEN="profile:forged")
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_staff_browse_and_download_profiles(self):
+        staff = make_user("staff@example.com")
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        rid = self.client.get("/?_profile=1")["X-Profile-Id"]
+
+        page = self.client.get("/django-admin/profiles/")
+        self.assertContains(page, f"{rid}.folded")
+        download = self.client.get(f"/django-admin/profiles/{rid}.prof")
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(self.client.get("/django-admin/profiles/../x.prof").status_code, 404)
+
+        self.client.force_login(make_user("plain@example.com"))
+        self.assertEqual(self.client.get("/django-admin/profiles/").status_code, 302)
+
+
+class ScalableAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin@example.com", password="x")
+        self.client.force_login(self.admin)
+        self.owner = make_user()
+
+    def add_playlists(self, count):
+        users = [User.objects.create_user(username=f"u{Playlist.objects.count()}-{i}@example.com") for i in range(count)]
+        Playlist.objects.bulk_create(Playlist(user=user, name="Mix", mood_prompt="calm") for user in users)
+
+    def changelist(self, **params):
+        response = self.client.get("/django-admin/backend/playlist/", params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_playlists(3)
+        self.changelist()  # warms the session and user caches
+        with CaptureQueriesContext(connection) as few:
+            self.changelist()
+        self.add_playlists(20)
+        with CaptureQueriesContext(connection) as many:
+            self.changelist()
+
+        self.assertEqual(len(few), len(many))
+        # No sidebar query loads every user.
+        self.assertFalse([q for q in many if 'FROM "auth_user"' in q["sql"] and "LIMIT" not in q["sql"]
+                          and "WHERE" not in q["sql"]])
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=5)
+    def test_count_stops_at_the_limit(self):
+        self.add_playlists(12)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.changelist()
+
+        self.assertGreaterEqual(response.context["cl"].result_count, 6)
+        counts = [q["sql"] for q in queries if "COUNT(*)" in q["sql"]]
+        self.assertTrue(counts and all("LIMIT 6" in sql for sql in counts))
+
+    def test_user_filter_and_autocomplete(self):
+        Playlist.objects.create(user=self.owner, name="Owned", mood_prompt="calm")
+        self.add_playlists(2)
+
+        response = self.changelist(user=self.owner.pk)
+        self.assertEqual([p.name for p in response.context["cl"].result_list], ["Owned"])
+        self.assertContains(response, self.owner.username)
+
+        found = self.client.get("/django-admin/autocomplete/", {
+            "app_label": "backend", "model_name": "playlist", "field_name": "user", "term": "listener",
+        }).json()
+        self.assertEqual([r["text"] for r in found["results"]], [self.owner.username])
+
+    def test_track_search_uses_the_indexed_columns(self):
+        Track.objects.bulk_create([
+            Track(uri="spotify:track:1", name="Rainy Day", artist="Drizzle"),
+            Track(uri="spotify:track:2", name="Sunny Day", artist="Glow"),
+        ])
+
+        def search(term):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/django-admin/backend/track/", {"q": term})
+            self.assertFalse([q for q in queries if "LIKE" in q["sql"]])
+            return [t.uri for t in response.context["cl"].result_list]
+
+        self.assertEqual(search("rainy"), ["spotify:track:1"])
+        self.assertEqual(search("spotify:track:2"), ["spotify:track:2"])
+        self.assertEqual(search("day"), ["spotify:track:2", "spotify:track:1"])
+
+
+
+class StartupImportTests(SimpleTestCase):
+    """Fresh web and worker processes stay lazy and within their import budget (benchmarks.cold_start)."""
+
+    def assert_within_budget(self, target):
+        runs = [cold_start.run(target) for _ in range(3)]
+        slowest = sorted(runs[0]["top_level"].items(), key=lambda item: -item[1])[:10]
+
+        self.assertEqual([m for m in cold_start.LAZY_MODULES if m in runs[0]["modules"]], [], slowest)
+        # Best of three, so one run slowed by a busy machine does not fail the suite.
+        self.assertLess(min(r["import_ms"] for r in runs), cold_start.IMPORT_BUDGET_MS[target], slowest)
+
+    def test_wsgi_process(self):
+        self.assert_within_budget("wsgi")
+
+    def test_asgi_process(self):
+        self.assert_within_budget("asgi")
+
+    def test_worker_process(self):
+        self.assert_within_budget("worker")
+
+
+class ClientRegistryTests(TestCase):
+    def test_reuses_client_until_token_changes(self):
+        registry = ClientRegistry(maxsize=2)
+
+        first = registry.get(1, "token-a")
+        self.assertIs(registry.get(1, "token-a"), first)
+        self.assertIsNot(registry.get(1, "token-b"), first)
+
+        stats = registry.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 2, 1))
+
+    def test_evicts_least_recently_used(self):
+        registry = ClientRegistry(maxsize=2)
+        registry.get(1, "a")
+        registry.get(2, "b")
+        registry.get(1, "a")
+        registry.get(3, "c")
+
+        self.assertEqual(registry.stats()["size"], 2)
+        registry.get(1, "a")
+        self.assertEqual(registry.stats()["hits"], 2)
+
+
+@override_settings(SPOTIFY_PER_USER_CONCURRENCY=1)
+class FanoutTests(SimpleTestCase):
+    def setUp(self):
+        pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(pool.shutdown)
+        patcher = mock.patch.object(sh, "get_executor", return_value=pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_blocked_user_does_not_delay_others(self):
+        release, running, peak = threading.Event(), [], []
+
+        def slow(i):
+            running.append(i)
+            peak.append(len(running))
+            release.wait(5)
+            running.remove(i)
+            return i
+
+        burst = [sh.submit("busy", slow, i) for i in range(4)]
+        try:
+            # One pool thread holds the busy user's call, the others wait off the pool.
+            self.assertEqual(sh.submit("other", lambda: "free").result(timeout=2), "free")
+        finally:
+            release.set()
+
+        self.assertEqual([f.result(timeout=5) for f in burst], [0, 1, 2, 3])
+        self.assertEqual(max(peak), 1)
+
+    def test_errors_reach_the_future_and_free_the_slot(self):
+        failed = sh.submit("user", lambda: 1 / 0)
+
+        self.assertRaises(ZeroDivisionError, failed.result, timeout=2)
+        self.assertEqual(sh.submit("user", lambda: "next").result(timeout=2), "next")
+
+
+class TokenRefreshTests(TransactionTestCase):
+    def test_concurrent_refresh_is_single_flight(self):
+        user = make_user()
+        SpotifyAccount.objects.filter(user=user).update(
+            token_expires_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        def slow_refresh(refresh_token):
+            time.sleep(0.05)
+            return {"access_token": "fresh", "expires_in": 3600}
+
+        oauth = mock.Mock()
+        oauth.refresh_access_token.side_effect = slow_refresh
+        start = threading.Barrier(10)
+        tokens = []
+
+        def worker():
+            try:
+                account = SpotifyAccount.objects.get(user=user)
+                start.wait()
+                sh.refresh_spotify_token(account)
+                tokens.append(account.access_token)
+            finally:
+                connection.close()
+
+        with mock.patch.object(sh, "get_spotify_oauth", return_value=oauth):
+            threads = [threading.Thread(target=worker) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(oauth.refresh_access_token.call_count, 1)
+        self.assertEqual(tokens, ["fresh"] * 10)
+        self.assertEqual(SpotifyAccount.objects.get(user=user).access_token, "fresh")
+        self.assertNotIn(SpotifyAccount.objects.get(user=user).pk, sh._refresh_locks)
+
+
+class PromptCacheTests(TestCase):
+    def setUp(self):
+        self.cache = PromptCache()
+        self.cache.cache.clear()
+
+    def test_normalized_prompts_share_an_entry(self):
+        fetch = mock.Mock(return_value=["spotify:track:1"])
+
+        self.cache.get_or_fetch("search", "Calm  lo-fi ", 30, fetch)
+        result = self.cache.get_or_fetch("search", "calm lo-fi", 30, fetch)
+
+        self.assertEqual(result, ["spotify:track:1"])
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_concurrent_misses_are_coalesced(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return ["spotify:track:1"]
+
+        start = threading.Barrier(8)
+
+        def worker():
+            start.wait()
+            self.cache.get_or_fetch("search", "happy", 30, fetch)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        stats = self.cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"] + stats["coalesced"], 7)
+
+
+class GenerateRecommendationsTests(TestCase):
+    def setUp(self):
+        prompt_cache.cache.clear()
+        index = mock.patch.object(track_index, "_index", track_index.TrackIndex(dim=64))
+        index.start()
+        self.addCleanup(index.stop)
+
+    def test_search_results_come_before_recommendations(self):
+        sp = mock.Mock()
+        sp.search.return_value = {"tracks": {"items": [{"uri": "s1"}, {"uri": "s2"}]}}
+        sp.recommendations.return_value = {"tracks": [{"uri": f"r{i}"} for i in range(5)]}
+
+        uris = sh.generate_recommendations(sp, "rainy day", size=4, user_id=1)
+
+        self.assertEqual(uris, ["s1", "s2", "r0", "r1"])
+        sp.recommendations.assert_called_once_with(seed_genres=mock.ANY, limit=4)
+        self.assertEqual(Track.objects.count(), 7)
+
+    def test_catalog_answers_without_spotify(self):
+        Track.objects.bulk_create([
+            Track(uri=f"spotify:track:{i}", name=f"Rainy day {i}", artist="Drizzle")
+            for i in range(4)
+        ])
+        sp = mock.Mock()
+
+        uris = sh.generate_recommendations(sp, "Rainy  DAY songs", size=3)
+
+        self.assertEqual(len(uris), 3)
+        self.assertTrue(all(uri.startswith("spotify:track:") for uri in uris))
+        sp.search.assert_not_called()
+
+
+    async def test_async_recording_indexes_off_the_event_loop(self):
+        threads = []
+
+        with mock.patch.object(catalog, "_index_tracks", lambda tracks: threads.append(threading.get_ident())):
+            await catalog.arecord_tracks([{"uri": "spotify:track:1", "name": "Rain"}])
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+    def test_skipped_tracks_are_replaced_from_overfetch(self):
+        sp = mock.Mock()
+        sp.search.return_value = {"tracks": {"items": [{"uri": f"s{i}"} for i in range(8)]}}
+        sp.recommendations.return_value = {"tracks": []}
+
+        uris = sh.generate_recommendations(sp, "rainy day", size=4, skip={"s0", "s2"}.__contains__)
+
+        self.assertEqual(uris, ["s1", "s3", "s4", "s5"])
+        sp.search.assert_called_once_with(q="rainy day", type="track", limit=8)
+
+    def test_seen_tracks_fill_in_when_too_few_are_new(self):
+        sp = mock.Mock()
+        sp.search.return_value = {"tracks": {"items": [{"uri": f"s{i}"} for i in range(3)]}}
+        sp.recommendations.return_value = {"tracks": []}
+
+        uris = sh.generate_recommendations(sp, "rainy day", size=3, skip={"s0", "s1"}.__contains__)
+
+        self.assertEqual(uris, ["s2", "s0", "s1"])
+
+
+class SeenTracksTests(TestCase):
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter.for_capacity(1000, 0.01)
+        uris = [f"spotify:track:{i}" for i in range(1000)]
+        bloom.update(uris)
+
+        self.assertTrue(all(uri in bloom for uri in uris))
+        false_positives = sum(f"spotify:track:other{i}" in bloom for i in range(5000))
+        self.assertLess(false_positives, 5000 * 0.03)
+        copy = BloomFilter.from_bytes(bloom.to_bytes(), bloom.bits, bloom.hashes)
+        self.assertIn("spotify:track:7", copy)
+
+    def test_generation_skips_tracks_of_earlier_playlists(self):
+        user = make_user()
+        account = user.spotifyaccount
+        seen_tracks.remember(account.pk, ["spotify:track:old"])
+        account.refresh_from_db()
+
+        skip = seen_tracks.skip_seen(account)
+        self.assertTrue(skip("spotify:track:old"))
+        self.assertFalse(skip("spotify:track:new"))
+        self.assertFalse(seen_tracks.skip_seen(account, keep=["spotify:track:old"])("spotify:track:old"))
+
+    @override_settings(SEEN_TRACKS_CAPACITY=3)
+    def test_full_filter_starts_over(self):
+        account = make_user().spotifyaccount
+        seen_tracks.remember(account.pk, ["a", "b", "c"])
+        seen_tracks.remember(account.pk, ["d"])
+        account.refresh_from_db()
+
+        self.assertEqual(account.seen_tracks_count, 1)
+        self.assertIn("d", seen_tracks.load(account))
+
+
+class ProgressTests(TransactionTestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.playlist = Playlist.objects.create(user=self.user, name="Mood", mood_prompt="calm")
+        self.token = str(AccessToken.for_user(self.user))
+
+    def listen(self):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(progress.group_name(self.user.pk), channel)
+        self.addCleanup(async_to_sync(layer.group_discard), progress.group_name(self.user.pk), channel)
+        return layer, channel
+
+    async def connect(self, query: str):
+        socket = ApplicationCommunicator(application, {
+            "type": "websocket",
+            "path": "/ws/playlists/",
+            "query_string": query.encode(),
+            "headers": [(b"host", b"testserver"), (b"origin", b"http://testserver")],
+            "subprotocols": [],
+        })
+        await socket.send_input({"type": "websocket.connect"})
+        return socket, await socket.receive_output(timeout=5)
+
+    async def test_socket_streams_the_users_progress(self):
+        socket, reply = await self.connect(f"token={self.token}")
+        self.assertEqual(reply["type"], "websocket.accept")
+
+        await progress.apublish(self.playlist, progress.TRACKS_FETCHED, tracks=30)
+        message = json.loads((await socket.receive_output(timeout=5))["text"])
+        self.assertEqual(message["playlist"], self.playlist.pk)
+        self.assertEqual((message["stage"], message["tracks"]), ("tracks_fetched", 30))
+        await socket.send_input({"type": "websocket.disconnect", "code": 1000})
+        await socket.wait(timeout=5)
+
+    async def test_anonymous_socket_is_closed(self):
+        socket, reply = await self.connect("token=bogus")
+        self.assertEqual((reply["type"], reply.get("code")), ("websocket.close", 4401))
+
+    @mock.patch.multiple(sh, make_client=mock.DEFAULT, create_playlist=mock.DEFAULT,
+                         generate_recommendations=mock.DEFAULT, add_tracks=mock.DEFAULT)
+    def test_generation_publishes_every_stage(self, **spotify):
+        spotify["create_playlist"].return_value = "sp-123"
+        spotify["generate_recommendations"].return_value = ["spotify:track:1"]
+        spotify["add_tracks"].return_value = "snap-1"
+        layer, channel = self.listen()
+
+        tasks.run_generation(self.playlist)
+
+        stages = [async_to_sync(layer.receive)(channel) for _ in range(4)]
+        self.assertEqual([m["stage"] for m in stages], ["created", "tracks_fetched", "tracks_added", "done"])
+        self.assertEqual((stages[-1]["status"], stages[-1]["spotify_id"]), ("done", "sp-123"))
+
+    def test_channel_layer_errors_do_not_fail_generation(self):
+        with mock.patch.object(get_channel_layer(), "group_send", side_effect=OSError("redis down")):
+            with self.assertLogs("backend.utils.progress", "ERROR"):
+                progress.publish(self.playlist, progress.CREATED)
+
+
+class AsyncPlaylistCreateTests(TestCase):
+    def setUp(self):
+        prompt_cache.cache.clear()
+        self.user = make_user()
+
+    def fake_spotify(self, request):
+        path = request.url.path
+        if path.endswith("/search"):
+            return httpx.Response(200, json={"tracks": {"items": [{"uri": "s1"}]}})
+        if path.endswith("/recommendations"):
+            return httpx.Response(200, json={"tracks": [{"uri": "r1"}, {"uri": "r2"}]})
+        if path.endswith("/playlists") and request.method == "POST":
+            return httpx.Response(201, json={"id": "sp-async"})
+        if path.endswith("/tracks"):
+            return httpx.Response(201, json={"snapshot_id": "x"})
+        return httpx.Response(404)
+
+    async def test_generates_playlist_on_the_event_loop(self):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.fake_spotify))
+        token = str(AccessToken.for_user(self.user))
+
+        with mock.patch.object(sa, "get_client", return_value=client):
+            response = await self.async_client.post(
+                "/api/async/playlists/",
+                {"name": "Mood", "mood_prompt": "calm"},
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["spotify_id"], "sp-async")
+        self.assertEqual(response.json()["status"], Playlist.Status.DONE)
+
+    async def test_requires_jwt(self):
+        response = await self.async_client.post(
+            "/api/async/playlists/", {}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class TrackIndexTests(TestCase):
+    def test_query_ranks_closest_tracks_first(self):
+        index = track_index.TrackIndex(dim=256, block_rows=2)
+        index.add(
+            ["u1", "u2", "u3"],
+            ["calm piano evening", "heavy metal workout", "calm acoustic evening"],
+        )
+
+        [matches] = index.query(["calm evening"], k=2)
+
+        self.assertEqual({uri for uri, _ in matches}, {"u1", "u3"})
+        self.assertGreaterEqual(matches[0][1], matches[1][1])
+
+    def test_save_and_memory_mapped_load(self):
+        index = track_index.TrackIndex(dim=32)
+        index.add(["u1", "u2"], ["rainy day", "sunny day"])
+        with tempfile.TemporaryDirectory() as path:
+            index.save(path)
+            loaded = track_index.TrackIndex.load(path)
+            self.assertEqual(loaded.uris, ["u1", "u2"])
+            self.assertEqual(loaded.query(["rainy"], k=1)[0][0][0], "u1")
+            loaded.add(["u3"], ["stormy night"])
+            self.assertEqual(len(loaded), 3)
+
+    def test_additions_leave_the_mapped_base_shared(self):
+        index = track_index.TrackIndex(dim=32)
+        index.add(["u1", "u2"], ["rainy day", "sunny day"])
+        with tempfile.TemporaryDirectory() as path:
+            index.save(path)
+            loaded = track_index.TrackIndex.load(path)
+            loaded.add(["u3"], ["stormy night"])
+
+            # The base is still the read-only mapping; only the new row lives in RAM.
+            self.assertIsInstance(loaded._base, np.memmap)
+            self.assertEqual(loaded.query(["stormy night"], k=1)[0][0][0], "u3")
+            self.assertEqual(loaded.query(["rainy"], k=1)[0][0][0], "u1")
+
+            loaded.save(path)
+            self.assertEqual(track_index.TrackIndex.load(path).uris, ["u1", "u2", "u3"])
+
+
+class RateLimiterTests(TestCase):
+    def test_bulk_calls_leave_a_reserve_for_interactive_calls(self):
+        bucket = LocalBucket(rate=0.001, capacity=10)
+        reserve = RESERVE[Priority.BULK] * 10
+
+        granted = 0
+        while bucket.take(reserve) == 0:
+            granted += 1
+
+        self.assertEqual(granted, 7)
+        self.assertEqual(bucket.take(RESERVE[Priority.INTERACTIVE]), 0)
+
+    def test_429_is_retried_after_retry_after(self):
+        limiter = RateLimiter(rate=100, capacity=10, max_retries=2)
+        fn = mock.Mock(side_effect=[
+            SpotifyException(429, -1, "slow down", headers={"Retry-After": "0"}),
+            "ok",
+        ])
+
+        with mock.patch("backend.utils.rate_limit.time.sleep") as sleep:
+            self.assertEqual(limiter.call(Priority.BULK, fn), "ok")
+
+        self.assertEqual(fn.call_count, 2)
+        self.assertEqual(limiter.stats()["throttled"], 1)
+        self.assertLessEqual(sleep.call_args.args[0], 1)
+
+    def test_gives_up_after_max_retries(self):
+        limiter = RateLimiter(rate=100, capacity=10, max_retries=1)
+        fn = mock.Mock(side_effect=SpotifyException(429, -1, "slow down", headers={"Retry-After": "0"}))
+
+        with mock.patch("backend.utils.rate_limit.time.sleep"):
+            with self.assertRaises(Throttled):
+                limiter.call(Priority.DEFAULT, fn)
+        self.assertEqual(fn.call_count, 2)
+        self.assertEqual(limiter.stats()["throttled"], 2)
+        self.assertEqual(limiter.stats()["retries"], 1)
+
+    def test_last_429_still_blocks_the_bucket(self):
+        limiter = RateLimiter(rate=100, capacity=10, max_retries=0)
+
+        async def throttled():
+            raise Throttled(30)
+
+        with self.assertRaises(Throttled):
+            async_to_sync(limiter.acall)(Priority.DEFAULT, throttled)
+        self.assertGreater(limiter.local.take(0), 29)
+
+    def test_async_path_keeps_redis_off_the_event_loop(self):
+        limiter = RateLimiter(rate=100, capacity=10)
+        limiter.remote = mock.Mock()
+        threads = []
+        limiter.remote.take.side_effect = lambda reserve: threads.append(threading.get_ident()) or 0.0
+
+        async def acquire():
+            await limiter.aacquire(Priority.DEFAULT)
+            return threading.get_ident()
+
+        loop_thread = async_to_sync(acquire)()
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+
+class FakeSpotifyTests(TestCase):
+    def setUp(self):
+        self.server = FakeSpotifyServer(faults=Faults(latency_ms=0, jitter_ms=0))
+        self.server.serve_in_thread()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        settings = override_settings(
+            SPOTIFY_API_URL=f"{self.server.url}/v1", SPOTIFY_ACCOUNTS_URL=self.server.url
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_helpers_follow_configured_urls(self):
+        sp = sh.build_client("fake-token")
+
+        playlist_id = sh.create_playlist(sp, "fake-user", "Mix", "calm")
+        sh.add_tracks(sp, playlist_id, ["spotify:track:1"])
+
+        self.assertTrue(playlist_id.startswith("fakepl"))
+        self.assertEqual(sh.get_profile("fake-token")["id"], "fake-user")
+        self.assertEqual(self.server.stats(), {"create_playlist": 1, "add_tracks": 1, "me": 1})
+
+    def test_sync_tracks_sends_only_the_difference(self):
+        sp = sh.build_client("fake-token")
+        playlist_id = sh.create_playlist(sp, "fake-user", "Mix", "calm")
+        old = [f"spotify:track:{i}" for i in range(30)]
+        snapshot_id = sh.add_tracks(sp, playlist_id, old)
+        new = old[:29] + ["spotify:track:new"]
+
+        tracks, new_snapshot = sh.sync_tracks(sp, playlist_id, old, new, snapshot_id)
+
+        self.assertEqual(tracks, new)
+        self.assertNotEqual(new_snapshot, snapshot_id)
+        self.assertEqual(self.server.playlists[playlist_id], new)
+        self.assertEqual(self.server.stats(), {"create_playlist": 1, "add_tracks": 2, "remove_tracks": 1})
+        self.assertEqual(sh.sync_tracks(sp, playlist_id, tracks, new, new_snapshot), (new, new_snapshot))
+        self.assertEqual(sh.get_playlist_tracks(sp, playlist_id)[0], new)
+
+    def test_injected_429_is_retried(self):
+        self.server.faults.throttle_rate = 1.0
+        self.server.faults.retry_after = 0
+        limiter = RateLimiter(rate=1000, capacity=1000, max_retries=1)
+        labels = {"call": "create_playlist", "status": "429"}
+        errors = REGISTRY.get_sample_value("filipy_spotify_errors_total", labels) or 0
+
+        with mock.patch.object(sh, "limiter", limiter), mock.patch("random.uniform", return_value=0):
+            with self.assertRaises(Throttled):
+                sh.create_playlist(sh.build_client("fake-token"), "fake-user", "Mix", "calm")
+
+        self.assertEqual(self.server.stats()["throttled"], 2)
+        self.assertEqual(REGISTRY.get_sample_value("filipy_spotify_errors_total", labels), errors + 2)
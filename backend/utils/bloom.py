@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Iterable
+
+
+class BloomFilter:
+    """
+    Array-backed Bloom filter over strings (k bit positions per item in a bytearray).
+
+    Membership tests can return false positives at roughly the configured rate but
+    never false negatives. Adding and testing an item costs one blake2b digest plus k
+    bit operations; positions come from double hashing (Kirsch-Mitzenmacher), so k
+    does not multiply the hashing cost. `to_bytes`/`from_bytes` give a compact form to
+    store in a BinaryField.
+
+    Args:
+        bits (int): Size of the bit array.
+        hashes (int): Number of bit positions per item (k).
+    """
+
+    def __init__(self, bits: int, hashes: int, data: bytes | None = None, count: int = 0):
+        self.bits = bits
+        self.hashes = hashes
+        self.count = count
+        self.array = bytearray(data) if data is not None else bytearray((bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float) -> "BloomFilter":
+        """Size a filter to hold `capacity` items at a false-positive rate of about `fp_rate`."""
+        bits, hashes = cls.dimensions(capacity, fp_rate)
+        return cls(bits, hashes)
+
+    @staticmethod
+    def dimensions(capacity: int, fp_rate: float) -> tuple[int, int]:
+        """Optimal (bits, hashes) for `capacity` items at `fp_rate`: m = -n ln p / ln²2, k = m/n ln 2."""
+        bits = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return bits, hashes
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, item: str) -> None:
+        array = self.array
+        for position in self._positions(item):
+            array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        array = self.array
+        return all(array[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def fill_ratio(self) -> float:
+        return sum(bin(byte).count("1") for byte in self.array) / self.bits
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.array)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, bits: int, hashes: int, count: int = 0) -> "BloomFilter":
+        if len(data) != (bits + 7) // 8:
+            raise ValueError("Stored Bloom filter does not match the requested dimensions.")
+        return cls(bits, hashes, data, count)
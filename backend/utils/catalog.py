@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+from functools import reduce
+from operator import or_
+from typing import Iterable, List
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+
+from backend.models import Track
+from backend.utils.spotify_cache import normalize_prompt
+
+UPSERT_FIELDS = ["name", "artist", "popularity"]
+
+
+def _to_track(item: dict, genre: str = "") -> Track:
+    artists = item.get("artists") or []
+    return Track(
+        uri=item["uri"],
+        name=(item.get("name") or "")[:255],
+        artist=", ".join(a["name"] for a in artists if a.get("name"))[:255],
+        genre=genre[:120],
+        popularity=item.get("popularity") or 0,
+    )
+
+
+def _dedupe(tracks: Iterable[Track]) -> List[Track]:
+    # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement.
+    return list({track.uri: track for track in tracks}.values())
+
+
+def _index_tracks(tracks: List[Track]) -> None:
+    if settings.TRACK_INDEX_LOOKUP:
+        from backend.utils import track_index  # numpy; loaded on first use
+
+        track_index.get_index().add(
+            [t.uri for t in tracks],
+            [track_index.TrackIndex.track_text(t.name, t.artist, t.genre) for t in tracks],
+        )
+
+
+def record_tracks(items: Iterable[dict], genre: str = "") -> None:
+    """
+    Upserts Spotify track objects (as returned by search/recommendations) into the catalog.
+
+    New tracks are also appended to this process's embedding index.
+
+    Args:
+        items (Iterable[dict]): Spotify track objects with at least a `uri`.
+        genre (str, optional): Genre to store for new rows. Existing genres are kept.
+    """
+    tracks = _dedupe(_to_track(item, genre) for item in items if item and item.get("uri"))
+    if tracks:
+        Track.objects.bulk_create(
+            tracks, update_conflicts=True, unique_fields=["uri"], update_fields=UPSERT_FIELDS
+        )
+        _index_tracks(tracks)
+
+
+async def arecord_tracks(items: Iterable[dict], genre: str = "") -> None:
+    """Async counterpart of `record_tracks`."""
+    tracks = _dedupe(_to_track(item, genre) for item in items if item and item.get("uri"))
+    if tracks:
+        await Track.objects.abulk_create(
+            tracks, update_conflicts=True, unique_fields=["uri"], update_fields=UPSERT_FIELDS
+        )
+        # Hashing the texts (and loading the mapped index) must not stall the event loop.
+        await asyncio.to_thread(_index_tracks, tracks)
+
+
+def _matching(prompt: str, limit: int):
+    words = normalize_prompt(prompt).split()
+    if not words:
+        return None
+    # Any word may match; tracks matching more (and rarer) words rank higher.
+    query = reduce(or_, (SearchQuery(word, config="english") for word in words))
+    return (
+        Track.objects.filter(search=query)
+        .annotate(rank=SearchRank(F("search"), query))
+        .order_by("-rank", "-popularity", "id")
+        .values_list("uri", flat=True)[:limit]
+    )
+
+
+def lookup(prompt: str, limit: int) -> List[str]:
+    """
+    Returns up to `limit` catalog track URIs matching the prompt, best match first.
+
+    Uses the GIN-indexed full-text vector over name, artist and genre, so it answers
+    without any Spotify round trip.
+    """
+    queryset = _matching(prompt, limit)
+    return list(queryset) if queryset is not None else []
+
+
+async def alookup(prompt: str, limit: int) -> List[str]:
+    """Async counterpart of `lookup`."""
+    queryset = _matching(prompt, limit)
+    return [uri async for uri in queryset] if queryset is not None else []
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import csv
+import datetime
+import io
+import json
+from itertools import islice
+from typing import AsyncIterator, Callable, Iterator, Tuple
+
+import zstandard
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from backend.models import Playlist
+
+FIELDS = (
+    "id", "user_id", "name", "description", "mood_prompt", "spotify_id", "status",
+    "track_uris", "snapshot_id", "created_at", "updated_at",
+)
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+ZSTD_CONTENT_TYPE = "application/zstd"
+BUFFER_BYTES = 64 * 1024
+
+
+def parse_bound(value: str, end: bool = False) -> datetime.datetime:
+    """
+    Parse a `since`/`until` filter given as an ISO date or datetime.
+
+    A bare date as upper bound (`end=True`) covers that whole day. Naive values are
+    taken in the current time zone.
+
+    Raises:
+        ValueError: When `value` is neither a date nor a datetime.
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Not an ISO date or datetime: {value!r}")
+        moment = datetime.datetime.combine(day + datetime.timedelta(days=int(end)), datetime.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def playlists(user_id: int | None = None, since=None, until=None) -> QuerySet:
+    """
+    Rows to export as tuples in FIELDS order, oldest first.
+
+    Args:
+        user_id (int | None): Only this user's playlists; None exports every user.
+        since (datetime | None): Only playlists created at or after this moment.
+        until (datetime | None): Only playlists created before this moment.
+    """
+    queryset = Playlist.objects.order_by("pk")
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    if until is not None:
+        queryset = queryset.filter(created_at__lt=until)
+    return queryset.values_list(*FIELDS)
+
+
+def _rows(queryset: QuerySet) -> Iterator[tuple]:
+    # A server-side cursor on Postgres: only one chunk of rows is in memory at a time.
+    return queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def ndjson_row(row: tuple) -> str:
+    """One JSON object per playlist, datetimes in ISO 8601."""
+    record = dict(zip(FIELDS, row))
+    record["created_at"] = record["created_at"].isoformat()
+    record["updated_at"] = record["updated_at"].isoformat()
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def csv_row(row: tuple) -> str:
+    """One CSV row per playlist; track_uris are joined by spaces."""
+    row = list(row)
+    tracks = FIELDS.index("track_uris")
+    row[tracks] = " ".join(row[tracks])
+    return _csv_line(value.isoformat() if isinstance(value, datetime.datetime) else value for value in row)
+
+
+def _csv_line(values) -> str:
+    line = io.StringIO()
+    csv.writer(line).writerow(values)
+    return line.getvalue()
+
+
+def encoder(fmt: str) -> Tuple[str, Callable[[tuple], str]]:
+    """The header and the row encoder of an export format."""
+    if fmt == "csv":
+        return _csv_line(FIELDS), csv_row
+    return "", ndjson_row
+
+
+class _Writer:
+    """Joins encoded rows into ~BUFFER_BYTES chunks, compressed as one zstd frame when asked."""
+
+    def __init__(self, compress: bool):
+        self.buffer, self.size = [], 0
+        self.compressor = None
+        if compress:
+            self.compressor = zstandard.ZstdCompressor(level=settings.EXPORT_ZSTD_LEVEL).compressobj()
+
+    def write(self, text: str) -> bytes:
+        self.buffer.append(text)
+        self.size += len(text)
+        return self._drain() if self.size >= BUFFER_BYTES else b""
+
+    def close(self) -> bytes:
+        chunk = self._drain()
+        return chunk + self.compressor.flush() if self.compressor else chunk
+
+    def _drain(self) -> bytes:
+        chunk = "".join(self.buffer).encode()
+        self.buffer, self.size = [], 0
+        return self.compressor.compress(chunk) if self.compressor else chunk
+
+
+def stream(queryset: QuerySet, fmt: str = "ndjson", compress: bool = False) -> Iterator[bytes]:
+    """
+    Encode `queryset` (see `playlists`) as a stream of byte chunks.
+
+    Memory use is bounded by EXPORT_CHUNK_SIZE rows and one output buffer, whatever
+    the number of rows.
+
+    Args:
+        queryset (QuerySet): Rows from `playlists`.
+        fmt (str): "ndjson" or "csv".
+        compress (bool): Wrap the output in a zstd frame.
+    """
+    header, encode = encoder(fmt)
+    writer = _Writer(compress)
+    writer.write(header)
+    for row in _rows(queryset):
+        chunk = writer.write(encode(row))
+        if chunk:
+            yield chunk
+    yield writer.close()
+
+
+async def astream(queryset: QuerySet, fmt: str = "ndjson", compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Async counterpart of `stream`, for responses served under ASGI.
+
+    Django collects a sync iterator into a list before sending it over ASGI, so the
+    export would be built whole in memory; this one fetches EXPORT_CHUNK_SIZE rows at
+    a time from the same server-side cursor (in the thread that owns the connection)
+    and sends each chunk as soon as it is full.
+    """
+    header, encode = encoder(fmt)
+    writer = _Writer(compress)
+    writer.write(header)
+    rows = _rows(queryset)
+    fetch = sync_to_async(lambda: list(islice(rows, settings.EXPORT_CHUNK_SIZE)))
+    while batch := await fetch():
+        for row in batch:
+            chunk = writer.write(encode(row))
+            if chunk:
+                yield chunk
+    yield writer.close()
+
+
+def filename(fmt: str, compress: bool) -> str:
+    return f"playlists-{timezone.now():%Y%m%d-%H%M%S}.{fmt}" + (".zst" if compress else "")
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import functools
+import time
+from typing import Awaitable, Callable
+
+import httpx
+import requests
+from prometheus_client import Counter, Gauge, Histogram
+
+from backend.utils.rate_limit import Throttled
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_LATENCY = Histogram(
+    "filipy_http_request_duration_seconds",
+    "Time spent answering an HTTP request, by URL name.",
+    ["view", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "filipy_http_requests_in_flight",
+    "HTTP requests currently being answered.",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "filipy_db_queries_per_request",
+    "Database queries made on the request thread, by URL name.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_TIME = Histogram(
+    "filipy_db_query_seconds_per_request",
+    "Total database query time on the request thread, by URL name.",
+    ["view"],
+    buckets=LATENCY_BUCKETS,
+)
+SPOTIFY_LATENCY = Histogram(
+    "filipy_spotify_call_duration_seconds",
+    "Duration of one Spotify API call attempt, by helper function.",
+    ["call"],
+    buckets=LATENCY_BUCKETS,
+)
+SPOTIFY_IN_FLIGHT = Gauge(
+    "filipy_spotify_calls_in_flight",
+    "Spotify API calls currently waiting for an answer.",
+    ["call"],
+    multiprocess_mode="livesum",
+)
+SPOTIFY_ERRORS = Counter(
+    "filipy_spotify_errors_total",
+    "Failed Spotify API call attempts, by helper function and HTTP status.",
+    ["call", "status"],
+)
+
+
+def error_status(exc: BaseException) -> str:
+    """Return the HTTP status behind a Spotify call failure, or its kind when there is none."""
+    from spotipy.exceptions import SpotifyException  # already loaded by the failed call
+
+    if isinstance(exc, Throttled):
+        return "429"
+    if isinstance(exc, SpotifyException):
+        return str(exc.http_status)
+    if isinstance(exc, httpx.HTTPStatusError):
+        return str(exc.response.status_code)
+    if isinstance(exc, (requests.RequestException, httpx.TransportError)):
+        return "network"
+    return "error"
+
+
+def observe(call: str, fn: Callable) -> Callable:
+    """
+    Wrap a blocking Spotify call so each attempt is timed and counted under `call`.
+
+    Used as `limiter.call(priority, observe("search", sp.search), ...)`, so every retry
+    of a throttled call shows up as its own attempt and error.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        gauge = SPOTIFY_IN_FLIGHT.labels(call)
+        gauge.inc()
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            SPOTIFY_ERRORS.labels(call, error_status(exc)).inc()
+            raise
+        finally:
+            SPOTIFY_LATENCY.labels(call).observe(time.perf_counter() - started)
+            gauge.dec()
+
+    return wrapper
+
+
+def aobserve(call: str, fn: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """Async counterpart of `observe` for the httpx-based helpers."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        gauge = SPOTIFY_IN_FLIGHT.labels(call)
+        gauge.inc()
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as exc:
+            SPOTIFY_ERRORS.labels(call, error_status(exc)).inc()
+            raise
+        finally:
+            SPOTIFY_LATENCY.labels(call).observe(time.perf_counter() - started)
+            gauge.dec()
+
+    return wrapper
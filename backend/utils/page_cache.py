@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from django.core.cache import caches
+from django.utils.safestring import SafeString, mark_safe
+
+from backend.utils.spotify_cache import _p95
+
+
+class FragmentCache:
+    """
+    Per-user cache of rendered HTML fragments with O(1) invalidation.
+
+    Every key embeds the user's current version number, so invalidating a user is a
+    single `incr` on the version key: older fragments are never read again and simply
+    age out through the TTL. A missing version key is seeded from the clock, which keeps
+    it ahead of any fragment still cached under an evicted, older counter.
+
+    Entries live in the Django cache alias named by `alias` (local memory or Redis, see
+    CACHES["pages"] in settings). `stats()` reports hits and misses together with the
+    render time of misses and the render time saved by hits.
+    """
+
+    def __init__(self, namespace: str, alias: str = "pages", samples: int = 1000):
+        self.namespace = namespace
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._hit_latency: deque[float] = deque(maxlen=samples)
+        self._render_latency: deque[float] = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self, user_id: int) -> str:
+        return f"{self.namespace}:{user_id}:version"
+
+    def version(self, user_id: int) -> int:
+        key = self._version_key(user_id)
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, time.time_ns(), timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    def make_key(self, user_id: int, variant: str) -> str:
+        digest = hashlib.sha1(variant.encode()).hexdigest()
+        return f"{self.namespace}:{user_id}:v{self.version(user_id)}:{digest}"
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop every cached fragment of the user by bumping their version."""
+        try:
+            self.cache.incr(self._version_key(user_id))
+        except ValueError:
+            self.cache.set(self._version_key(user_id), time.time_ns(), timeout=None)
+        with self._lock:
+            self.invalidations += 1
+
+    def get_or_render(self, user_id: int, variant: str, render: Callable[[], str]) -> SafeString:
+        """
+        Returns the cached fragment for (user, variant), calling `render` on a miss.
+
+        Args:
+            user_id (int): Owner of the rendered data.
+            variant (str): Anything else the fragment depends on, e.g. the page URL.
+            render (Callable): Renders the fragment to an HTML string.
+
+        Returns:
+            SafeString: The cached or freshly rendered fragment.
+        """
+        key = self.make_key(user_id, variant)
+        started = time.perf_counter()
+
+        html = self.cache.get(key)
+        if html is not None:
+            with self._lock:
+                self.hits += 1
+                self._hit_latency.append(time.perf_counter() - started)
+            return mark_safe(html)
+
+        html = render()
+        self.cache.set(key, str(html))
+        with self._lock:
+            self.misses += 1
+            self._render_latency.append(time.perf_counter() - started)
+        return mark_safe(html)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.invalidations = 0
+            self._hit_latency.clear()
+            self._render_latency.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters, p95 latencies and the render time saved, in milliseconds."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            hit_p95 = _p95(self._hit_latency)
+            render_p95 = _p95(self._render_latency)
+            render_mean = (
+                sum(self._render_latency) / len(self._render_latency) if self._render_latency else 0.0
+            )
+            hit_mean = sum(self._hit_latency) / len(self._hit_latency) if self._hit_latency else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "hit_p95_ms": hit_p95 * 1000 if hit_p95 is not None else None,
+                "render_p95_ms": render_p95 * 1000 if render_p95 is not None else None,
+                "render_saved_ms": self.hits * max(0.0, render_mean - hit_mean) * 1000,
+            }
+
+
+playlist_page_cache = FragmentCache("playlists")
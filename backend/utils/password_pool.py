@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+
+
+class PoolSaturated(Exception):
+    """Raised when the hashing pool has no free worker or queue slot."""
+
+
+class PasswordHashPool:
+    """
+    Bounded pool that runs password hashing off the request thread.
+
+    PBKDF2 (Django's default hasher) runs inside `hashlib.pbkdf2_hmac`, which releases
+    the GIL, so a thread pool sized to the CPU count hashes on every core without the
+    pickling and Django start-up cost of a process pool. At most PASSWORD_HASH_WORKERS
+    hashes run at once and PASSWORD_HASH_QUEUE more may wait; past that `run` raises
+    PoolSaturated right away, so a login storm turns into fast 503s instead of a queue
+    that holds every other request hostage.
+    """
+
+    def __init__(self):
+        self.rejected = 0
+        self.completed = 0
+        self._in_flight = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self) -> int:
+        return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + settings.PASSWORD_HASH_QUEUE
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable, *args):
+        """
+        Run `fn(*args)` on the pool and await its result.
+
+        Raises:
+            PoolSaturated: Every worker is busy and the queue is full.
+        """
+        executor = self._get_executor()
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise PoolSaturated
+            self._in_flight += 1
+        future = executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_pool = PasswordHashPool()
+
+
+async def ahash_password(password: str) -> str:
+    """Hash `password` with the default hasher on the pool (see `make_password`)."""
+    return await password_pool.run(make_password, password)
+
+
+async def averify_password(password: str, encoded: str) -> tuple[bool, bool]:
+    """
+    Check `password` against an encoded hash on the pool.
+
+    Returns:
+        tuple[bool, bool]: Whether the password matches, and whether the hash should be
+        upgraded to the preferred hasher or work factor (see `verify_password`).
+    """
+    return await password_pool.run(verify_password, password, encoded)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import cProfile
+import json
+import pstats
+import random
+import re
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import List
+
+from django.conf import settings
+from django.core import signing
+
+SIGNING_SALT = "filipy.profiling"
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def make_token() -> str:
+    """Return a signed value for the X-Profile-Token header (valid PROFILING_TOKEN_MAX_AGE seconds)."""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign("profile")
+
+
+def valid_token(value: str) -> bool:
+    try:
+        signing.TimestampSigner(salt=SIGNING_SALT).unsign(value, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def trigger(request) -> str | None:
+    """
+    Decide whether to profile a request.
+
+    Returns:
+        str | None: Why the request is profiled ("token", "staff" or "sample"), or None.
+    """
+    token = request.headers.get("X-Profile-Token")
+    if token and valid_token(token):
+        return "token"
+    if "_profile" in request.GET and getattr(request, "user", None) and request.user.is_staff:
+        return "staff"
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate and random.random() * rate < 1:
+        return "sample"
+    return None
+
+
+def profile_id() -> str:
+    """Name a new profile. Always minted here: a client-chosen id could overwrite a stored profile."""
+    return uuid.uuid4().hex
+
+
+def client_request_id(request) -> str | None:
+    """The well-formed X-Request-ID sent by the proxy or client, if any."""
+    given = request.headers.get("X-Request-ID", "")
+    return given if REQUEST_ID_RE.match(given) else None
+
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILING_DIR)
+
+
+def _label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name  # built-in, e.g. "<method 'execute' of 'psycopg2...' objects>"
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def folded_stacks(stats: pstats.Stats, max_depth: int = 80, min_fraction: float = 0.0005) -> List[str]:
+    """
+    Convert a cProfile call graph to folded stacks ("a;b;c <microseconds>").
+
+    cProfile only records caller/callee pairs, so each function's time is split over
+    the paths leading to it in proportion to the time each caller spent in it. Paths
+    worth less than `min_fraction` of the total are dropped, which keeps the walk
+    bounded on large request profiles. The result opens directly in speedscope or
+    flamegraph.pl.
+    """
+    raw = stats.stats
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, caller_stats in callers.items():
+            callees[caller][func] = caller_stats[3]
+
+    # Roots are calls made from outside the profile; a function can be both a root
+    # and a callee (Django's middleware `inner` wraps every layer).
+    roots = {}
+    for func, (_, calls, _, cumulative, callers) in raw.items():
+        outside = calls - sum(caller_stats[0] for caller_stats in callers.values())
+        if outside > 0 and calls:
+            roots[func] = cumulative * outside / calls
+    threshold = sum(roots.values()) * min_fraction
+
+    lines: Counter = Counter()
+
+    def walk(func, stack: tuple, weight: float):
+        _, _, self_time, cumulative, _ = raw[func]
+        stack = stack + (func,)
+        if cumulative <= 0:
+            return
+        lines[stack] += self_time * weight / cumulative
+        if len(stack) >= max_depth:
+            return
+        for callee, time_in_callee in callees[func].items():
+            share = time_in_callee * weight / cumulative
+            if share >= threshold and callee not in stack and callee in raw:
+                walk(callee, stack, share)
+
+    for func, weight in roots.items():
+        if weight >= threshold:
+            walk(func, (), weight)
+
+    return [
+        f"{';'.join(_label(f) for f in stack)} {round(seconds * 1e6)}"
+        for stack, seconds in lines.items()
+        if round(seconds * 1e6) > 0
+    ]
+
+
+def save(profile: cProfile.Profile, rid: str, meta: dict, *more: cProfile.Profile) -> None:
+    """
+    Write `<rid>.prof` (pstats), `<rid>.folded` and `<rid>.json`, then prune old profiles.
+
+    `more` are profiles of the same request taken on other threads; they are merged in.
+    """
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    stats = pstats.Stats(profile, *more)
+    stats.dump_stats(directory / f"{rid}.prof")
+    (directory / f"{rid}.folded").write_text("\n".join(folded_stacks(stats)) + "\n")
+    (directory / f"{rid}.json").write_text(json.dumps({"id": rid, **meta}))
+
+    metas = sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for stale in metas[settings.PROFILING_MAX_PROFILES:]:
+        for suffix in (".json", ".prof", ".folded"):
+            stale.with_suffix(suffix).unlink(missing_ok=True)
+
+
+def list_profiles() -> List[dict]:
+    """Metadata of the stored profiles, newest first."""
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in directory.glob("*.json"):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda meta: meta.get("started_at", ""), reverse=True)
+
+
+def profile_file(rid: str, kind: str) -> Path | None:
+    """Path of a stored `.prof` or `.folded` file, or None when the id or kind is invalid."""
+    if kind not in ("prof", "folded") or not REQUEST_ID_RE.match(rid):
+        return None
+    path = profile_dir() / f"{rid}.{kind}"
+    return path if path.exists() else None
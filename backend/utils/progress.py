@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+log = logging.getLogger(__name__)
+
+# Generation stages pushed to /ws/playlists/, in order.
+CREATED = "created"
+TRACKS_FETCHED = "tracks_fetched"
+TRACKS_ADDED = "tracks_added"
+DONE = "done"
+FAILED = "failed"
+
+
+def group_name(user_id: int) -> str:
+    """Channel layer group of one user's sockets; every playlist of the user is sent there."""
+    return f"playlists.user.{user_id}"
+
+
+def _event(playlist, stage: str, extra: dict) -> dict:
+    return {
+        "type": "playlist.progress",
+        "playlist": playlist.pk,
+        "stage": stage,
+        "status": playlist.status,
+        "spotify_id": playlist.spotify_id,
+        **extra,
+    }
+
+
+def publish(playlist, stage: str, **extra) -> None:
+    """
+    Push a generation stage of `playlist` to its owner's open sockets.
+
+    Progress is best effort: a channel layer error is logged and never fails the
+    generation itself, and clients fall back to GET /api/playlists/{id}/status/.
+
+    Args:
+        playlist (Playlist): The playlist being generated.
+        stage (str): One of CREATED, TRACKS_FETCHED, TRACKS_ADDED, DONE or FAILED.
+        **extra: Additional JSON fields, e.g. `tracks` (count) or `error`.
+    """
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        async_to_sync(layer.group_send)(group_name(playlist.user_id), _event(playlist, stage, extra))
+    except Exception:
+        log.exception("Could not publish progress (playlist=%s, stage=%s)", playlist.pk, stage)
+
+
+async def apublish(playlist, stage: str, **extra) -> None:
+    """Async counterpart of `publish` for the native async generation path."""
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        await layer.group_send(group_name(playlist.user_id), _event(playlist, stage, extra))
+    except Exception:
+        log.exception("Could not publish progress (playlist=%s, stage=%s)", playlist.pk, stage)
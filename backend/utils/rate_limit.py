@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+
+class Priority(enum.IntEnum):
+    """
+    Priority classes for outbound Spotify calls.
+
+    Lower-priority calls only take a token while the bucket holds more than their
+    reserve, so a burst of bulk work always leaves room for interactive calls.
+    """
+
+    INTERACTIVE = 0  # OAuth code exchange, token refresh, profile
+    DEFAULT = 1      # playlist creation, search, recommendations
+    BULK = 2         # track adds
+
+
+RESERVE = {Priority.INTERACTIVE: 0.0, Priority.DEFAULT: 0.1, Priority.BULK: 0.3}
+
+
+class Throttled(Exception):
+    """Raised by a wrapped call when Spotify answered 429 Too Many Requests."""
+
+    def __init__(self, retry_after: float | None):
+        super().__init__(f"Spotify rate limit hit (Retry-After: {retry_after})")
+        self.retry_after = retry_after
+
+
+class LocalBucket:
+    """Per-process token bucket, used when no Redis is configured or reachable."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def take(self, reserve: float) -> float:
+        """Take one token if more than `reserve` remain; otherwise return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= reserve + 1:
+                self.tokens -= 1
+                return 0.0
+            return (reserve + 1 - self.tokens) / self.rate
+
+    def block(self, seconds: float) -> None:
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RedisBucket:
+    """
+    Token bucket shared by every worker through Redis.
+
+    Refill and take happen atomically in a Lua script; a 429 sets a shared
+    "blocked until" key so all workers pause for the Retry-After period.
+    """
+
+    SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local capacity = tonumber(ARGV[3])
+    local needed = tonumber(ARGV[4]) + 1
+    local blocked = tonumber(redis.call('GET', KEYS[2]) or '0')
+    if now < blocked then
+        return tostring(blocked - now)
+    end
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= needed then
+        tokens = tokens - 1
+    else
+        wait = (needed - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str, rate: float, capacity: float, name: str = "spotify"):
+        import redis
+
+        self.rate = rate
+        self.capacity = capacity
+        self.keys = [f"ratelimit:{name}:bucket", f"ratelimit:{name}:blocked"]
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def take(self, reserve: float) -> float:
+        return float(self.script(keys=self.keys, args=[time.time(), self.rate, self.capacity, reserve]))
+
+    def block(self, seconds: float) -> None:
+        self.client.set(self.keys[1], time.time() + seconds, ex=int(seconds) + 1)
+
+
+class RateLimiter:
+    """
+    Global outbound limiter and 429-aware retry loop for Spotify calls.
+
+    Every call first takes a token from the shared bucket (Redis when
+    SPOTIFY_RATE_LIMIT_URL is set, else per process), waiting as long as the bucket says.
+    When Spotify still answers 429 the Retry-After header blocks the whole bucket and the
+    call is retried after that delay plus jitter; without the header it backs off
+    exponentially with full jitter. `stats()` reports queue wait time and throttle events.
+    """
+
+    def __init__(self, rate: float, capacity: float, redis_url: str = "",
+                 max_retries: int = 3, samples: int = 1000):
+        self.local = LocalBucket(rate, capacity)
+        self.remote = RedisBucket(redis_url, rate, capacity) if redis_url else None
+        self.max_retries = max_retries
+        self.acquired = {p.name.lower(): 0 for p in Priority}
+        self.throttled = 0
+        self.retries = 0
+        self.fallbacks = 0
+        self._waits: deque[float] = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def _take(self, priority: Priority) -> float:
+        reserve = RESERVE[priority] * self.local.capacity
+        if self.remote is not None:
+            try:
+                return self.remote.take(reserve)
+            except Exception:
+                with self._lock:
+                    self.fallbacks += 1
+                log.warning("Redis rate limiter unavailable, using the local bucket", exc_info=True)
+        return self.local.take(reserve)
+
+    def _block(self, seconds: float) -> None:
+        self.local.block(seconds)
+        if self.remote is not None:
+            try:
+                self.remote.block(seconds)
+            except Exception:
+                log.warning("Could not share Retry-After through Redis", exc_info=True)
+
+    def _record(self, priority: Priority, waited: float) -> None:
+        with self._lock:
+            self.acquired[priority.name.lower()] += 1
+            self._waits.append(waited)
+
+    def _throttle(self, exc: Throttled, retrying: bool) -> None:
+        """Count a 429 and block the bucket for its Retry-After period, if it gave one."""
+        with self._lock:
+            self.throttled += 1
+            self.retries += retrying
+        if exc.retry_after is not None:
+            self._block(exc.retry_after)
+
+    async def _off_loop(self, fn: Callable, *args):
+        # Redis round trips block, so they run in a thread; the local bucket only takes a lock.
+        if self.remote is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    @staticmethod
+    def _backoff(exc: Throttled, attempt: int) -> float:
+        if exc.retry_after is not None:
+            return exc.retry_after + random.uniform(0, 1)
+        return random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+
+    def acquire(self, priority: Priority = Priority.DEFAULT) -> float:
+        """Block until a token is available; return the seconds spent waiting."""
+        started = time.monotonic()
+        while (wait := self._take(priority)) > 0:
+            time.sleep(min(wait, 1.0))
+        waited = time.monotonic() - started
+        self._record(priority, waited)
+        return waited
+
+    async def aacquire(self, priority: Priority = Priority.DEFAULT) -> float:
+        """Async counterpart of `acquire`: waits on the event loop, takes Redis tokens off it."""
+        started = time.monotonic()
+        while (wait := await self._off_loop(self._take, priority)) > 0:
+            await asyncio.sleep(min(wait, 1.0))
+        waited = time.monotonic() - started
+        self._record(priority, waited)
+        return waited
+
+    def call(self, priority: Priority, fn: Callable, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` under the limiter, retrying 429 answers.
+
+        Raises:
+            Throttled: If Spotify keeps answering 429 after `max_retries` retries; its
+                Retry-After still blocks the bucket for every other caller.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(priority)
+            try:
+                return self.throttle_errors(fn, *args, **kwargs)
+            except Throttled as exc:
+                retrying = attempt < self.max_retries
+                self._throttle(exc, retrying)
+                if not retrying:
+                    raise
+                time.sleep(self._backoff(exc, attempt))
+
+    async def acall(self, priority: Priority, fn: Callable[..., Awaitable], *args, **kwargs):
+        """Async counterpart of `call`; `fn` must raise `Throttled` on 429."""
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire(priority)
+            try:
+                return await fn(*args, **kwargs)
+            except Throttled as exc:
+                retrying = attempt < self.max_retries
+                await self._off_loop(self._throttle, exc, retrying)
+                if not retrying:
+                    raise
+                await asyncio.sleep(self._backoff(exc, attempt))
+
+    @staticmethod
+    def throttle_errors(fn: Callable, *args, **kwargs):
+        """Call a Spotipy function, turning its 429 SpotifyException into `Throttled`."""
+        from spotipy.exceptions import SpotifyException  # loaded by the caller's client already
+
+        try:
+            return fn(*args, **kwargs)
+        except SpotifyException as exc:
+            if exc.http_status != 429:
+                raise
+            raise Throttled(parse_retry_after(exc.headers.get("Retry-After"))) from exc
+
+    def stats(self) -> dict:
+        """Return acquisitions per priority, throttle/retry counters and queue wait times."""
+        with self._lock:
+            waits = sorted(self._waits)
+            p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else None
+            return {
+                "backend": "redis" if self.remote is not None else "local",
+                "acquired": dict(self.acquired),
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "redis_fallbacks": self.fallbacks,
+                "wait_total_s": sum(self._waits),
+                "wait_p95_ms": p95 * 1000 if p95 is not None else None,
+            }
+
+
+def parse_retry_after(value) -> float | None:
+    """Parse a Retry-After header given in seconds; None if missing or not numeric."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+limiter = RateLimiter(
+    rate=settings.SPOTIFY_RATE_LIMIT_PER_SEC,
+    capacity=settings.SPOTIFY_RATE_LIMIT_BURST,
+    redis_url=settings.SPOTIFY_RATE_LIMIT_URL,
+    max_retries=settings.SPOTIFY_RATE_LIMIT_RETRIES,
+)
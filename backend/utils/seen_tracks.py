@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.db import transaction
+
+from backend.models import SpotifyAccount
+from backend.utils.bloom import BloomFilter
+
+
+def _empty() -> BloomFilter:
+    return BloomFilter.for_capacity(settings.SEEN_TRACKS_CAPACITY, settings.SEEN_TRACKS_FP_RATE)
+
+
+def load(account: SpotifyAccount) -> BloomFilter:
+    """
+    Return the account's seen-track filter.
+
+    A missing filter, or one stored with other dimensions (SEEN_TRACKS_CAPACITY or
+    SEEN_TRACKS_FP_RATE changed since), comes back empty.
+    """
+    empty = _empty()
+    if not account.seen_tracks:
+        return empty
+    try:
+        return BloomFilter.from_bytes(
+            bytes(account.seen_tracks), empty.bits, empty.hashes, account.seen_tracks_count
+        )
+    except ValueError:
+        return empty
+
+
+def skip_seen(account: SpotifyAccount, keep: Iterable[str] = ()) -> Callable[[str], bool] | None:
+    """
+    Build the `skip` predicate for `generate_recommendations` from the account's filter.
+
+    Args:
+        account (SpotifyAccount): Owner of the playlist being generated.
+        keep (Iterable[str]): URIs never skipped, e.g. the tracks already in the playlist
+            being regenerated, which are in the filter themselves.
+
+    Returns:
+        Callable[[str], bool] | None: True for tracks the user has (probably) been given
+        before, or None when SEEN_TRACKS_FILTER is off.
+    """
+    if not settings.SEEN_TRACKS_FILTER:
+        return None
+    seen = load(account)
+    if not seen.count:
+        return None
+    keep = set(keep)
+    return lambda uri: uri not in keep and uri in seen
+
+
+def remember(account_id: int, uris: Iterable[str]) -> None:
+    """
+    Add `uris` to the account's seen-track filter.
+
+    The stored filter is read under a row lock and merged, so concurrent generations for
+    one user do not overwrite each other's tracks. Once SEEN_TRACKS_CAPACITY tracks have
+    been added the filter starts over: its false-positive rate would otherwise climb and
+    block ever more unseen tracks.
+    """
+    uris = list(uris)
+    if not settings.SEEN_TRACKS_FILTER or not uris:
+        return
+    with transaction.atomic():
+        account = (
+            SpotifyAccount.objects.select_for_update()
+            .only("seen_tracks", "seen_tracks_count")
+            .get(pk=account_id)
+        )
+        seen = load(account)
+        if seen.count + len(uris) > settings.SEEN_TRACKS_CAPACITY:
+            seen = _empty()
+        seen.update(uris)
+        account.seen_tracks = seen.to_bytes()
+        account.seen_tracks_count = seen.count
+        account.save(update_fields=["seen_tracks", "seen_tracks_count"])
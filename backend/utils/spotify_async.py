@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import weakref
+from typing import Callable, List
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from backend.models import SpotifyAccount
+from backend.utils import catalog
+from backend.utils import spotify_helpers as sh
+from backend.utils.metrics import aobserve
+from backend.utils.rate_limit import Priority, Throttled, limiter, parse_retry_after
+from backend.utils.spotify_cache import prompt_cache
+
+_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the httpx.AsyncClient shared by every async Spotify call on the running loop.
+
+    Under ASGI there is one loop per worker, so all requests share one connection pool
+    of up to SPOTIFY_ASYNC_MAX_CONNECTIONS keep-alive connections. Connection errors are
+    retried by the transport.
+
+    Returns:
+        httpx.AsyncClient: The client bound to the current event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=settings.SPOTIFY_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.SPOTIFY_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SPOTIFY_ASYNC_MAX_CONNECTIONS,
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=settings.SPOTIFY_HTTP_RETRIES),
+        )
+        _clients[loop] = client
+    return client
+
+
+def _check(response: httpx.Response) -> None:
+    if response.status_code == 429:
+        raise Throttled(parse_retry_after(response.headers.get("Retry-After")))
+    response.raise_for_status()
+
+
+async def _request(method: str, path: str, access_token: str,
+                   priority: Priority = Priority.DEFAULT, *, call: str, **kwargs) -> dict:
+    async def send():
+        response = await get_client().request(
+            method,
+            f"{settings.SPOTIFY_API_URL}/{path}",
+            headers={"Authorization": f"Bearer {access_token}"},
+            **kwargs,
+        )
+        _check(response)
+        return response.json() if response.content else {}
+
+    return await limiter.acall(priority, aobserve(call, send))
+
+
+async def exchange_code(code: str) -> dict:
+    """
+    Exchanges an authorization code for an access token using the Spotify OAuth flow.
+
+    Args:
+        code (str): The authorization code received from Spotify after user authentication.
+
+    Returns:
+        dict: The token response with access_token, refresh_token and expires_in.
+
+    Raises:
+        httpx.HTTPStatusError: If the token exchange fails.
+    """
+    async def send():
+        response = await get_client().post(
+            f"{settings.SPOTIFY_ACCOUNTS_URL}/api/token",
+            data={
+                "grant_type": "authorization_code",
+                "code": code,
+                "redirect_uri": os.getenv("SPOTIFY_REDIRECT_URI"),
+            },
+            auth=(os.getenv("SPOTIFY_CLIENT_ID"), os.getenv("SPOTIFY_CLIENT_SECRET")),
+        )
+        _check(response)
+        return response.json()
+
+    return await limiter.acall(Priority.INTERACTIVE, aobserve("exchange_code", send))
+
+
+async def get_profile(access_token: str) -> dict:
+    """Return the current user's Spotify profile for a raw access token."""
+    return await _request("GET", "me", access_token, Priority.INTERACTIVE, call="profile")
+
+
+async def get_account(user_id: int) -> SpotifyAccount:
+    """
+    Returns the user's SpotifyAccount with a valid access token.
+
+    The account is read asynchronously. When the token is about to expire the refresh
+    goes through the synchronous, single-flight `refresh_spotify_token` in a thread,
+    so async and sync workers still share one refresh per account.
+
+    Raises:
+        RuntimeError: If the user has not connected their Spotify account.
+    """
+    try:
+        sp_account = await SpotifyAccount.objects.aget(user_id=user_id)
+    except SpotifyAccount.DoesNotExist:
+        raise RuntimeError("User has not connected Spotify yet.")
+
+    if not sp_account.access_token:
+        raise RuntimeError("User has not connected Spotify yet.")
+
+    await sync_to_async(sh.refresh_spotify_token)(sp_account)
+    return sp_account
+
+
+async def create_playlist(access_token: str, owner_id: str, name: str, description: str) -> str:
+    """Create a private playlist for `owner_id` and return its Spotify ID."""
+    playlist = await _request(
+        "POST",
+        f"users/{owner_id}/playlists",
+        access_token,
+        call="create_playlist",
+        json={"name": name, "public": False, "description": description[:300]},
+    )
+    return playlist["id"]
+
+
+async def add_tracks(access_token: str, playlist_id: str, track_uris: List[str]) -> str | None:
+    """
+    Add tracks to a playlist in ordered batches of 100 (see `spotify_helpers.add_tracks`).
+
+    Returns the playlist's snapshot_id after the last batch.
+    """
+    snapshot_id = None
+    for i in range(0, len(track_uris), 100):
+        response = await _request(
+            "POST",
+            f"playlists/{playlist_id}/tracks",
+            access_token,
+            Priority.BULK,
+            call="add_tracks",
+            json={"uris": track_uris[i : i + 100]},
+        )
+        snapshot_id = response["snapshot_id"]
+    return snapshot_id
+
+
+async def generate_recommendations(access_token: str, prompt: str, size: int = 30,
+                                   skip: Callable[[str], bool] | None = None) -> List[str]:
+    """
+    Async counterpart of `spotify_helpers.generate_recommendations`.
+
+    The local catalog and embedding index are asked first; search and recommendations are then awaited together
+    and share the prompt cache with the sync path. Catalog matches come first, then search
+    results, and recommendations fill the remainder. `skip` works as in the sync version.
+    """
+    want = sh.candidate_count(size, skip)
+    uris: list[str] = []
+    local: list[str] = await catalog.alookup(prompt, want) if settings.TRACK_CATALOG_LOOKUP else []
+    sh.merge_uris(uris, local, size, skip)
+    if len(uris) < size and settings.TRACK_INDEX_LOOKUP:
+        from backend.utils import track_index  # numpy; loaded on first use
+
+        indexed = await asyncio.to_thread(track_index.lookup, prompt, want)
+        local += indexed
+        sh.merge_uris(uris, indexed, size, skip)
+    if len(uris) >= size:
+        return uris
+
+    fetched: list[dict] = []
+    search_limit, recs_limit = min(want, sh.SEARCH_LIMIT), min(want, sh.RECOMMENDATIONS_LIMIT)
+
+    async def search() -> List[str]:
+        data = await _request(
+            "GET", "search", access_token, call="search",
+            params={"q": prompt, "type": "track", "limit": search_limit},
+        )
+        fetched.extend(data["tracks"]["items"])
+        return [t["uri"] for t in data["tracks"]["items"]]
+
+    async def recommend() -> List[str]:
+        seeds = random.sample(sh.GENERIC_SEEDS, k=min(5, len(sh.GENERIC_SEEDS)))
+        data = await _request(
+            "GET", "recommendations", access_token, call="recommendations",
+            params={"seed_genres": ",".join(seeds), "limit": recs_limit},
+        )
+        fetched.extend(data["tracks"])
+        return [t["uri"] for t in data["tracks"]]
+
+    searched, recommended = await asyncio.gather(
+        prompt_cache.aget_or_fetch("search", prompt, search_limit, search),
+        prompt_cache.aget_or_fetch("recommendations", prompt, recs_limit, recommend),
+    )
+
+    sh.merge_uris(uris, searched, size, skip)
+    sh.merge_uris(uris, recommended, size, skip)
+    if len(uris) < size and skip:
+        sh.merge_uris(uris, local + searched + recommended, size)
+
+    if fetched:
+        await catalog.arecord_tracks(fetched)
+    return uris
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Awaitable, Callable, List
+
+from django.core.cache import caches
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalizes a mood prompt so trivially different spellings share a cache entry.
+
+    Args:
+        prompt (str): The raw prompt as typed by the user.
+
+    Returns:
+        str: The prompt lower-cased with surrounding and repeated whitespace removed.
+    """
+    return " ".join(prompt.lower().split())
+
+
+def _p95(samples) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class PromptCache:
+    """
+    Cache of Spotify track URI lists keyed on the normalized prompt and size.
+
+    Entries live in the Django cache alias named by `alias` (local memory or Redis,
+    see CACHES["spotify"] in settings), which provides TTL and LRU eviction.
+    Concurrent misses for the same key inside one process are coalesced: the first
+    caller fetches from Spotify and every other caller waits for its result.
+
+    `stats()` reports the hit rate together with p95 lookup latency for hits and
+    misses, which is the time the cache saves on each POST.
+    """
+
+    def __init__(self, alias: str = "spotify", samples: int = 1000):
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._hit_latency: deque[float] = deque(maxlen=samples)
+        self._miss_latency: deque[float] = deque(maxlen=samples)
+        self._inflight: dict[str, Future] = {}
+        self._ainflight: dict[tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, kind: str, prompt: str, size: int) -> str:
+        digest = hashlib.sha1(normalize_prompt(prompt).encode()).hexdigest()
+        return f"{kind}:{size}:{digest}"
+
+    def get_or_fetch(self, kind: str, prompt: str, size: int,
+                     fetch: Callable[[], List[str]]) -> List[str]:
+        """
+        Returns the cached URIs for (kind, prompt, size), calling `fetch` on a miss.
+
+        Args:
+            kind (str): Which Spotify call is cached, e.g. "search" or "recommendations".
+            prompt (str): The mood prompt; it is normalized before building the key.
+            size (int): The number of tracks requested.
+            fetch (Callable): Performs the upstream call and returns a list of URIs.
+
+        Returns:
+            List[str]: The cached or freshly fetched URIs.
+        """
+        key = self.make_key(kind, prompt, size)
+        started = time.perf_counter()
+
+        value = self.cache.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+                self._hit_latency.append(time.perf_counter() - started)
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = fetch()
+            self.cache.set(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                self._miss_latency.append(time.perf_counter() - started)
+
+    async def aget_or_fetch(self, kind: str, prompt: str, size: int,
+                            fetch: Callable[[], Awaitable[List[str]]]) -> List[str]:
+        """
+        Async counterpart of `get_or_fetch` for the native async Spotify helpers.
+
+        Concurrent misses on the running event loop are coalesced the same way,
+        with `fetch` awaited once and its result shared by every waiter.
+        """
+        key = self.make_key(kind, prompt, size)
+        started = time.perf_counter()
+
+        value = await self.cache.aget(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+                self._hit_latency.append(time.perf_counter() - started)
+            return value
+
+        loop = asyncio.get_running_loop()
+        future = self._ainflight.get((loop, key))
+        if future is not None:
+            with self._lock:
+                self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = self._ainflight[loop, key] = loop.create_future()
+        with self._lock:
+            self.misses += 1
+        try:
+            value = await fetch()
+            await self.cache.aset(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        finally:
+            del self._ainflight[loop, key]
+            with self._lock:
+                self._miss_latency.append(time.perf_counter() - started)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.coalesced = 0
+            self._hit_latency.clear()
+            self._miss_latency.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss/coalesced counters, hit rate and p95 latencies in milliseconds."""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            hit_p95 = _p95(self._hit_latency)
+            miss_p95 = _p95(self._miss_latency)
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "hit_p95_ms": hit_p95 * 1000 if hit_p95 is not None else None,
+                "miss_p95_ms": miss_p95 * 1000 if miss_p95 is not None else None,
+            }
+
+
+prompt_cache = PromptCache()
@@ -2,21 +2,244 @@ from __future__ import annotations
 
 import os
 import random
+import threading
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import timedelta
-from typing import List
-
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from backend.models import SpotifyAccount
+from backend.utils import catalog
+from backend.utils.metrics import observe
+from backend.utils.rate_limit import Priority, limiter
+from backend.utils.spotify_cache import prompt_cache
+
+# Spotipy (which pulls in redis) and the track index (numpy) are imported where they
+# are first used, so a fresh process serves its first request without loading them.
+# The environment (.env) is loaded once, by software.settings.
+if TYPE_CHECKING:
+    import spotipy
+    from spotipy.oauth2 import SpotifyOAuth
+
+
+@lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide requests.Session shared by every Spotify call.
+
+    The session keeps TLS connections to api.spotify.com and accounts.spotify.com
+    alive between requests. Its pool is sized by SPOTIFY_HTTP_POOL_SIZE and it
+    retries connection errors and 5xx answers with exponential backoff; 429 answers
+    are left to `rate_limit.limiter`.
+
+    Returns:
+        requests.Session: The shared, keep-alive HTTP session.
+    """
+    retry = Retry(
+        total=settings.SPOTIFY_HTTP_RETRIES,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        status=settings.SPOTIFY_HTTP_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        # 429s must reach the RateLimiter, which blocks the shared bucket for Retry-After.
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=settings.SPOTIFY_HTTP_POOL_SIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def build_client(access_token: str) -> spotipy.Spotify:
+    """Return a Spotipy client on the shared session, talking to SPOTIFY_API_URL."""
+    import spotipy
+
+    client = spotipy.Spotify(
+        auth=access_token,
+        requests_session=get_session(),
+        requests_timeout=settings.SPOTIFY_HTTP_TIMEOUT,
+    )
+    client.prefix = f"{settings.SPOTIFY_API_URL}/"
+    return client
+
+
+class ClientRegistry:
+    """
+    Bounded LRU of per-user Spotipy clients keyed by user id and access token.
+
+    A client is reused for as long as the user's access token stays the same;
+    once the token is refreshed the stale client is replaced. All clients share
+    the session returned by `get_session`, so reuse also means connection reuse.
+    The hits/misses/evictions counters show how often that happens.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clients: OrderedDict[int, tuple[str, spotipy.Spotify]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, access_token: str) -> spotipy.Spotify:
+        """Return the cached client for `user_id`, building one on a miss or token change."""
+        with self._lock:
+            entry = self._clients.get(user_id)
+            if entry is not None and entry[0] == access_token:
+                self._clients.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            if entry is not None:
+                self.evictions += 1
+            client = build_client(access_token)
+            self._clients[user_id] = (access_token, client)
+            self._clients.move_to_end(user_id)
+            while len(self._clients) > self.maxsize:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+            return client
+
+    def discard(self, user_id: int) -> None:
+        """Drop the cached client for `user_id`, if any."""
+        with self._lock:
+            if self._clients.pop(user_id, None) is not None:
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached client and reset the counters."""
+        with self._lock:
+            self._clients.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return the registry size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._clients),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+clients = ClientRegistry(maxsize=settings.SPOTIFY_CLIENT_CACHE_SIZE)
+
+
+@lru_cache(maxsize=1)
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the process-wide thread pool used to fan out independent Spotify calls.
+
+    Its size is SPOTIFY_FANOUT_WORKERS. Only leaf Spotify calls are submitted to it;
+    callers wait on the futures from their own thread, so the pool never waits on itself.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.SPOTIFY_FANOUT_WORKERS,
+        thread_name_prefix="spotify",
+    )
+
+
+class _UserQueue:
+    """
+    Feeds one user's Spotify calls to the shared pool, at most `limit` at a time.
+
+    Calls beyond the limit wait here rather than on a pool thread, so one user's
+    burst never occupies the threads other users' calls need.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.running = 0
+        self.pending: deque = deque()
+        self.lock = threading.Lock()
+
+    def submit(self, fn: Callable, args, kwargs) -> Future:
+        future: Future = Future()
+        with self.lock:
+            if self.running >= self.limit:
+                self.pending.append((future, fn, args, kwargs))
+                return future
+            self.running += 1
+        self._start(future, fn, args, kwargs)
+        return future
+
+    def _start(self, future: Future, fn: Callable, args, kwargs) -> None:
+        get_executor().submit(self._run, future, fn, args, kwargs)
+
+    def _run(self, future: Future, fn: Callable, args, kwargs) -> None:
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as exc:
+                future.set_exception(exc)
+        with self.lock:
+            if not self.pending:
+                self.running -= 1
+                return
+            following = self.pending.popleft()
+        # The slot passes to the next call, resubmitted so this thread is free for
+        # other users' calls in between.
+        self._start(*following)
+
+
+_user_queues: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+_user_queues_guard = threading.Lock()
+
+
+def _user_queue(user_id) -> _UserQueue:
+    """Return the queue capping concurrent Spotify calls for one user."""
+    with _user_queues_guard:
+        queue = _user_queues.get(user_id)
+        if queue is None:
+            queue = _UserQueue(settings.SPOTIFY_PER_USER_CONCURRENCY)
+            _user_queues[user_id] = queue
+        return queue
+
+
+def submit(user_id, fn: Callable, *args, **kwargs) -> Future:
+    """
+    Runs `fn(*args, **kwargs)` on the shared Spotify pool.
 
-from dotenv import load_dotenv
-load_dotenv()
+    At most SPOTIFY_PER_USER_CONCURRENCY calls per `user_id` run at once; further
+    calls for the same user queue (off the pool) until one of them finishes.
 
+    Args:
+        user_id: Key of the per-user concurrency cap (usually `user.pk`).
+        fn (Callable): The Spotify call to run.
+
+    Returns:
+        Future: Resolves to the return value of `fn`.
+    """
+    return _user_queue(user_id).submit(fn, args, kwargs)
+
+
+@lru_cache(maxsize=1)
 def get_spotify_oauth() -> SpotifyOAuth:
     """
     Creates and returns a SpotifyOAuth object configured with client credentials and redirect URI from environment variables.
 
+    The instance is built once per process and talks to Spotify through the shared session.
+
     Returns:
         SpotifyOAuth: An instance of SpotifyOAuth initialized with the client ID, client secret, redirect URI, and scopes for modifying playlists.
 
@@ -25,14 +248,21 @@ def get_spotify_oauth() -> SpotifyOAuth:
         SPOTIFY_CLIENT_SECRET: The Spotify application's client secret.
         SPOTIFY_REDIRECT_URI: The redirect URI registered with the Spotify application.
     """
-    return SpotifyOAuth(
+    from spotipy.oauth2 import SpotifyOAuth
+
+    oauth = SpotifyOAuth(
         client_id=os.getenv("SPOTIFY_CLIENT_ID"),
         client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
         redirect_uri=os.getenv("SPOTIFY_REDIRECT_URI"),
         scope="playlist-modify-public playlist-modify-private",
         cache_handler=None,
         show_dialog=True,
+        requests_session=get_session(),
+        requests_timeout=settings.SPOTIFY_HTTP_TIMEOUT,
     )
+    oauth.OAUTH_AUTHORIZE_URL = f"{settings.SPOTIFY_ACCOUNTS_URL}/authorize"
+    oauth.OAUTH_TOKEN_URL = f"{settings.SPOTIFY_ACCOUNTS_URL}/api/token"
+    return oauth
 
 
 def exchange_code(code: str) -> dict:
@@ -49,7 +279,28 @@ def exchange_code(code: str) -> dict:
         spotipy.oauth2.SpotifyOauthError: If the token exchange fails.
     """
     oauth = get_spotify_oauth()
-    return oauth.get_access_token(code, as_dict=True)  # spotipy ≥2.23
+    # The OAuth object is shared between users, so never answer from its token cache.
+    return limiter.call(
+        Priority.INTERACTIVE, observe("exchange_code", oauth.get_access_token), code, as_dict=True, check_cache=False
+    )  # spotipy ≥2.23
+
+
+_refresh_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+_refresh_locks_guard = threading.Lock()
+
+
+def _refresh_lock(account_pk: int) -> threading.Lock:
+    """Return the in-process lock that serialises token refreshes for one account."""
+    with _refresh_locks_guard:
+        lock = _refresh_locks.get(account_pk)
+        if lock is None:
+            lock = threading.Lock()
+            _refresh_locks[account_pk] = lock
+        return lock
+
+
+def _token_is_fresh(sp_account: SpotifyAccount) -> bool:
+    return sp_account.token_expires_at - timezone.now() > timedelta(seconds=60)
 
 
 def refresh_spotify_token(sp_account: SpotifyAccount) -> None:
@@ -64,29 +315,46 @@ def refresh_spotify_token(sp_account: SpotifyAccount) -> None:
 
     Notes:
         - If the current access token is valid for more than 60 seconds, the function returns without refreshing.
-        - Otherwise, it uses the stored refresh token to obtain a new access token and updates the account instance.
+        - Otherwise the refresh is single-flight: threads of one process queue on a per-account lock,
+          and processes queue on a `select_for_update` row lock. The first holder refreshes and saves;
+          everyone after it re-reads the row, finds a fresh token and reuses it without calling Spotify.
+        - The account instance passed in is updated with whichever token ends up stored.
     """
-    if sp_account.token_expires_at - timezone.now() > timedelta(seconds=60):
+    if _token_is_fresh(sp_account):
         return  # still valid
 
-    oauth = get_spotify_oauth()
-    token_data = oauth.refresh_access_token(sp_account.refresh_token)  # :contentReference[oaicite:0]{index=0}
+    with _refresh_lock(sp_account.pk), transaction.atomic():
+        locked = SpotifyAccount.objects.select_for_update().get(pk=sp_account.pk)
 
-    sp_account.access_token = token_data["access_token"]
-    sp_account.token_expires_at = timezone.now() + timedelta(
-        seconds=token_data["expires_in"]
-    )
-    sp_account.save(update_fields=["access_token", "token_expires_at"])
+        if not _token_is_fresh(locked):
+            oauth = get_spotify_oauth()
+            token_data = limiter.call(
+                Priority.INTERACTIVE, observe("refresh_token", oauth.refresh_access_token),
+                locked.refresh_token,
+            )
+
+            locked.access_token = token_data["access_token"]
+            locked.token_expires_at = timezone.now() + timedelta(
+                seconds=token_data["expires_in"]
+            )
+            # Spotify may rotate the refresh token; keep the newest one.
+            locked.refresh_token = token_data.get("refresh_token") or locked.refresh_token
+            locked.save(update_fields=["access_token", "refresh_token", "token_expires_at"])
+
+    sp_account.access_token = locked.access_token
+    sp_account.refresh_token = locked.refresh_token
+    sp_account.token_expires_at = locked.token_expires_at
 
 
 def make_client(user) -> spotipy.Spotify:
     """
-    Creates and returns a Spotipy client instance for the given user.
+    Returns a Spotipy client instance for the given user.
 
-    This function retrieves or creates a SpotifyAccount associated with the user.
-    If the user has not connected their Spotify account (i.e., no access token is present),
-    a RuntimeError is raised. The function ensures the access token is refreshed if needed,
-    and then returns an authenticated Spotipy client.
+    This function reads the SpotifyAccount associated with the user (reusing it when the
+    user object already carries it, e.g. via select_related). If the user has not connected
+    their Spotify account (i.e., no account or no access token is present), a RuntimeError
+    is raised. The function ensures the access token is refreshed if needed, and then returns
+    an authenticated Spotipy client from the shared client registry.
 
     Args:
         user: The user object for whom the Spotify client is to be created.
@@ -97,21 +365,16 @@ def make_client(user) -> spotipy.Spotify:
     Raises:
         RuntimeError: If the user has not connected their Spotify account.
     """
-    sp_account, _ = SpotifyAccount.objects.get_or_create(
-        user=user,
-        defaults=dict(
-            spotify_id   = "",
-            access_token = "",
-            refresh_token= "",
-            token_expires_at = timezone.now() - timedelta(days=1),
-        ),
-    )
+    try:
+        sp_account = user.spotifyaccount
+    except SpotifyAccount.DoesNotExist:
+        raise RuntimeError("User has not connected Spotify yet.")
 
     if not sp_account.access_token:
         raise RuntimeError("User has not connected Spotify yet.")
 
     refresh_spotify_token(sp_account)
-    return spotipy.Spotify(auth=sp_account.access_token)
+    return clients.get(user.pk, sp_account.access_token)
 
 
 def create_playlist(sp: spotipy.Spotify, owner_id: str, name: str, description: str) -> str:
@@ -127,7 +390,9 @@ def create_playlist(sp: spotipy.Spotify, owner_id: str, name: str, description:
     Returns:
         str: The ID of the newly created playlist.
     """
-    playlist = sp.user_playlist_create(
+    playlist = limiter.call(
+        Priority.DEFAULT,
+        observe("create_playlist", sp.user_playlist_create),
         owner_id,
         name,
         public=False,
@@ -136,53 +401,197 @@ def create_playlist(sp: spotipy.Spotify, owner_id: str, name: str, description:
     return playlist["id"]
 
 
-def add_tracks(sp: spotipy.Spotify, playlist_id: str, track_uris: List[str]) -> None:
+def add_tracks(sp: spotipy.Spotify, playlist_id: str, track_uris: List[str]) -> str | None:
     """
     Adds a list of tracks to a Spotify playlist in batches of 100.
 
+    Batches are posted one after another on purpose: Spotify applies appends to a
+    playlist in arrival order, so concurrent batches would shuffle the track order.
+
     Args:
         sp (spotipy.Spotify): An authenticated Spotipy client instance.
         playlist_id (str): The Spotify ID of the playlist to add tracks to.
         track_uris (List[str]): A list of Spotify track URIs to add to the playlist.
 
     Returns:
-        None
+        str | None: The playlist's snapshot_id after the last batch, or None if there was nothing to add.
     """
+    snapshot_id = None
     for i in range(0, len(track_uris), 100):
-        sp.playlist_add_items(playlist_id, track_uris[i : i + 100])
+        snapshot_id = limiter.call(
+            Priority.BULK, observe("add_tracks", sp.playlist_add_items),
+            playlist_id, track_uris[i : i + 100],
+        )["snapshot_id"]
+    return snapshot_id
+
+
+def get_playlist_tracks(sp: spotipy.Spotify, playlist_id: str) -> Tuple[List[str], str]:
+    """
+    Reads the current track URIs and snapshot_id of a Spotify playlist.
+
+    Only needed for playlists whose track list was never stored (generated before
+    Playlist.track_uris existed, or after a failed regeneration).
+
+    Returns:
+        Tuple[List[str], str]: The track URIs in playlist order and the snapshot_id.
+    """
+    playlist = limiter.call(
+        Priority.DEFAULT, observe("get_playlist", sp.playlist),
+        playlist_id, fields="snapshot_id,tracks(items(track(uri)),next)",
+    )
+    uris, page = [], playlist["tracks"]
+    while page:
+        uris.extend(item["track"]["uri"] for item in page["items"] if item.get("track"))
+        page = limiter.call(Priority.DEFAULT, observe("get_playlist", sp.next), page) if page.get("next") else None
+    return uris, playlist["snapshot_id"]
+
+
+def diff_tracks(old: List[str], new: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Returns the URIs to remove from and to add to `old` so it holds the tracks of `new`.
+
+    Returns:
+        Tuple[List[str], List[str]]: (removed, added), each without duplicates and in list order.
+    """
+    old_set, new_set = set(old), set(new)
+    removed = [uri for uri in dict.fromkeys(old) if uri not in new_set]
+    added = [uri for uri in dict.fromkeys(new) if uri not in old_set]
+    return removed, added
+
+
+def sync_tracks(sp: spotipy.Spotify, playlist_id: str, old: List[str], new: List[str],
+                snapshot_id: str) -> Tuple[List[str], str]:
+    """
+    Brings a Spotify playlist from the `old` to the `new` track list with the fewest calls.
+
+    Only tracks missing from `new` are removed and only tracks missing from `old` are
+    appended, in batches of 100; a playlist whose tracks did not change costs no call.
+    Removals are sent with the stored `snapshot_id`, so Spotify applies them to the
+    version of the playlist the diff was computed against even if it was edited since.
+    Tracks that stay keep their current position.
+
+    Args:
+        sp (spotipy.Spotify): An authenticated Spotipy client instance.
+        playlist_id (str): The Spotify ID of the playlist.
+        old (List[str]): The playlist's tracks as last stored.
+        new (List[str]): The tracks it should contain.
+        snapshot_id (str): The snapshot_id that `old` belongs to.
+
+    Returns:
+        Tuple[List[str], str]: The resulting track list and the playlist's new snapshot_id.
+    """
+    removed, added = diff_tracks(old, new)
+    for i in range(0, len(removed), 100):
+        snapshot_id = limiter.call(
+            Priority.BULK, observe("remove_tracks", sp.playlist_remove_all_occurrences_of_items),
+            playlist_id, removed[i : i + 100], snapshot_id=snapshot_id or None,
+        )["snapshot_id"]
+    if added:
+        snapshot_id = add_tracks(sp, playlist_id, added)
+
+    gone = set(removed)
+    return [uri for uri in old if uri not in gone] + added, snapshot_id
 
 
 GENERIC_SEEDS = ["pop", "rock", "indie", "electronic", "hip-hop"]  # fallback
 
 
-def generate_recommendations(sp: spotipy.Spotify, prompt: str, size: int = 30) -> List[str]:
+def merge_uris(uris: List[str], extra: List[str], size: int,
+               skip: Callable[[str], bool] | None = None) -> None:
+    """
+    Append URIs from `extra` to `uris` in order, skipping duplicates, until `size` is reached.
+
+    URIs for which `skip` returns True (e.g. tracks the user was given before) are left out.
+    """
+    seen = set(uris)
+    for uri in extra:
+        if len(uris) >= size:
+            break
+        if uri not in seen and not (skip and skip(uri)):
+            seen.add(uri)
+            uris.append(uri)
+
+
+def candidate_count(size: int, skip: Callable[[str], bool] | None) -> int:
+    """How many candidates to ask each source for: `size`, times SEEN_TRACKS_OVERFETCH when filtering."""
+    return size * settings.SEEN_TRACKS_OVERFETCH if skip else size
+
+
+# Largest `limit` accepted by Spotify's search and recommendations endpoints.
+SEARCH_LIMIT = 50
+RECOMMENDATIONS_LIMIT = 100
+
+
+def generate_recommendations(sp: spotipy.Spotify, prompt: str, size: int = 30,
+                             user_id=None, skip: Callable[[str], bool] | None = None) -> List[str]:
     """
     Generate a list of Spotify track URIs based on a search prompt and recommended tracks.
 
-    This function first searches for tracks matching the given prompt and collects their URIs.
-    If the number of found tracks is less than the requested size, it fills the remainder
-    by generating recommendations using generic genre seeds.
+    The local track catalog (full-text) and the in-process embedding index are asked first;
+    when together they hold `size` matching tracks no Spotify call is made. Otherwise this
+    function searches for tracks matching the given prompt and, at the same time, fetches
+    recommendations using generic genre seeds. Local matches come first, then search
+    results, then recommendations fill the remainder (duplicates skipped), so the order is
+    deterministic. Every track Spotify returns is recorded in the catalog.
+
+    Both Spotify calls go through `prompt_cache`, so identical prompts (e.g. the mood buttons)
+    are answered from the cache and concurrent identical misses share one Spotify call.
+
+    With `skip` (see `seen_tracks.skip_seen`) every source is asked for
+    SEEN_TRACKS_OVERFETCH times more candidates and skipped tracks are left out; if too
+    few remain, skipped tracks fill the rest so the playlist still reaches `size`.
 
     Args:
         sp (spotipy.Spotify): An authenticated Spotipy client instance.
         prompt (str): The search query to find relevant tracks.
         size (int, optional): The total number of track URIs to return. Defaults to 30.
+        user_id (optional): Key of the per-user concurrency cap for the fanned-out calls.
+        skip (Callable[[str], bool], optional): Returns True for URIs to leave out if possible.
 
     Returns:
         List[str]: A list of Spotify track URIs, up to the specified size.
     """
+    want = candidate_count(size, skip)
     uris: list[str] = []
+    local: list[str] = catalog.lookup(prompt, want) if settings.TRACK_CATALOG_LOOKUP else []
+    merge_uris(uris, local, size, skip)
+    if len(uris) < size and settings.TRACK_INDEX_LOOKUP:
+        from backend.utils import track_index  # numpy; loaded on first use
+
+        indexed = track_index.lookup(prompt, want)
+        local += indexed
+        merge_uris(uris, indexed, size, skip)
+    if len(uris) >= size:
+        return uris
+
+    fetched: list[dict] = []
+    search_limit, recs_limit = min(want, SEARCH_LIMIT), min(want, RECOMMENDATIONS_LIMIT)
+
+    def search() -> List[str]:
+        found = limiter.call(Priority.DEFAULT, observe("search", sp.search), q=prompt, type="track", limit=search_limit)
+        results = found["tracks"]["items"]
+        fetched.extend(results)
+        return [t["uri"] for t in results]
+
+    def recommend() -> List[str]:
+        seeds = random.sample(GENERIC_SEEDS, k=min(5, len(GENERIC_SEEDS)))
+        recs = limiter.call(Priority.DEFAULT, observe("recommendations", sp.recommendations), seed_genres=seeds, limit=recs_limit)
+        fetched.extend(recs["tracks"])
+        return [t["uri"] for t in recs["tracks"]]
 
-    search_results = sp.search(q=prompt, type="track", limit=size)["tracks"]["items"]
-    uris.extend([t["uri"] for t in search_results])
+    searched = submit(user_id, prompt_cache.get_or_fetch, "search", prompt, search_limit, search)
+    recommended = submit(user_id, prompt_cache.get_or_fetch, "recommendations", prompt, recs_limit, recommend)
 
-    remaining = size - len(uris)
-    if remaining > 0:
-        seeds = random.sample(GENERIC_SEEDS, k=min(5, len(GENERIC_SEEDS)))
-        recs = sp.recommendations(seed_genres=seeds, limit=remaining)
-        uris.extend([t["uri"] for t in recs["tracks"]])
+    merge_uris(uris, searched.result(), size, skip)
+    if len(uris) < size:
+        merge_uris(uris, recommended.result(), size, skip)
+    if len(uris) < size and skip:
+        # Not enough unseen tracks: repeats are better than a short playlist.
+        merge_uris(uris, local + searched.result() + recommended.result(), size)
 
-    return uris[:size]
+    if fetched:
+        catalog.record_tracks(list(fetched))
+    return uris
 
 
 def get_profile(access_token: str) -> dict:
@@ -198,6 +607,5 @@ def get_profile(access_token: str) -> dict:
     Raises:
         spotipy.SpotifyException: If the access token is invalid or expired.
     """
-    """Return current_user profile from a raw token (used in callback)."""
-    sp = spotipy.Spotify(auth=access_token)
-    return sp.current_user()
+    sp = build_client(access_token)
+    return limiter.call(Priority.INTERACTIVE, observe("profile", sp.current_user))
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Iterable, List, Sequence
+
+import numpy as np
+import xxhash
+
+FORMAT_VERSION = 1
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingVectorizer:
+    """
+    Deterministic text embedding based on signed feature hashing.
+
+    Words and word bigrams are hashed with xxhash into `dim` buckets; a second hash bit
+    picks the sign so collisions tend to cancel out. Rows are L2-normalized, so a dot
+    product between two vectors is their cosine similarity. No model files or network
+    access are needed, and the same text always maps to the same vector.
+    """
+
+    def __init__(self, dim: int = 128):
+        self.dim = dim
+
+    @staticmethod
+    def tokens(text: str) -> List[str]:
+        words = TOKEN_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a (len(texts), dim) float32 matrix of normalized embeddings."""
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for token in self.tokens(text):
+                h = xxhash.xxh64_intdigest(token)
+                rows.append(row)
+                cols.append(h % self.dim)
+                signs.append(1.0 if (h >> 63) & 1 else -1.0)
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+class TrackIndex:
+    """
+    In-process cosine top-k index over track embeddings.
+
+    Vectors live in two float32 matrices (rows = tracks): the base, as loaded, and a
+    small in-memory delta of the tracks added since. A saved index is a directory
+    holding `vectors.npy`, `uris.txt` and `meta.json`; `load` memory-maps the base so
+    several worker processes share the same read-only pages. `add` appends to the delta
+    with amortized growth and never touches the base, `save` writes base and delta as
+    one new file, and `query` scores a whole batch of prompts with one matrix product
+    per block of rows of either part.
+    """
+
+    def __init__(self, dim: int = 128, block_rows: int = 262144):
+        self.vectorizer = HashingVectorizer(dim)
+        self.block_rows = block_rows
+        self.uris: List[str] = []
+        self._positions: dict[str, int] = {}
+        self._base = np.zeros((0, dim), dtype=np.float32)
+        self._delta = np.zeros((0, dim), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    @property
+    def dim(self) -> int:
+        return self.vectorizer.dim
+
+    def __len__(self) -> int:
+        return len(self.uris)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """All vectors in URI order (a copy when tracks were added since the base was loaded)."""
+        base, delta = self._parts()
+        return np.concatenate([base, delta]) if len(delta) else base
+
+    def _parts(self) -> tuple[np.ndarray, np.ndarray]:
+        base = self._base
+        return base, self._delta[: len(self.uris) - len(base)]
+
+    @staticmethod
+    def track_text(name: str, artist: str = "", genre: str = "") -> str:
+        return f"{name} {artist} {genre}"
+
+    def add(self, uris: Sequence[str], texts: Sequence[str]) -> int:
+        """
+        Embeds and appends tracks, skipping URIs already in the index.
+
+        Returns:
+            int: The number of tracks added.
+        """
+        with self._lock:
+            new = [(uri, text) for uri, text in zip(uris, texts) if uri not in self._positions]
+            new = list(dict(new).items())
+            if not new:
+                return 0
+
+            vectors = self.vectorizer.transform([text for _, text in new])
+            start = len(self.uris)
+            # Rows of the delta matrix; the (possibly memory-mapped) base stays untouched.
+            used = start - len(self._base)
+            end = used + len(new)
+            if end > self._delta.shape[0]:
+                capacity = max(end, int(self._delta.shape[0] * 1.5), 1024)
+                grown = np.zeros((capacity, self.dim), dtype=np.float32)
+                grown[:used] = self._delta[:used]
+                self._delta = grown
+            self._delta[used:end] = vectors
+
+            for offset, (uri, _) in enumerate(new):
+                self._positions[uri] = start + offset
+                self.uris.append(uri)
+            return len(new)
+
+    def rebuild(self, tracks: Iterable[tuple], batch_size: int = 10000) -> None:
+        """Replace the index contents with `(uri, name, artist, genre)` tuples."""
+        fresh = TrackIndex(self.dim, self.block_rows)
+        batch: list[tuple] = []
+        for track in tracks:
+            batch.append(track)
+            if len(batch) >= batch_size:
+                fresh._add_tracks(batch)
+                batch = []
+        fresh._add_tracks(batch)
+        with self._lock:
+            self.uris, self._positions = fresh.uris, fresh._positions
+            self._base, self._delta = fresh._base, fresh._delta
+
+    def _add_tracks(self, tracks: Sequence[tuple]) -> None:
+        if tracks:
+            self.add([t[0] for t in tracks], [self.track_text(*t[1:]) for t in tracks])
+
+    def query(self, prompts: Sequence[str], k: int, min_score: float = 0.0) -> List[List[tuple]]:
+        """
+        Returns the top-k `(uri, score)` pairs for each prompt, best first.
+
+        Args:
+            prompts (Sequence[str]): Prompts to score as one batch.
+            k (int): Number of candidates per prompt.
+            min_score (float, optional): Drop candidates whose cosine score is below this.
+        """
+        with self._lock:
+            count = len(self.uris)
+            (base, delta), uris = self._parts(), self.uris
+        if not count or not prompts or k <= 0:
+            return [[] for _ in prompts]
+
+        queries = self.vectorizer.transform(prompts)
+        k = min(k, count)
+        best_scores = np.full((len(prompts), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(prompts), 0), dtype=np.int64)
+
+        blocks = [
+            (offset + start, part[start : start + self.block_rows])
+            for offset, part in ((0, base), (len(base), delta))
+            for start in range(0, len(part), self.block_rows)
+        ]
+        for start, block in blocks:
+            scores = queries @ block.T
+            kk = min(k, scores.shape[1])
+            top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        results = []
+        for scores, rows in zip(np.take_along_axis(best_scores, order, axis=1),
+                                np.take_along_axis(best_rows, order, axis=1)):
+            results.append([(uris[row], float(score)) for score, row in zip(scores, rows)
+                            if score > min_score])
+        return results
+
+    def save(self, path) -> None:
+        """Write the index to the directory `path`; each file is replaced atomically."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            vectors, uris = np.ascontiguousarray(self.vectors), list(self.uris)
+
+        np.save(path / "vectors.tmp.npy", vectors)
+        (path / "uris.tmp.txt").write_text("\n".join(uris), encoding="utf-8")
+        (path / "meta.json.tmp").write_text(json.dumps(
+            {"version": FORMAT_VERSION, "dim": self.dim, "count": len(uris)}
+        ))
+        os.replace(path / "vectors.tmp.npy", path / "vectors.npy")
+        os.replace(path / "uris.tmp.txt", path / "uris.txt")
+        os.replace(path / "meta.json.tmp", path / "meta.json")
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "TrackIndex":
+        """Load an index saved with `save`, memory-mapping the vectors by default."""
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported track index version {meta['version']}")
+
+        index = cls(dim=meta["dim"])
+        index._base = np.load(path / "vectors.npy", mmap_mode="r" if mmap else None)
+        text = (path / "uris.txt").read_text(encoding="utf-8")
+        index.uris = text.split("\n") if text else []
+        index._positions = {uri: i for i, uri in enumerate(index.uris)}
+        if len(index.uris) != index._base.shape[0]:
+            raise ValueError("Track index is corrupt: vector and URI counts differ")
+        return index
+
+
+_index: TrackIndex | None = None
+_index_guard = threading.Lock()
+
+
+def get_index() -> TrackIndex:
+    """
+    Returns the process-wide track index.
+
+    It is loaded (memory-mapped) from TRACK_INDEX_PATH the first time it is needed,
+    or starts empty when nothing has been built yet (see `build_track_index`).
+    """
+    global _index
+    if _index is None:
+        from django.conf import settings
+
+        with _index_guard:
+            if _index is None:
+                path = Path(settings.TRACK_INDEX_PATH)
+                if (path / "meta.json").exists():
+                    _index = TrackIndex.load(path)
+                else:
+                    _index = TrackIndex(dim=settings.TRACK_INDEX_DIM)
+    return _index
+
+
+def lookup(prompt: str, k: int) -> List[str]:
+    """Return up to `k` track URIs whose embedding is closest to the prompt."""
+    from django.conf import settings
+
+    index = get_index()
+    if not len(index):
+        return []
+    [matches] = index.query([prompt], k, min_score=settings.TRACK_INDEX_MIN_SCORE)
+    return [uri for uri, _ in matches]
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+
+def _key(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def get_user(user_id):
+    """
+    Return the user with this primary key, from the "auth" cache when possible.
+
+    Authenticated requests resolve their user on every call (JWT and session auth
+    alike), so a warm entry saves one query per request. Entries are dropped whenever
+    the user is saved or deleted (see backend.signals); AUTH_USER_CACHE_TTL only bounds
+    how long a change made outside the ORM (raw SQL, another database client) can go
+    unnoticed.
+
+    Args:
+        user_id: The user's primary key, as stored in the session or the JWT claim.
+
+    Returns:
+        User | None: The user, or None when no such user exists.
+    """
+    cache = caches["auth"]
+    key = _key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model()._default_manager.filter(pk=user_id).first()
+        if user is not None and settings.AUTH_USER_CACHE_TTL:
+            cache.set(key, user, settings.AUTH_USER_CACHE_TTL)
+    return user
+
+
+def invalidate(user_id) -> None:
+    caches["auth"].delete(_key(user_id))
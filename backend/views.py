@@ -0,0 +1,52 @@
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+
+from backend.utils import profiling
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint (GET /metrics).
+
+    Exposes the metrics recorded by MetricsMiddleware and the Spotify helpers. When
+    METRICS_TOKEN is set the scraper must send it as `Authorization: Bearer <token>`.
+    With PROMETHEUS_MULTIPROC_DIR set (several worker processes) the per-process files
+    in that directory are aggregated.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not constant_time_compare(request.headers.get("Authorization", ""), expected):
+            return HttpResponse(status=401)
+
+    registry = REGISTRY
+    if settings.PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+@staff_member_required
+def profile_list_view(request):
+    """Staff page listing the request profiles stored by ProfilingMiddleware."""
+    return render(request, "admin/profiles.html", {
+        **admin.site.each_context(request),
+        "title": "Request profiles",
+        "profiles": profiling.list_profiles(),
+        "enabled": settings.PROFILING_ENABLED,
+    })
+
+
+@staff_member_required
+def profile_download_view(request, rid, kind):
+    """Download one stored profile as `.prof` (pstats) or `.folded` (flame graph)."""
+    path = profiling.profile_file(rid, kind)
+    if path is None:
+        raise Http404("No such profile")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=path.name)
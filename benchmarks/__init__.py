@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for Filipy.
+
+Each module is runnable with ``python -m benchmarks.<name> --help`` and prints a
+JSON report to stdout so results can be compared across commits.
+"""
@@ -0,0 +1,97 @@
+"""
+Benchmark of the admin playlist changelist on a large table (backend.admin).
+
+Grows the user and playlist tables through the given sizes and, at each size, times
+the rendered changelist (first page, a status filter, a user filter and a search)
+through the Django test client, with the number of queries per page. Rows are
+inserted with generate_series inside a transaction that is rolled back at the end,
+so it can run against any migrated Postgres database.
+
+    python -m benchmarks.admin_changelist --sizes 10000,1000000,10000000
+"""
+
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "software.settings")
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from benchmarks.report import emit, percentiles  # noqa: E402
+
+PLAYLISTS_PER_USER = 20
+
+INSERT_USERS = """
+    INSERT INTO auth_user
+        (username, password, is_superuser, is_staff, is_active, first_name, last_name, email, date_joined)
+    SELECT 'bench-admin-' || g || '@example.com', '!', false, false, true, '', '', '', now()
+    FROM generate_series(%s, %s) AS g
+"""
+INSERT_PLAYLISTS = """
+    INSERT INTO backend_playlist
+        (user_id, name, description, mood_prompt, spotify_id, status, track_uris, snapshot_id,
+         created_at, updated_at)
+    SELECT u.id, 'Mix ' || g, '', (ARRAY['calm lo-fi', 'upbeat indie', 'rainy jazz'])[1 + g %% 3],
+           '', (ARRAY['done', 'failed', 'pending'])[1 + g %% 3], '{}', '',
+           now() - g * interval '1 second', now() - g * interval '1 second'
+    FROM generate_series(%s, %s) AS g
+    JOIN auth_user u ON u.username = 'bench-admin-' || (g / %s) || '@example.com'
+"""
+
+
+def timed(client: Client, url: str, repeat: int) -> dict:
+    samples, queries = [], 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+        queries = len(captured)
+    return {**percentiles(samples), "queries": queries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,1000000,10000000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    report = {"results": []}
+    with transaction.atomic():
+        admin = User.objects.create_superuser(username="admin-benchmark@example.com", password="x")
+        client = Client()
+        client.force_login(admin)
+        inserted = 0
+        for size in sizes:
+            with connection.cursor() as cursor:
+                cursor.execute(INSERT_USERS, [inserted // PLAYLISTS_PER_USER + 1, size // PLAYLISTS_PER_USER])
+                cursor.execute(INSERT_PLAYLISTS, [max(inserted + 1, PLAYLISTS_PER_USER), size, PLAYLISTS_PER_USER])
+                cursor.execute("ANALYZE auth_user")
+                cursor.execute("ANALYZE backend_playlist")
+            inserted = size
+            some_user = User.objects.get(username="bench-admin-1@example.com").pk
+
+            base = "/django-admin/backend/playlist/"
+            report["results"].append({
+                "playlists": size,
+                "first_page": timed(client, base, args.repeat),
+                "status_filter": timed(client, f"{base}?status__exact=failed", args.repeat),
+                "user_filter": timed(client, f"{base}?user={some_user}", args.repeat),
+                "search": timed(client, f"{base}?q=rainy", args.repeat),
+            })
+        transaction.set_rollback(True)
+
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Cold-start benchmark of the web and worker processes.
+
+Each target runs in a fresh interpreter under `python -X importtime`, the way a new
+container starts:
+
+- check: `manage.py check` (settings, apps, models, URLconf and system checks).
+- wsgi / asgi: import software.wsgi / software.asgi and load the URLconf, i.e. every
+  view module, then serve one GET of --path through the application object.
+- worker: django.setup() plus the task modules a Celery worker imports.
+
+For each target it reports the wall time of the whole process, the total import time
+against IMPORT_BUDGET_MS, the slowest top-level imports and which of LAZY_MODULES got
+loaded; wsgi and asgi also report the time from interpreter start to the first response.
+The web targets serve a real request, so they need the configured database to be
+reachable. With --strict the exit status is 1 when a target goes over its budget.
+
+    python -m benchmarks.cold_start --repeat 5 --path /login/ --strict
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Heavy packages a fresh process must not import before its first job or request.
+LAZY_MODULES = ("numpy", "spotipy", "langchain", "openai", "grpc")
+
+# Total import time allowed per target, enforced by backend.tests.StartupImportTests
+# (best of three runs) and by the report's --strict exit status. About three times what
+# the targets take today (0.8-1.0 s), so a loaded CI machine stays clear of it: the budget
+# catches a heavy stack creeping onto the startup path, LAZY_MODULES the usual suspects.
+IMPORT_BUDGET_MS = {"wsgi": 3000, "asgi": 3000, "worker": 3000}
+
+SERVE = """
+import os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "software.settings")
+from software.{kind} import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+if len(sys.argv) > 1:
+    from benchmarks.cold_start import serve_{kind}
+    status = serve_{kind}(application, sys.argv[1])
+    print(status, time.monotonic() - float(sys.argv[2]), flush=True)
+"""
+
+TARGETS = {
+    "check": ["manage.py", "check"],
+    "wsgi": ["-c", SERVE.format(kind="wsgi")],
+    "asgi": ["-c", SERVE.format(kind="asgi")],
+    "worker": ["-c", "import os, django; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'software.settings');"
+                     " django.setup(); from software.celery import app; app.loader.import_default_modules()"],
+}
+
+
+def serve_wsgi(application, path: str) -> int:
+    """Serve one GET of `path` through a WSGI application; returns the status code."""
+    from io import BytesIO
+
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "", "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80", "HTTP_HOST": "localhost", "wsgi.input": BytesIO(), "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http", "wsgi.version": (1, 0), "wsgi.multithread": False,
+        "wsgi.multiprocess": True, "wsgi.run_once": False,
+    }
+    started = []
+    body = application(environ, lambda status, headers, exc_info=None: started.append(status))
+    b"".join(body)
+    return int(started[0].split()[0])
+
+
+def serve_asgi(application, path: str) -> int:
+    """Serve one GET of `path` through an ASGI application; returns the status code."""
+    import asyncio
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+    }
+
+    async def run():
+        messages, sent = [{"type": "http.request", "body": b"", "more_body": False}], []
+
+        async def receive():
+            return messages.pop() if messages else await asyncio.Future()
+
+        async def send(message):
+            sent.append(message)
+
+        await application(scope, receive, send)
+        return sent[0]["status"]
+
+    return asyncio.run(run())
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Read the `-X importtime` lines of a process.
+
+    Returns:
+        dict: `import_ms`, the sum of every module's own import time; `top_level`,
+        {module: cumulative ms} of the imports made directly by the program; and
+        `modules`, the set of every imported module name.
+    """
+    total_us, top_level, modules = 0, {}, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        total_us += int(own)
+        modules.add(name.strip())
+        if not name.startswith("  "):
+            top_level[name.strip()] = int(cumulative) / 1000
+    return {"import_ms": round(total_us / 1000, 1), "top_level": top_level, "modules": modules}
+
+
+def run(target: str, path: str | None = None) -> dict:
+    """Start `target` in a fresh interpreter; returns its wall time, import profile and first response."""
+    args = [sys.executable, "-X", "importtime", *TARGETS[target]]
+    # The monotonic clock is system-wide, so the child times its first response from our start.
+    started = time.monotonic()
+    if path is not None:
+        args += [path, repr(started)]
+    process = subprocess.run(args, cwd=ROOT, capture_output=True, text=True, env=os.environ)
+    wall = time.monotonic() - started
+    if process.returncode:
+        raise RuntimeError(f"{target} exited with {process.returncode}:\n{process.stderr[-2000:]}")
+    result = {"wall_s": wall, **parse_importtime(process.stderr)}
+    if path is not None:
+        status, seconds = process.stdout.split()[-2:]
+        result.update(status=int(status), first_response_s=float(seconds))
+    return result
+
+
+def main():
+    # Imported here: the report helpers load numpy, which the served child must not see.
+    from benchmarks.report import emit, percentiles
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--path", default="/login/", help="Page served by the wsgi and asgi targets.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list.")
+    parser.add_argument("--output", help="Also save the report to this file.")
+    parser.add_argument("--strict", action="store_true", help="Exit with 1 when an import budget is exceeded.")
+    args = parser.parse_args()
+
+    report = {"path": args.path, "budget_ms": IMPORT_BUDGET_MS, "targets": {}}
+    for target in TARGETS:
+        path = args.path if target in ("wsgi", "asgi") else None
+        runs = [run(target, path) for _ in range(args.repeat)]
+        last = runs[-1]
+        imports = sorted(r["import_ms"] for r in runs)
+        p50 = imports[len(imports) // 2]
+        result = {
+            "wall": percentiles([r["wall_s"] for r in runs]),
+            "import_ms_p50": p50,
+            "within_budget": p50 < IMPORT_BUDGET_MS.get(target, float("inf")),
+            "slowest_imports_ms": dict(sorted(last["top_level"].items(), key=lambda item: -item[1])[: args.top]),
+            "lazy_modules_loaded": sorted(m for m in LAZY_MODULES if m in last["modules"]),
+        }
+        if path is not None:
+            result["status"] = last["status"]
+            result["first_response"] = percentiles([r["first_response_s"] for r in runs])
+        report["targets"][target] = result
+    emit(report, args.output)
+    if args.strict and not all(result["within_budget"] for result in report["targets"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Compare two JSON reports written by a benchmark's --output option.
+
+Prints every numeric metric found in both reports with the relative change, e.g.
+p95 latency per step of benchmarks.load_playlists before and after a change.
+
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import json
+
+
+def flatten(report, prefix: str = "") -> dict:
+    """Map dotted paths to the numeric leaves of a nested report."""
+    values = {}
+    if isinstance(report, dict):
+        for key, value in report.items():
+            values.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(report, (int, float)) and not isinstance(report, bool):
+        values[prefix.rstrip(".")] = report
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before) as handle:
+        before = json.load(handle)
+    with open(args.after) as handle:
+        after = json.load(handle)
+
+    print(f"{'metric':<50} {before.get('commit') or 'before':>12} {after.get('commit') or 'after':>12} {'change':>9}")
+    old, new = flatten(before), flatten(after)
+    for path in sorted(old.keys() & new.keys()):
+        change = f"{(new[path] - old[path]) / old[path] * 100:+.1f}%" if old[path] else ""
+        print(f"{path:<50} {old[path]:>12g} {new[path]:>12g} {change:>9}")
+
+
+if __name__ == "__main__":
+    main()
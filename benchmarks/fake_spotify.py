@@ -0,0 +1,236 @@
+"""
+Local stand-in for the Spotify Web API and accounts service, for load tests.
+
+Serves the endpoints Filipy calls (token exchange/refresh, /me, search,
+recommendations, playlist creation, reads and track adds/removals) with
+deterministic fake data and in-memory playlists,
+plus configurable latency, 5xx errors and 429 throttling. Point the app at it with
+
+    SPOTIFY_API_URL=http://127.0.0.1:8900/v1 SPOTIFY_ACCOUNTS_URL=http://127.0.0.1:8900
+
+and run it standalone with
+
+    python -m benchmarks.fake_spotify --port 8900 --latency-ms 80 --throttle-rate 0.02
+
+GET /__stats returns the request and injected-fault counters as JSON.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+WORDS = ["midnight", "sunrise", "echo", "velvet", "neon", "river", "static", "golden",
+         "paper", "thunder", "glass", "ocean", "ember", "satellite", "wild", "quiet"]
+
+
+@dataclass
+class Faults:
+    """Latency and fault injection knobs; rates are probabilities per request."""
+
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+
+
+def fake_track(seed: str, position: int) -> dict:
+    digest = hashlib.sha1(f"{seed}:{position}".encode()).hexdigest()
+    words = [WORDS[int(digest[i : i + 2], 16) % len(WORDS)] for i in (0, 2, 4)]
+    return {
+        "uri": f"spotify:track:{digest[:22]}",
+        "name": f"{words[0].title()} {words[1].title()}",
+        "artists": [{"name": f"The {words[2].title()}s"}],
+        "popularity": int(digest[6:8], 16) % 100,
+    }
+
+
+class FakeSpotifyHandler(BaseHTTPRequestHandler):
+    server: "FakeSpotifyServer"
+    protocol_version = "HTTP/1.1"
+
+    # Spotipy adds a trailing slash to some paths ("me/"), so routes accept both.
+    ROUTES = [
+        ("POST", re.compile(r"^/api/token/?$"), "token"),
+        ("GET", re.compile(r"^/v1/me/?$"), "me"),
+        ("GET", re.compile(r"^/v1/search/?$"), "search"),
+        ("GET", re.compile(r"^/v1/recommendations/?$"), "recommendations"),
+        ("POST", re.compile(r"^/v1/users/(?P<user>[^/]+)/playlists/?$"), "create_playlist"),
+        ("POST", re.compile(r"^/v1/playlists/(?P<playlist>[^/]+)/tracks/?$"), "add_tracks"),
+        ("DELETE", re.compile(r"^/v1/playlists/(?P<playlist>[^/]+)/tracks/?$"), "remove_tracks"),
+        ("GET", re.compile(r"^/v1/playlists/(?P<playlist>[^/]+)/?$"), "get_playlist"),
+        ("GET", re.compile(r"^/__stats$"), "stats"),
+    ]
+
+    def log_message(self, format, *args):
+        pass  # keep load-test output clean
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method: str):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                break
+        else:
+            return self.reply(404, {"error": {"status": 404, "message": "Not found"}})
+
+        if name == "stats":
+            return self.reply(200, self.server.stats())
+
+        faults = self.server.faults
+        self.server.count(name)
+        time.sleep(max(0.0, faults.latency_ms + random.uniform(-1, 1) * faults.jitter_ms) / 1000)
+
+        roll = random.random()
+        if roll < faults.throttle_rate:
+            self.server.count("throttled")
+            return self.reply(429, {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                              {"Retry-After": str(faults.retry_after)})
+        if roll < faults.throttle_rate + faults.error_rate:
+            self.server.count("errors")
+            return self.reply(503, {"error": {"status": 503, "message": "Service unavailable"}})
+
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status, payload = getattr(self, f"handle_{name}")(match.groupdict(), query, body)
+        self.reply(status, payload)
+
+    def reply(self, status: int, payload: dict, headers: dict | None = None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_token(self, params, query, body):
+        form = {key: values[-1] for key, values in parse_qs(body.decode()).items()}
+        token = {
+            "access_token": f"fake-access-{next(self.server.ids)}",
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "scope": "playlist-modify-public playlist-modify-private",
+        }
+        if form.get("grant_type") == "authorization_code":
+            token["refresh_token"] = f"fake-refresh-{next(self.server.ids)}"
+        return 200, token
+
+    def handle_me(self, params, query, body):
+        return 200, {"id": "fake-user", "display_name": "Fake User", "type": "user"}
+
+    def handle_search(self, params, query, body):
+        limit = int(query.get("limit", 10))
+        tracks = [fake_track(query.get("q", ""), i) for i in range(limit)]
+        return 200, {"tracks": {"items": tracks, "limit": limit, "total": limit}}
+
+    def handle_recommendations(self, params, query, body):
+        limit = int(query.get("limit", 20))
+        seed = query.get("seed_genres", "") + str(random.random())
+        return 200, {"tracks": [fake_track(seed, i) for i in range(limit)], "seeds": []}
+
+    def handle_create_playlist(self, params, query, body):
+        data = json.loads(body or b"{}")
+        playlist_id = f"fakepl{next(self.server.ids):016d}"
+        self.server.playlists[playlist_id] = []
+        return 201, {"id": playlist_id, "name": data.get("name", ""), "owner": {"id": params["user"]}}
+
+    def handle_add_tracks(self, params, query, body):
+        data = json.loads(body or b"{}")
+        uris = data if isinstance(data, list) else data.get("uris", [])  # spotipy posts a bare list
+        with self.server.lock:
+            self.server.playlists.setdefault(params["playlist"], []).extend(uris)
+        return 201, {"snapshot_id": f"snap{next(self.server.ids)}"}
+
+    def handle_remove_tracks(self, params, query, body):
+        gone = {track["uri"] for track in json.loads(body or b"{}").get("tracks", [])}
+        with self.server.lock:
+            tracks = self.server.playlists.get(params["playlist"], [])
+            tracks[:] = [uri for uri in tracks if uri not in gone]
+        return 200, {"snapshot_id": f"snap{next(self.server.ids)}"}
+
+    def handle_get_playlist(self, params, query, body):
+        with self.server.lock:
+            tracks = list(self.server.playlists.get(params["playlist"], []))
+        return 200, {
+            "id": params["playlist"],
+            "snapshot_id": f"snap{next(self.server.ids)}",
+            "tracks": {"items": [{"track": {"uri": uri}} for uri in tracks], "next": None},
+        }
+
+
+class FakeSpotifyServer(ThreadingHTTPServer):
+    """Threaded fake Spotify server; `serve_in_thread` runs it in the background."""
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), faults: Faults | None = None):
+        super().__init__(address, FakeSpotifyHandler)
+        self.faults = faults or Faults()
+        self.ids = itertools.count(1)
+        self.playlists: dict[str, list] = {}
+        self.lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self._counts[name] += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(self._counts)
+
+    def serve_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="fake-spotify", daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    faults = Faults(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate, args.retry_after)
+    server = FakeSpotifyServer((args.host, args.port), faults)
+    print(f"Fake Spotify listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
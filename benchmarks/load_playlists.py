@@ -0,0 +1,250 @@
+"""
+Load test of the playlist flow against a local fake Spotify.
+
+Each virtual user signs up (or logs in) through the HTML forms, swaps the session
+for a JWT at /api/token/session/, links Spotify through the callback endpoint and then
+runs the chosen scenario in a loop until the duration is over:
+
+    create  POST /api/playlists/ then GET /api/playlists/
+    browse  GET /api/playlists/ only
+    poll    POST /api/playlists/ then poll /status/ until the job is done
+
+By default the app runs in-process (threaded WSGI server on the configured database,
+Celery jobs eager) next to a benchmarks.fake_spotify server, and every response carries
+the number of DB queries its request made. With --base-url the scenario drives an
+already running server instead (which must itself point at a fake Spotify); query
+counts are then unavailable.
+
+    python -m benchmarks.load_playlists --users 20 --duration 30 --latency-ms 80
+    python -m benchmarks.load_playlists --scenario browse --output before.json
+
+Compare two saved reports with `python -m benchmarks.compare before.json after.json`.
+"""
+
+import argparse
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Callable
+
+import httpx
+
+from benchmarks.fake_spotify import Faults, FakeSpotifyServer
+from benchmarks.report import emit, percentiles
+
+QUERY_HEADER = "X-Bench-DB-Queries"
+
+
+class Recorder:
+    """Thread-safe store of per-step latencies, DB query counts and status codes."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def request(self, client: httpx.Client, step: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[step].append(elapsed)
+            self.statuses[step][response.status_code] += 1
+            if QUERY_HEADER in response.headers:
+                self.queries[step].append(int(response.headers[QUERY_HEADER]))
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        steps = {}
+        for step, samples in self.latencies.items():
+            queries = self.queries.get(step) or []
+            steps[step] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 2),
+                **percentiles(samples),
+                "status": {str(code): n for code, n in sorted(self.statuses[step].items())},
+                "db_queries_mean": round(sum(queries) / len(queries), 2) if queries else None,
+                "db_queries_max": max(queries) if queries else None,
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {"requests": total, "rps": round(total / elapsed, 2), "steps": steps}
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, base_url: str, email: str, scenario: str, deadline: float, recorder: Recorder):
+        super().__init__(daemon=True)
+        self.client = httpx.Client(base_url=base_url, timeout=60, follow_redirects=False)
+        self.email = email
+        self.scenario = scenario
+        self.deadline = deadline
+        self.recorder = recorder
+        self.error: Exception | None = None
+
+    def call(self, step: str, method: str, url: str, **kwargs) -> httpx.Response:
+        return self.recorder.request(self.client, step, method, url, **kwargs)
+
+    def form(self, step: str, path: str, data: dict) -> httpx.Response:
+        self.client.get(path)  # sets the csrftoken cookie
+        token = self.client.cookies.get("csrftoken", "")
+        return self.call(step, "POST", path, data={**data, "csrfmiddlewaretoken": token},
+                         headers={"X-CSRFToken": token, "Referer": str(self.client.base_url)})
+
+    def setup(self) -> None:
+        credentials = {"email": self.email, "password": "bench-pass-123"}
+        if self.form("signup", "/signup/", credentials).status_code != 201:
+            self.form("login", "/login/", credentials)
+        access = self.call("token_session", "GET", "/api/token/session/").json()["access"]
+        self.client.headers["Authorization"] = f"Bearer {access}"
+        self.call("spotify_callback", "GET", "/api/auth/spotify/callback/", params={"code": "bench"})
+
+    def create(self) -> int:
+        response = self.call("create", "POST", "/api/playlists/", json={
+            "name": "Bench mix", "mood_prompt": "calm lo-fi beats for a rainy evening",
+        })
+        return response.json().get("id") if response.is_success else None
+
+    def run(self) -> None:
+        try:
+            self.setup()
+            while time.monotonic() < self.deadline:
+                if self.scenario == "browse":
+                    self.call("list", "GET", "/api/playlists/")
+                elif self.scenario == "create":
+                    self.create()
+                    self.call("list", "GET", "/api/playlists/")
+                else:
+                    playlist_id = self.create()
+                    while playlist_id and time.monotonic() < self.deadline:
+                        state = self.call("status", "GET", f"/api/playlists/{playlist_id}/status/").json()
+                        if state["status"] in ("done", "failed"):
+                            break
+                        time.sleep(0.2)
+        except Exception as exc:  # reported in the summary, the other users keep going
+            self.error = exc
+        finally:
+            self.client.close()
+
+
+def start_app(fake_url: str) -> tuple[str, Callable]:
+    """Boot Django in-process on a threaded WSGI server; return its URL and a cleanup."""
+    os.environ.update({
+        "SPOTIFY_API_URL": f"{fake_url}/v1",
+        "SPOTIFY_ACCOUNTS_URL": fake_url,
+    })
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "software.settings")
+    os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "1")
+    os.environ.setdefault("SPOTIFY_CLIENT_ID", "bench-client")
+    os.environ.setdefault("SPOTIFY_CLIENT_SECRET", "bench-secret")
+    os.environ.setdefault("SPOTIFY_REDIRECT_URI", "http://127.0.0.1/callback/")
+
+    import django
+
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+    from django.db.backends.signals import connection_created
+
+    state = threading.local()
+
+    def count_queries(execute, sql, params, many, context):
+        state.queries = getattr(state, "queries", 0) + 1
+        return execute(sql, params, many, context)
+
+    def instrument(sender, connection, **kwargs):
+        # Fires on every reconnect of the same wrapper; install the counter only once.
+        if count_queries not in connection.execute_wrappers:
+            connection.execute_wrappers.append(count_queries)
+
+    connection_created.connect(instrument, weak=False)
+    django_app = get_wsgi_application()
+
+    def app(environ, start_response):
+        state.queries = 0
+
+        def counted_start_response(status, headers, exc_info=None):
+            headers.append((QUERY_HEADER, str(state.queries)))
+            return start_response(status, headers, exc_info)
+
+        return django_app(environ, counted_start_response)
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+    server.daemon_threads = True
+    server.set_app(app)
+    threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+
+    def cleanup(prefix: str | None) -> None:
+        server.shutdown()
+        if prefix:
+            User.objects.filter(username__startswith=prefix).delete()
+
+    return f"http://127.0.0.1:{server.server_address[1]}", cleanup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", choices=["create", "browse", "poll"], default="create")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load after setup.")
+    parser.add_argument("--base-url", help="Drive a running server instead of an in-process one.")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--keep-data", action="store_true", help="Keep the benchmark users.")
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    fake = None
+    cleanup = None
+    base_url = args.base_url
+    if base_url is None:
+        faults = Faults(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate)
+        fake = FakeSpotifyServer(faults=faults)
+        fake.serve_in_thread()
+        base_url, cleanup = start_app(fake.url)
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    recorder = Recorder()
+    started = time.monotonic()
+    users = [
+        VirtualUser(base_url, f"{prefix}{i}@example.com", args.scenario,
+                    started + args.duration, recorder)
+        for i in range(args.users)
+    ]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.monotonic() - started
+
+    report = {
+        "scenario": args.scenario,
+        "users": args.users,
+        "duration_s": round(elapsed, 2),
+        "fake_spotify": None if fake is None else {
+            "latency_ms": args.latency_ms,
+            "error_rate": args.error_rate,
+            "throttle_rate": args.throttle_rate,
+            "calls": fake.stats(),
+        },
+        **recorder.summary(elapsed),
+        "user_errors": [repr(user.error) for user in users if user.error],
+    }
+    if cleanup is not None:
+        cleanup(None if args.keep_data else prefix)
+    if fake is not None:
+        fake.shutdown()
+    emit(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
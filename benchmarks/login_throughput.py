@@ -0,0 +1,127 @@
+"""
+Benchmark of login throughput through the async login view and its hashing pool.
+
+Runs --clients concurrent clients posting to /login/ for --duration seconds with the
+real password hasher (PBKDF2 at Django's default work factor), each in its own thread
+with its own Django test client, so the whole view stack runs and only the network
+hop is skipped. Reports successful logins per second and per hashing core, latency
+percentiles, 503s from back-pressure and the pool counters. A baseline with the
+hash on the calling thread (`django.contrib.auth.authenticate`) is measured first.
+
+Needs a migrated database (DJANGO_SETTINGS_MODULE, default software.settings); the
+benchmark user is deleted at the end.
+
+    python -m benchmarks.login_throughput --clients 16 --duration 10 --workers 4
+"""
+
+import argparse
+import os
+import threading
+import time
+import uuid
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "software.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import authenticate  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from backend.utils.password_pool import password_pool  # noqa: E402
+from benchmarks.report import emit, percentiles  # noqa: E402
+
+PASSWORD = "bench-pass-123"
+
+
+def run_clients(clients: int, duration: float, attempt) -> dict:
+    """Call `attempt()` from `clients` threads until `duration` is over."""
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        state = {}
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            status = attempt(state)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    return {"elapsed": elapsed, "latencies": latencies, "statuses": statuses}
+
+
+def summarize(result: dict, ok_status, cores: int) -> dict:
+    ok = result["statuses"].get(ok_status, 0)
+    rps = ok / result["elapsed"]
+    return {
+        "attempts": len(result["latencies"]),
+        "logins": ok,
+        "logins_per_sec": round(rps, 2),
+        "logins_per_sec_per_core": round(rps / cores, 2),
+        **percentiles(result["latencies"]),
+        "status": {str(code): n for code, n in sorted(result["statuses"].items(), key=str)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=(os.cpu_count() or 1) * 2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, help="PASSWORD_HASH_WORKERS (default: one per CPU).")
+    parser.add_argument("--queue", type=int, help="PASSWORD_HASH_QUEUE.")
+    parser.add_argument("--skip-baseline", action="store_true")
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    if args.workers is not None:
+        settings.PASSWORD_HASH_WORKERS = args.workers
+    if args.queue is not None:
+        settings.PASSWORD_HASH_QUEUE = args.queue
+    cores = password_pool.workers
+
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    User.objects.create_user(username=email, email=email, password=PASSWORD)
+    try:
+        report = {
+            "clients": args.clients,
+            "cpus": os.cpu_count(),
+            "hasher": settings.PASSWORD_HASHERS[0],
+            "pool": {"workers": cores, "queue": settings.PASSWORD_HASH_QUEUE},
+        }
+
+        if not args.skip_baseline:
+            def inline(state):
+                return 200 if authenticate(username=email, password=PASSWORD) else 401
+
+            result = run_clients(args.clients, args.duration, inline)
+            report["inline_authenticate"] = summarize(result, 200, os.cpu_count() or 1)
+
+        def view(state):
+            client = state.setdefault("client", Client())
+            response = client.post("/login/", {"email": email, "password": PASSWORD})
+            client.cookies.clear()  # log in from scratch every time
+            return response.status_code
+
+        result = run_clients(args.clients, args.duration, view)
+        report["login_view"] = {**summarize(result, 302, cores), "pool_stats": password_pool.stats()}
+    finally:
+        User.objects.filter(username=email).delete()
+        password_pool.shutdown()
+
+    emit(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Page weight and first-render estimate of the login and playlists pages.
+
+Builds the asset bundles (frontend.assets), collects static files into a temporary
+STATIC_ROOT with the production storage (fingerprinting plus gzip/brotli/zstd), then
+renders each page through the Django test client twice: once loading the individual
+source files as before the pipeline, once loading the bundles. For every page and
+layout it reports the HTML size and server time, the same-origin CSS/JS requests with
+their transfer size per Content-Encoding, the render-blocking part of that, and the
+Cache-Control of the assets. First render is estimated from the critical path as
+server time + one round trip for the HTML + one per wave of up to six parallel
+blocking requests + the blocking bytes at the given bandwidth. Third-party files
+(CDN, fonts) are listed but not fetched. Needs a migrated database; the page user
+is created inside a transaction that is rolled back.
+
+    python -m benchmarks.page_weight --rtt-ms 100 --mbps 10
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+from html.parser import HTMLParser
+from unittest import mock
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "software.settings")
+os.environ["STATIC_MANIFEST"] = "1"
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import transaction  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+
+from benchmarks.report import emit, percentiles  # noqa: E402
+from frontend import assets  # noqa: E402
+
+PAGES = {"login": "/login/", "playlists": "/spotify-playlists/"}
+ENCODINGS = {"identity": "", "gzip": "gzip", "br": "br", "zstd": "zstd"}
+
+
+class AssetParser(HTMLParser):
+    """Collect stylesheets and scripts, noting which block the first render."""
+
+    def __init__(self):
+        super().__init__()
+        self.assets, self.in_head = [], False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "head":
+            self.in_head = True
+        elif tag == "body":
+            self.in_head = False
+        elif tag == "link" and attrs.get("rel") == "stylesheet":
+            self.assets.append({"url": attrs["href"], "kind": "css", "blocking": True})
+        elif tag == "script" and attrs.get("src"):
+            blocking = self.in_head and "defer" not in attrs and "async" not in attrs
+            self.assets.append({"url": attrs["src"], "kind": "js", "blocking": blocking})
+
+
+def fetch(client: Client, url: str, encoding: str):
+    response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+    body = b"".join(response.streaming_content) if response.streaming else response.content
+    return response, len(body)
+
+
+def measure_page(client: Client, path: str, repeat: int, rtt_ms: float, mbps: float) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, HTTP_ACCEPT_ENCODING="")
+        samples.append(time.perf_counter() - started)
+    assert response.status_code == 200, (path, response.status_code)
+    html = response.content
+
+    parser = AssetParser()
+    parser.feed(html.decode())
+    local = [a for a in parser.assets if a["url"].startswith("/")]
+    external = [a["url"] for a in parser.assets if not a["url"].startswith("/")]
+
+    transfer = {name: 0 for name in ENCODINGS}
+    blocking = {name: 0 for name in ENCODINGS}
+    cache_control = set()
+    for asset in local:
+        for name, header in ENCODINGS.items():
+            asset_response, size = fetch(client, asset["url"], header)
+            assert asset_response.status_code == 200, (asset["url"], asset_response.status_code)
+            transfer[name] += size
+            if asset["blocking"]:
+                blocking[name] += size
+        cache_control.add(asset_response.get("Cache-Control", ""))
+
+    html_ms = percentiles(samples)["p50_ms"]
+    blocking_requests = sum(a["blocking"] for a in local)
+    first_render = {
+        name: round(html_ms + rtt_ms * (1 + math.ceil(blocking_requests / 6)) + size * 8 / (mbps * 1000), 1)
+        for name, size in blocking.items()
+    }
+    return {
+        "html_bytes": len(html),
+        "html_server_ms": html_ms,
+        "requests": len(local),
+        "blocking_requests": blocking_requests,
+        "transfer_bytes": transfer,
+        "blocking_bytes": blocking,
+        "first_render_ms_estimate": first_render,
+        "asset_cache_control": sorted(cache_control),
+        "third_party": external,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=100.0, help="Round trip time of the modelled client.")
+    parser.add_argument("--mbps", type=float, default=10.0, help="Bandwidth of the modelled client.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as static_root, tempfile.TemporaryDirectory() as build_root:
+        static_dirs = [build_root, *settings.STATICFILES_DIRS]
+        with override_settings(STATIC_ROOT=static_root, STATICFILES_DIRS=static_dirs, DEBUG=False):
+            report = {"bundles": assets.build(build_root), "pages": {}}
+            call_command("collectstatic", interactive=False, verbosity=0)
+
+            with transaction.atomic():
+                user = User.objects.create_user(username="page-weight-benchmark@example.com")
+                for layout, built in (("sources", False), ("bundled", True)):
+                    with mock.patch("frontend.templatetags.assets.bundle_built",
+                                    lambda name, built=built: built):
+                        client = Client()
+                        for page, path in PAGES.items():
+                            if page != "login":
+                                client.force_login(user)
+                            report["pages"].setdefault(page, {})[layout] = measure_page(
+                                client, path, args.repeat, args.rtt_ms, args.mbps
+                            )
+                transaction.set_rollback(True)
+
+    report["model"] = {"rtt_ms": args.rtt_ms, "mbps": args.mbps}
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark of the streaming playlist export (backend.utils.export).
+
+Grows the playlist table through the given sizes and, at each size, streams the
+whole table as NDJSON, CSV and zstd-compressed NDJSON, reporting throughput, output
+size and peak Python memory (tracemalloc) of each. For comparison it also measures
+the in-memory path the export replaces: serializing every row with
+PlaylistSerializer(many=True) and dumping the list as one JSON document. Rows are
+inserted with generate_series inside a transaction that is rolled back at the end,
+so it can run against any migrated Postgres database.
+
+    python -m benchmarks.playlist_export --sizes 1000,100000,1000000
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "software.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from backend.api.serializers import PlaylistSerializer  # noqa: E402
+from backend.models import Playlist  # noqa: E402
+from backend.utils import export  # noqa: E402
+from benchmarks.report import emit  # noqa: E402
+
+INSERT = """
+    INSERT INTO backend_playlist
+        (user_id, name, description, mood_prompt, spotify_id, status, track_uris, snapshot_id,
+         created_at, updated_at)
+    SELECT %s, 'Mix ' || g, 'Generated for a calm evening', 'calm lo-fi', 'sp' || g, 'done',
+           array_fill('spotify:track:4uLU6hMCjMI75M1A2tKUQC'::varchar, ARRAY[30]), 'snap' || g,
+           now() - g * interval '1 second', now() - g * interval '1 second'
+    FROM generate_series(%s, %s) AS g
+"""
+
+
+def measure(produce) -> dict:
+    """Time `produce` (returns an iterable of bytes), then rerun it under tracemalloc for peak memory."""
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in produce())
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for _ in produce():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 3), "bytes": size, "peak_mb": round(peak / 2**20, 2)}
+
+
+def serialized_list(queryset):
+    yield json.dumps(PlaylistSerializer(queryset, many=True).data).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--skip-list", action="store_true",
+                        help="Skip the in-memory serializer comparison (slow on large tables).")
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    report = {"chunk_size": settings.EXPORT_CHUNK_SIZE, "results": []}
+    with transaction.atomic():
+        user = User.objects.create_user(username="export-benchmark@example.com")
+        inserted = 0
+        for size in sizes:
+            with connection.cursor() as cursor:
+                cursor.execute(INSERT, [user.pk, inserted + 1, size])
+            inserted = size
+
+            rows = export.playlists(user.pk)
+            result = {
+                "playlists": size,
+                "ndjson": measure(lambda: export.stream(rows, "ndjson")),
+                "csv": measure(lambda: export.stream(rows, "csv")),
+                "ndjson_zstd": measure(lambda: export.stream(rows, "ndjson", compress=True)),
+            }
+            for name in ("ndjson", "csv", "ndjson_zstd"):
+                result[name]["rows_per_s"] = round(size / result[name]["seconds"]) if result[name]["seconds"] else None
+            if not args.skip_list:
+                result["serializer_list"] = measure(
+                    lambda: serialized_list(Playlist.objects.filter(user=user).order_by("pk"))
+                )
+            report["results"].append(result)
+        transaction.set_rollback(True)
+
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
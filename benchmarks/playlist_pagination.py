@@ -0,0 +1,109 @@
+"""
+Benchmark of playlist listing with keyset pagination (backend.api.pagination).
+
+Grows one user's playlist history through the given sizes and, at each size, times
+the first page and a page ~90% deep through PlaylistCursorPagination, next to the
+OFFSET query the same deep page would need. Rows are inserted with generate_series
+inside a transaction that is rolled back at the end, so it can run against any
+migrated Postgres database (DJANGO_SETTINGS_MODULE, default software.settings).
+
+    python -m benchmarks.playlist_pagination --sizes 10,1000,100000,1000000
+"""
+
+import argparse
+import os
+import time
+from urllib.parse import urlsplit
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "software.settings")
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from rest_framework.pagination import Cursor  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+
+from backend.api.pagination import PlaylistCursorPagination  # noqa: E402
+from backend.models import Playlist  # noqa: E402
+from benchmarks.report import emit, percentiles  # noqa: E402
+
+INSERT = """
+    INSERT INTO backend_playlist
+        (user_id, name, description, mood_prompt, spotify_id, status, track_uris, snapshot_id,
+         created_at, updated_at)
+    SELECT %s, 'Mix ' || g, '', 'calm lo-fi', '', 'done', '{}', '',
+           now() - g * interval '1 second', now() - g * interval '1 second'
+    FROM generate_series(%s, %s) AS g
+"""
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def keyset_page(user, url: str) -> list:
+    request = Request(RequestFactory().get(url))
+    request.user = user
+    paginator = PlaylistCursorPagination()
+    return paginator.paginate_queryset(Playlist.objects.filter(user=user), request)
+
+
+def deep_cursor_url(user, depth: int) -> str:
+    """Return the list URL whose cursor points `depth` rows into the history."""
+    paginator = PlaylistCursorPagination()
+    request = Request(RequestFactory().get("/api/playlists/"))
+    paginator.paginate_queryset(Playlist.objects.filter(user=user), request)
+    position = (
+        Playlist.objects.filter(user=user)
+        .order_by("-created_at", "-id")
+        .values_list("created_at", flat=True)[depth]
+    )
+    url = urlsplit(paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(position))))
+    return f"{url.path}?{url.query}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10,1000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    page_size = PlaylistCursorPagination.page_size
+
+    report = {"page_size": page_size, "results": []}
+    with transaction.atomic():
+        user = User.objects.create_user(username="pagination-benchmark@example.com")
+        inserted = 0
+        for size in sizes:
+            with connection.cursor() as cursor:
+                cursor.execute(INSERT, [user.pk, inserted + 1, size])
+                cursor.execute("ANALYZE backend_playlist")
+            inserted = size
+
+            depth = max(0, int(size * 0.9) - page_size)
+            deep_url = deep_cursor_url(user, depth)
+            offset_qs = Playlist.objects.filter(user=user).order_by("-created_at", "-id")
+            report["results"].append({
+                "playlists": size,
+                "keyset_first_page": timed(lambda: keyset_page(user, "/api/playlists/"), args.repeat),
+                "keyset_deep_page": timed(lambda: keyset_page(user, deep_url), args.repeat),
+                "offset_deep_page": timed(
+                    lambda: list(offset_qs[depth : depth + page_size]), args.repeat
+                ),
+                "deep_page_depth": depth,
+            })
+        transaction.set_rollback(True)
+
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
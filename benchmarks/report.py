@@ -0,0 +1,34 @@
+"""Shared helpers for benchmark JSON reports."""
+
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+
+def percentiles(samples) -> dict:
+    """p50/p95/p99 of durations given in seconds, as milliseconds."""
+    if not len(samples):
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return {"p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3)}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def emit(report: dict, output: str | None = None) -> None:
+    """Print the report (tagged with the current commit) and optionally save it to `output`."""
+    report = {"commit": git_commit(), **report}
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as handle:
+            handle.write(text + "\n")
+    sys.stdout.write(text + "\n")
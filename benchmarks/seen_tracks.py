@@ -0,0 +1,78 @@
+"""
+Benchmark of the per-user seen-track Bloom filter (backend.utils.bloom).
+
+For each capacity and target false-positive rate, fills a filter to capacity with
+random track URIs and reports the stored size per user next to an exact Python set
+of the same URIs, the measured false-positive rate against unseen URIs, and the
+time per add and per membership test. Needs no database.
+
+    python -m benchmarks.seen_tracks --capacities 500,2000,10000 --fp-rates 0.01,0.001
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+
+from backend.utils.bloom import BloomFilter
+from benchmarks.report import emit
+
+
+def random_uri(rng: random.Random) -> str:
+    return "spotify:track:" + "".join(rng.choices(string.ascii_letters + string.digits, k=22))
+
+
+def set_bytes(items: set) -> int:
+    """Approximate memory of an exact set of strings (container plus the strings)."""
+    return sys.getsizeof(items) + sum(sys.getsizeof(item) for item in items)
+
+
+def measure(capacity: int, fp_rate: float, probes: int, rng: random.Random) -> dict:
+    bloom = BloomFilter.for_capacity(capacity, fp_rate)
+    seen = {random_uri(rng) for _ in range(capacity)}
+    unseen = [random_uri(rng) for _ in range(probes)]
+
+    started = time.perf_counter()
+    bloom.update(seen)
+    add_us = (time.perf_counter() - started) / capacity * 1e6
+
+    started = time.perf_counter()
+    false_positives = sum(uri in bloom for uri in unseen)
+    contains_us = (time.perf_counter() - started) / probes * 1e6
+
+    return {
+        "capacity": capacity,
+        "target_fp_rate": fp_rate,
+        "bits": bloom.bits,
+        "hashes": bloom.hashes,
+        "bytes_per_user": len(bloom.to_bytes()),
+        "exact_set_bytes": set_bytes(seen),
+        "measured_fp_rate": round(false_positives / probes, 5),
+        "fill_ratio": round(bloom.fill_ratio(), 3),
+        "false_negatives": sum(uri not in bloom for uri in seen),
+        "add_us": round(add_us, 3),
+        "contains_us": round(contains_us, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--capacities", default="500,2000,10000")
+    parser.add_argument("--fp-rates", default="0.01,0.001")
+    parser.add_argument("--probes", type=int, default=100_000, help="Unseen URIs tested per filter.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = [
+        measure(int(capacity), float(fp_rate), args.probes, rng)
+        for capacity in args.capacities.split(",")
+        for fp_rate in args.fp_rates.split(",")
+    ]
+    emit({"probes": args.probes, "filters": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
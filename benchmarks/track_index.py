@@ -0,0 +1,98 @@
+"""
+Benchmark of the NumPy track embedding index (backend.utils.track_index).
+
+Builds an index over synthetic track titles, saves it, memory-maps it back and
+measures single-prompt and batched top-k query latency plus resident memory.
+
+    python -m benchmarks.track_index --tracks 1000000
+"""
+
+import argparse
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from backend.utils.track_index import TrackIndex
+from benchmarks.report import emit, percentiles
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def synthetic_texts(rng, vocabulary, count):
+    lengths = rng.integers(3, 7, size=count)
+    words = rng.integers(0, len(vocabulary), size=lengths.sum())
+    texts, offset = [], 0
+    for length in lengths:
+        texts.append(" ".join(vocabulary[w] for w in words[offset : offset + length]))
+        offset += length
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vocabulary = [f"w{i}" for i in range(20000)]
+    report = {"tracks": args.tracks, "dim": args.dim, "k": args.k, "rss_start_mb": round(rss_mb(), 1)}
+
+    index = TrackIndex(dim=args.dim)
+    started = time.perf_counter()
+    for start in range(0, args.tracks, 100_000):
+        count = min(100_000, args.tracks - start)
+        index.add(
+            [f"spotify:track:{i}" for i in range(start, start + count)],
+            synthetic_texts(rng, vocabulary, count),
+        )
+    report["build_s"] = round(time.perf_counter() - started, 2)
+    report["matrix_mb"] = round(index.vectors.nbytes / 2**20, 1)
+
+    prompts = synthetic_texts(rng, vocabulary, args.queries)
+    with tempfile.TemporaryDirectory() as path:
+        index.save(path)
+        del index
+
+        started = time.perf_counter()
+        loaded = TrackIndex.load(path, mmap=True)
+        report["load_s"] = round(time.perf_counter() - started, 3)
+        report["rss_after_load_mb"] = round(rss_mb(), 1)
+
+        samples = []
+        for prompt in prompts:
+            started = time.perf_counter()
+            loaded.query([prompt], args.k)
+            samples.append(time.perf_counter() - started)
+        report["single_query"] = percentiles(samples)
+
+        samples = []
+        for start in range(0, len(prompts), args.batch):
+            batch = prompts[start : start + args.batch]
+            started = time.perf_counter()
+            loaded.query(batch, args.k)
+            samples.append((time.perf_counter() - started) / len(batch))
+        report["batched_query_per_prompt"] = percentiles(samples)
+        report["rss_after_queries_mb"] = round(rss_mb(), 1)
+
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Static asset pipeline: bundling, Bootstrap purging, minification and precompression.
+
+`manage.py build_assets` writes the bundles listed in BUNDLES to static/dist/,
+which `collectstatic` then fingerprints and compresses to gzip,
+brotli (when the Brotli package is installed) and zstd through
+CompressedManifestStorage. StaticFilesMiddleware serves the best variant the
+browser accepts, with immutable far-future cache headers on fingerprinted names.
+Templates load the bundles through the tags in `frontend.templatetags.assets`,
+which fall back to the source files while no bundle has been built.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+from wsgiref.headers import Headers
+
+import zstandard
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.compress import Compressor
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import MissingFileError, StaticFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+# Bundle name (relative to the static root) -> source files, in load order.
+BUNDLES: Dict[str, List[str]] = {
+    "dist/app.css": ["assets/bootstrap/css/bootstrap.min.css", "assets/css/bss-overrides.css"],
+    "dist/app.js": ["assets/js/startup-modern.js"],
+}
+# Only Bootstrap itself is purged; the project's own CSS is kept whole.
+PURGED = {"assets/bootstrap/css/bootstrap.min.css"}
+
+# Classes Bootstrap's JS (modal, collapse) adds at runtime; they never appear in templates.
+SAFELIST = [
+    "active", "disabled", "show", "showing", "hiding", "fade",
+    "collapse", "collapsing", "collapsed", "collapse-horizontal", "modal*", "was-validated",
+]
+
+CLASS_RE = re.compile(r"\.(-?[_a-zA-Z][_a-zA-Z0-9-]*)")
+TOKEN_RE = re.compile(r"[A-Za-z0-9_-]+")
+# At-rules whose body holds style rules that can be purged one by one.
+NESTED_AT_RULES = ("@media", "@supports", "@container", "@layer")
+
+
+def content_paths() -> List[Path]:
+    """Templates and scripts whose words decide which Bootstrap classes are kept."""
+    paths = []
+    for pattern in settings.ASSET_CONTENT_GLOBS:
+        paths.extend(sorted(Path(settings.BASE_DIR).glob(pattern)))
+    return paths
+
+
+def used_tokens(paths: Iterable[Path]) -> Set[str]:
+    tokens = set()
+    for path in paths:
+        tokens.update(TOKEN_RE.findall(path.read_text(encoding="utf-8")))
+    return tokens
+
+
+def _skip_string(css: str, i: int) -> int:
+    quote, i = css[i], i + 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == "\\" else 1
+    return i + 1
+
+
+def parse_blocks(css: str) -> List[Tuple[str, str | None]]:
+    """
+    Split a stylesheet into top-level statements.
+
+    Returns (prelude, body) pairs, where body is the text between the outer braces,
+    or None for statements ending in ";" such as @charset or @import. Comments between
+    statements are dropped (see `legal_comments` for the ones a bundle must keep).
+    """
+    blocks, start, depth, body_start, i = [], 0, 0, 0, 0
+    while i < len(css):
+        char = css[i]
+        if char in "\"'":
+            i = _skip_string(css, i)
+            continue
+        if css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            between_statements = depth == 0 and not css[start:i].strip()
+            i = len(css) if end == -1 else end + 2
+            if between_statements:
+                start = i  # not part of the next statement's prelude
+            continue
+        if char == "{":
+            if depth == 0:
+                body_start = i + 1
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                blocks.append((css[start:body_start - 1].strip(), css[body_start:i]))
+                start = i + 1
+        elif char == ";" and depth == 0:
+            blocks.append((css[start:i].strip(), None))
+            start = i + 1
+        i += 1
+    return [(prelude, body) for prelude, body in blocks if prelude or body]
+
+
+def split_selectors(prelude: str) -> List[str]:
+    """Split a selector list on top-level commas (not those inside :is(...) and the like)."""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(prelude[start:i].strip())
+            start = i + 1
+    parts.append(prelude[start:].strip())
+    return [part for part in parts if part]
+
+
+def purge(css: str, used: Set[str], safelist: Iterable[str] = SAFELIST) -> str:
+    """
+    Drop the selectors of `css` naming a class that is neither in `used` nor safelisted.
+
+    Rules left without selectors, and at-rule blocks left empty, are removed. Rules
+    without class selectors (element styles, :root variables) and other at-rules
+    (@font-face, @keyframes) are kept.
+    """
+    patterns = list(safelist)
+    cache: Dict[str, bool] = {}
+
+    def keep_class(name: str) -> bool:
+        if name not in cache:
+            cache[name] = name in used or any(fnmatch.fnmatchcase(name, p) for p in patterns)
+        return cache[name]
+
+    out = []
+    for prelude, body in parse_blocks(css):
+        if body is None:
+            out.append(prelude + ";")
+        elif prelude.startswith(NESTED_AT_RULES):
+            inner = purge(body, used, patterns)
+            if inner:
+                out.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            out.append(f"{prelude}{{{body}}}")
+        else:
+            kept = [s for s in split_selectors(prelude) if all(map(keep_class, CLASS_RE.findall(s)))]
+            if kept:
+                out.append(f"{','.join(kept)}{{{body}}}")
+    return "".join(out)
+
+
+def strip_imports(css: str) -> Tuple[str, List[str]]:
+    """
+    Remove top-level @import rules from `css`; returns the stylesheet and the removed rules.
+
+    An @import is only valid at the top of a file, so it cannot survive concatenation,
+    and it would load serially after the bundle anyway: link the URL from the page.
+    """
+    kept, imports = [], []
+    for prelude, body in parse_blocks(css):
+        if body is None and prelude.startswith("@import"):
+            imports.append(prelude)
+        else:
+            kept.append(prelude + ";" if body is None else f"{prelude}{{{body}}}")
+    return "".join(kept), imports
+
+
+def legal_comments(css: str) -> List[str]:
+    """The `/*! ... */` comments of `css`: licence notices, which every bundle must carry."""
+    return re.findall(r"/\*!.*?\*/", css, flags=re.S)
+
+
+def minify_css(css: str) -> str:
+    """Remove comments, except `/*!` licence notices, and the whitespace the CSS grammar does not need."""
+    css = re.sub(r"/\*(?!!).*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_js(js: str) -> str:
+    """
+    Strip indentation and blank lines from a script.
+
+    Comments are kept: telling a "//" comment from one inside a string, template
+    literal or regex needs a JavaScript tokenizer, and the bundle is served compressed
+    anyway. Scripts with template literals are returned as written (their line breaks
+    and indentation belong to the string), as is any line continuing a string that
+    ended in a backslash.
+    """
+    if "`" in js:
+        return js if js.endswith("\n") else js + "\n"
+    lines, continued = [], False
+    for line in js.splitlines():
+        if not continued:
+            line = line.strip()
+        continued = line.endswith("\\")
+        if line:
+            lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def source_path(name: str) -> Path:
+    for directory in settings.STATICFILES_DIRS:
+        path = Path(directory) / name
+        if path.exists():
+            return path
+    raise FileNotFoundError(name)
+
+
+def output_root() -> Path:
+    """The static directory bundles are written to (the first of STATICFILES_DIRS)."""
+    return Path(settings.STATICFILES_DIRS[0])
+
+
+def build(out_dir: Path | None = None) -> Dict[str, Dict]:
+    """
+    Write every bundle of BUNDLES.
+
+    Returns:
+        Dict[str, Dict]: Per bundle, the source and output sizes in bytes and the
+        @import rules dropped from its stylesheets (see `strip_imports`).
+
+    Args:
+        out_dir (Path | None): Static root to write `dist/...` into (default: `output_root()`).
+    """
+    out_dir = Path(out_dir or output_root())
+    used = used_tokens(content_paths())
+    report = {}
+    for bundle, sources in BUNDLES.items():
+        parts, source_bytes, dropped = [], 0, []
+        for name in sources:
+            text = source_path(name).read_text(encoding="utf-8")
+            source_bytes += len(text.encode())
+            if bundle.endswith(".css"):
+                notices = "\n".join(legal_comments(text))
+                text, imports = strip_imports(text)
+                dropped.extend(imports)
+                # Purging drops comments; the licence notices go back on top of the part.
+                parts.append(notices + minify_css(purge(text, used) if name in PURGED else text))
+            else:
+                parts.append(minify_js(text))
+        data = ("\n" if bundle.endswith(".css") else ";\n").join(parts).encode()
+        target = out_dir / bundle
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        report[bundle] = {"source_bytes": source_bytes, "bytes": len(data), "dropped_imports": dropped}
+    return report
+
+
+def bundle_built(name: str) -> bool:
+    return (output_root() / name).exists()
+
+
+class ZstdCompressor(Compressor):
+    """WhiteNoise's gzip/brotli compressor, plus a `.zst` variant of every file."""
+
+    def compress(self, path):
+        filenames = super().compress(path)
+        with open(path, "rb") as handle:
+            stat_result = os.fstat(handle.fileno())
+            data = handle.read()
+        compressed = zstandard.ZstdCompressor(level=19).compress(data)
+        if self.is_compressed_effectively("Zstandard", path, len(data), compressed):
+            filenames.append(self.write_data(path, compressed, ".zst", stat_result))
+        return filenames
+
+
+class CompressedManifestStorage(CompressedManifestStaticFilesStorage):
+    """Fingerprinted static files with gzip, brotli and zstd variants (see ZstdCompressor)."""
+
+    def create_compressor(self, **kwargs):
+        return ZstdCompressor(**kwargs)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also serves the `.zst` variants as `Content-Encoding: zstd`.
+
+    Each request gets the smallest variant its Accept-Encoding allows. Fingerprinted
+    files (names from the staticfiles manifest) are sent with
+    `Cache-Control: max-age=<10 years>, public, immutable`.
+
+    Unlike WhiteNoise's own middleware it is async-capable, so under ASGI it does
+    not force the middleware above it (and the request) onto a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+    @staticmethod
+    def is_compressed_variant(path, stat_cache=None):
+        if path.endswith(".zst"):
+            original = path[:-4]
+            return original in stat_cache if stat_cache is not None else os.path.isfile(original)
+        return WhiteNoiseMiddleware.is_compressed_variant(path, stat_cache)
+
+    def get_static_file(self, path, url, stat_cache=None):
+        if stat_cache is None and not os.path.exists(path):
+            raise MissingFileError(path)
+        headers = Headers([])
+        self.add_mime_headers(headers, path, url)
+        self.add_cache_headers(headers, path, url)
+        if self.allow_all_origins:
+            headers["Access-Control-Allow-Origin"] = "*"
+        if self.add_headers_function is not None:
+            self.add_headers_function(headers, path, url)
+        return StaticFile(
+            path,
+            headers.items(),
+            stat_cache=stat_cache,
+            encodings={"gzip": path + ".gz", "br": path + ".br", "zstd": path + ".zst"},
+        )
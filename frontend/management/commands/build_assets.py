@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from frontend import assets
+
+
+class Command(BaseCommand):
+    """
+    Builds the CSS/JS bundles of frontend.assets.BUNDLES into static/dist/.
+
+    Bootstrap is purged of the classes no template or script uses, everything is
+    minified and concatenated into one file per bundle. Run it before collectstatic,
+    which fingerprints the bundles and precompresses them (gzip, brotli, zstd).
+
+    Usage:
+        python manage.py build_assets && python manage.py collectstatic --noinput
+    """
+
+    help = "Bundle, purge and minify the frontend CSS/JS into static/dist/."
+
+    def handle(self, *args, **options):
+        for bundle, sizes in assets.build().items():
+            self.stdout.write(
+                f"{bundle}: {sizes['source_bytes'] // 1024} KiB -> {sizes['bytes'] // 1024} KiB"
+            )
+            for rule in sizes["dropped_imports"]:
+                self.stderr.write(self.style.WARNING(f"  dropped {rule} (link it from the page instead)"))
+        self.stdout.write(self.style.SUCCESS("Assets built."))
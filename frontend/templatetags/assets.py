@@ -0,0 +1,34 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from frontend.assets import BUNDLES, bundle_built
+
+register = template.Library()
+
+
+def _files(bundle: str):
+    """The built bundle, or its source files while `manage.py build_assets` has not run."""
+    return [bundle] if bundle_built(bundle) else BUNDLES[bundle]
+
+
+@register.simple_tag
+def asset_bundle(bundle: str):
+    """
+    Render the <link> or <script> tags of a bundle from frontend.assets.BUNDLES.
+
+    Usage:
+        {% asset_bundle "dist/app.css" %}
+    """
+    if bundle.endswith(".css"):
+        return format_html_join("\n", '<link rel="stylesheet" href="{}">', ((static(f),) for f in _files(bundle)))
+    return format_html_join("\n", '<script src="{}"></script>', ((static(f),) for f in _files(bundle)))
+
+
+@register.simple_tag
+def asset_preload(bundle: str):
+    """Render <link rel="preload"> hints so a bundle loaded late in the page is fetched early."""
+    kind = "style" if bundle.endswith(".css") else "script"
+    return format_html_join(
+        "\n", '<link rel="preload" href="{}" as="{}">', ((static(f), kind) for f in _files(bundle))
+    )
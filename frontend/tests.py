@@ -1,3 +1,176 @@
-from django.test import TestCase
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import zstandard
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils.module_loading import import_string
+
+from backend.models import Playlist
+from backend.tests import make_user
+from backend.utils.page_cache import FragmentCache, playlist_page_cache
+from backend.utils.password_pool import password_pool
+from frontend import assets
+
+
+class PlaylistPageCacheTests(TestCase):
+    def setUp(self):
+        caches["pages"].clear()
+        playlist_page_cache.reset_stats()
+        self.user = make_user()
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.playlist = Playlist.objects.create(user=self.user, name="Rainy Day", mood_prompt="calm")
+
+    def test_second_view_skips_rendering(self):
+        first = self.client.get("/spotify-playlists/")
+        with mock.patch("frontend.views.render_to_string") as render_table:
+            second = self.client.get("/spotify-playlists/")
+
+        render_table.assert_not_called()
+        self.assertEqual(first.context["playlist_table"], second.context["playlist_table"])
+        stats = playlist_page_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertIsNotNone(stats["render_p95_ms"])
+
+    def test_save_and_delete_invalidate(self):
+        self.assertContains(self.client.get("/spotify-playlists/"), "Rainy Day")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.playlist.name = "Sunny Day"
+            self.playlist.save()
+        self.assertContains(self.client.get("/spotify-playlists/"), "Sunny Day")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.playlist.delete()
+        self.assertContains(self.client.get("/spotify-playlists/"), "No playlists found")
+        self.assertEqual(playlist_page_cache.stats()["misses"], 3)
+
+    def test_invalidation_from_another_process_reaches_the_web_side(self):
+        self.assertContains(self.client.get("/spotify-playlists/"), "Rainy Day")
+
+        # A worker reaches the same cache through its own connection.
+        with override_settings(CACHES={**settings.CACHES, "worker-pages": settings.CACHES["pages"]}):
+            Playlist.objects.filter(pk=self.playlist.pk).update(name="Sunny Day")
+            FragmentCache("playlists", alias="worker-pages").invalidate(self.user.pk)
+
+            self.assertContains(self.client.get("/spotify-playlists/"), "Sunny Day")
+
+    def test_other_users_keep_their_cache(self):
+        other = make_user("other@example.com")
+        version = playlist_page_cache.version(other.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Playlist.objects.create(user=self.user, name="Mine", mood_prompt="calm")
+
+        self.assertEqual(playlist_page_cache.version(other.pk), version)
+
+
+class PasswordLoginTests(TestCase):
+    def test_signup_hashes_once_and_logs_in(self):
+        with mock.patch("backend.utils.password_pool.make_password", wraps=make_password) as hashed:
+            response = self.client.post("/signup/", {"email": "New@Example.com", "password": "secret-pass-123"})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(hashed.call_count, 1)
+        user = User.objects.get(username="new@example.com")
+        self.assertTrue(user.check_password("secret-pass-123"))
+        self.assertEqual(self.client.get("/api/token/session/").status_code, 200)
+
+    def test_login_checks_password_on_the_pool(self):
+        make_user()
+        response = self.client.post("/login/", {"email": "listener@example.com", "password": "wrong"})
+        self.assertContains(response, "Invalid email or password.")
+
+        response = self.client.post("/login/", {"email": "listener@example.com", "password": "secret-pass-123"})
+        self.assertRedirects(response, "/home/", fetch_redirect_response=False)
+        self.assertEqual(self.client.get("/api/token/session/").status_code, 200)
+
+    def test_full_pool_returns_503(self):
+        make_user()
+        with mock.patch.object(password_pool, "_in_flight", password_pool.capacity):
+            login = self.client.post("/login/", {"email": "listener@example.com", "password": "secret-pass-123"})
+            signup = self.client.post("/signup/", {"email": "other@example.com", "password": "secret-pass-123"})
+
+        self.assertEqual((login.status_code, login["Retry-After"]), (503, "1"))
+        self.assertEqual(signup.status_code, 503)
+        self.assertFalse(User.objects.filter(username="other@example.com").exists())
+        self.assertGreaterEqual(password_pool.stats()["rejected"], 2)
+
+
+class StaticAssetTests(TestCase):
+    def test_purge_keeps_used_and_safelisted_classes(self):
+        css = (".btn{a:1}.btn-unused{b:2}.used,.gone{c:3}.modal-open{d:4}body{e:5}"
+               "@media (min-width:1px){.gone{f:6}}@font-face{font-family:x}")
+
+        purged = assets.purge(css, {"btn", "used"})
+
+        self.assertEqual(purged, ".btn{a:1}.used{c:3}.modal-open{d:4}body{e:5}@font-face{font-family:x}")
+
+    def test_minify_js_keeps_urls_and_template_literals(self):
+        js = (
+            "const re = /https?:\\/\\//; // scheme\n"
+            "    const home = 'https://open.spotify.com';\n\n"
+        )
+        template = "const link = `https://open.spotify.com/x`;\nconst html = `\n    <b>${link}</b>`;\n"
+
+        self.assertEqual(
+            assets.minify_js(js),
+            "const re = /https?:\\/\\//; // scheme\nconst home = 'https://open.spotify.com';\n",
+        )
+        self.assertEqual(assets.minify_js(template), template)
+
+    def test_minify_css_keeps_licence_notices(self):
+        self.assertEqual(assets.minify_css("/*! MIT */\na { color: red; } /* note */"), "/*! MIT */ a{color: red}")
+
+    def test_unterminated_comment_ends_the_stylesheet(self):
+        self.assertEqual(assets.parse_blocks("a{b:1}/* never closed"), [("a", "b:1")])
+
+    def test_bundle_tag_falls_back_to_sources(self):
+        with tempfile.TemporaryDirectory() as root, \
+                override_settings(STATICFILES_DIRS=[root, *settings.STATICFILES_DIRS]):
+            self.assertNotIn("dist/app.css", self.client.get("/login/").content.decode())
+
+            report = assets.build()
+            html = self.client.get("/login/").content.decode()
+
+            bundle = (Path(root) / "dist/app.css").read_text()
+
+        self.assertLess(report["dist/app.css"]["bytes"], report["dist/app.css"]["source_bytes"])
+        self.assertIn("Licensed under MIT", bundle)
+        self.assertIn(":root,[data-bs-theme=light]{", bundle)
+        self.assertIn("dist/app.css", html)
+        self.assertNotIn("bootstrap/css/bootstrap.min.css", html)
+
+    def test_serves_zstd_variant_with_immutable_cache(self):
+        css = ".btn{color:red}" * 200
+        with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(source, "app.css"), "w") as handle:
+                handle.write(css)
+            storages = {**settings.STORAGES, "staticfiles": {"BACKEND": "frontend.assets.CompressedManifestStorage"}}
+            with override_settings(STATICFILES_DIRS=[source], STATIC_ROOT=root, STORAGES=storages,
+                                   STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"]):
+                call_command("collectstatic", interactive=False, verbosity=0)
+                url = static("app.css")
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, br, zstd")
+                body = b"".join(response.streaming_content)
+                served = async_to_sync(AsyncClient().get)(url, headers={"Accept-Encoding": "zstd"})
+
+        self.assertRegex(url, rf"^{settings.STATIC_URL}app\.[0-9a-f]{{12}}\.css$")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(zstandard.ZstdDecompressor().decompress(body).decode(), css)
+        self.assertEqual(served["Content-Encoding"], "zstd")
+
+    def test_middleware_stays_async_capable(self):
+        # One sync-only middleware would run every ASGI request on a thread.
+        for path in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(path), "async_capable", False), path)
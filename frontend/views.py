@@ -1,14 +1,26 @@
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.http import JsonResponse
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import alogin
 from django.views.decorators.csrf import csrf_protect
 from django.shortcuts import redirect
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
-from django.db import transaction, IntegrityError
+from django.db import IntegrityError
 from django.contrib.auth.models import User
 
+from datetime import timedelta
+
+from rest_framework.request import Request
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.api.pagination import PlaylistCursorPagination
 from backend.models import Playlist
+from backend.utils.page_cache import playlist_page_cache
+from backend.utils.password_pool import PoolSaturated, ahash_password, averify_password
+
+AUTH_BACKEND = "backend.authentication.CachedModelBackend"
+BUSY_MESSAGE = "The server is busy, please try again in a moment."
 
 @login_required
 def index_view(request):
@@ -24,8 +36,42 @@ def index_view(request):
     return render(request, "index.html")
 
 
+async def aauthenticate_password(email, password):
+    """
+    Async counterpart of `authenticate` for the email/password login.
+
+    Applies the same rules as ModelBackend (unknown users still pay for one hash, inactive
+    users are refused, outdated hashes are upgraded) but runs every hash on
+    `password_pool` instead of the request thread.
+
+    Args:
+        email (str): The normalized email, which is also the username.
+        password (str): The raw password.
+
+    Returns:
+        User | None: The authenticated user, ready for `alogin`, or None.
+
+    Raises:
+        PoolSaturated: The hashing pool is full.
+    """
+    user = await User.objects.filter(username=email).afirst()
+    if user is None:
+        await ahash_password(password)
+        return None
+
+    is_correct, must_update = await averify_password(password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+    if must_update:
+        user.password = await ahash_password(password)
+        await user.asave(update_fields=["password"])
+
+    user.backend = AUTH_BACKEND
+    return user
+
+
 @csrf_protect
-def login_view(request):
+async def login_view(request):
     """
     Handles the login view for the application.
 
@@ -36,6 +82,10 @@ def login_view(request):
     If authentication fails, it re-renders the login page with an error message.
     For GET requests, it renders the login page.
 
+    The view is async and checks the password on the bounded `password_pool`, so a
+    burst of logins cannot tie up the request workers. When the pool is full the
+    login page is returned with status 503 and a Retry-After header.
+
     Args:
         request (HttpRequest): The HTTP request object.
 
@@ -43,6 +93,7 @@ def login_view(request):
         HttpResponse: Redirects to the home page if the user is authenticated or after a successful login.
         HttpResponse: Renders the login page, potentially with an error message.
     """
+    request.user = await request.auser()
     if request.user.is_authenticated:
         return redirect("home")
 
@@ -53,10 +104,15 @@ def login_view(request):
         if not email or not password:
             return render(request, "login.html", {"error": "Please enter both email and password."})
 
-        user = authenticate(request, username=email, password=password)
+        try:
+            user = await aauthenticate_password(email, password)
+        except PoolSaturated:
+            response = render(request, "login.html", {"error": BUSY_MESSAGE}, status=503)
+            response["Retry-After"] = "1"
+            return response
 
         if user is not None:
-            login(request, user)
+            await alogin(request, user)
             return redirect("home")
         else:
             return render(request, "login.html", {"error": "Invalid email or password."})
@@ -94,10 +150,16 @@ def spotify_playlists(request):
     """
     Renders a page displaying Spotify playlists for the logged-in user.
 
-    This view fetches all `Playlist` objects associated with the currently
-    authenticated user, orders them by their creation date in descending
-    order, and then renders the `spotify_playlists.html` template,
-    passing the playlists as context.
+    This view fetches one page of `Playlist` objects associated with the
+    currently authenticated user, newest first, and then renders the
+    `spotify_playlists.html` template, passing the playlists and the
+    `next_url`/`previous_url` links as context. Pages use the same keyset
+    cursor (`?cursor=`) as the API, so deep pages stay as cheap as the first.
+
+    The rendered table is cached per user and page URL in `playlist_page_cache`;
+    any change to the user's playlists invalidates it (see backend.signals).
+    The page also embeds a fresh API access token, so its scripts do not have
+    to fetch one from /api/token/session/.
 
     Args:
         request: The HttpRequest object.
@@ -107,8 +169,27 @@ def spotify_playlists(request):
                     `spotify_playlists.html` template with the user's
                     playlists.
     """
-    playlists = Playlist.objects.filter(user=request.user).order_by("-created_at")
-    return render(request, "spotify_playlists.html", {"playlists": playlists})
+    def render_table():
+        paginator = PlaylistCursorPagination()
+        playlists = paginator.paginate_queryset(
+            Playlist.objects.filter(user=request.user), Request(request)
+        )
+        return render_to_string("components/playlist_table.html", {
+            "playlists": playlists,
+            "next_url": paginator.get_next_link(),
+            "previous_url": paginator.get_previous_link(),
+        }, request=request)
+
+    table = playlist_page_cache.get_or_render(
+        request.user.pk, request.build_absolute_uri(), render_table
+    )
+    # Same token as /api/token/session/, minted here to save the page a round trip.
+    token = AccessToken.for_user(request.user)
+    token.set_exp(lifetime=timedelta(hours=2))
+    return render(request, "spotify_playlists.html", {
+        "playlist_table": table,
+        "access_token": str(token),
+    })
 
 
 @login_required
@@ -120,8 +201,7 @@ def settings_view(request):
 
 
 @csrf_protect
-@transaction.atomic
-def signup_view(request):
+async def signup_view(request):
     """
     Handles user registration.
 
@@ -130,12 +210,13 @@ def signup_view(request):
     For POST requests:
         - Retrieves and validates 'email' and 'password' from the request.
         - If validation fails, returns a 400 JSON response with an error message.
-        - Attempts to create a new user with the provided credentials.
-        - If user creation is successful:
-            - Authenticates and logs in the new user.
-            - Returns a 201 JSON response with a success message.
+        - Hashes the password once on the bounded `password_pool` and creates the user
+          with that hash; the new user is logged in directly, without hashing the
+          password a second time through `authenticate`.
+        - If user creation is successful, returns a 201 JSON response with a success message.
         - If a user with the given email already exists (IntegrityError),
         returns a 409 JSON response with an error message.
+        - If the hashing pool is full, returns a 503 JSON response with a Retry-After header.
         - For any other exception during user creation, returns a 500 JSON
         response with the exception message.
 
@@ -144,8 +225,8 @@ def signup_view(request):
 
     Decorators:
         - @csrf_protect: Ensures CSRF protection for the view.
-        - @transaction.atomic: Wraps the user creation process in a database transaction.
     """
+    request.user = await request.auser()
     if request.user.is_authenticated:
         return redirect("home")
 
@@ -157,12 +238,18 @@ def signup_view(request):
             return JsonResponse({"error": "Email and password are required."}, status=400)
 
         try:
-            user = User.objects.create_user(
-                username=email, email=email, password=password, is_active=True
-            )
+            encoded = await ahash_password(password)
+        except PoolSaturated:
+            response = JsonResponse({"error": BUSY_MESSAGE}, status=503)
+            response["Retry-After"] = "1"
+            return response
 
-            user = authenticate(request, username=email, password=password)
-            login(request, user)
+        try:
+            user = await User.objects.acreate(
+                username=email, email=User.objects.normalize_email(email), password=encoded, is_active=True
+            )
+            user.backend = AUTH_BACKEND
+            await alogin(request, user)
 
             return JsonResponse({"message": "User created successfully."}, status=201)
 
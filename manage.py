@@ -7,6 +7,9 @@ import sys
 def main():
     """Run administrative tasks."""
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'software.settings')
+    if sys.argv[1:2] == ['test']:
+        # Run queued jobs in-process, so the suite needs no broker, Redis or worker.
+        os.environ.setdefault('CELERY_TASK_ALWAYS_EAGER', '1')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
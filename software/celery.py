@@ -0,0 +1,29 @@
+"""
+Celery application for the software project.
+
+Workers are started with ``celery -A software worker``. Configuration is read
+from Django settings using the ``CELERY_`` prefix, and tasks are discovered
+from the ``tasks.py`` module of every installed app. With
+PROMETHEUS_MULTIPROC_DIR set, the metrics of the worker processes are served
+by the web process's /metrics.
+"""
+
+import os
+
+from celery import Celery
+from celery.signals import worker_process_shutdown
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "software.settings")
+
+app = Celery("software")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
+
+
+@worker_process_shutdown.connect
+def drop_live_metrics(pid=None, **kwargs):
+    """Stop counting an exited pool process in the live gauges (in-flight Spotify calls)."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid or os.getpid())
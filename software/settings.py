@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 import os
 from pathlib import Path
+from urllib.parse import urlsplit
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -46,22 +48,266 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "backend.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
 }
 
+# Authentication
+# JWT and session users are resolved through the "auth" cache (see
+# backend.utils.user_cache) and dropped from it whenever the user changes.
+# ModelBackend stays listed so sessions opened before CachedModelBackend keep
+# working. Sessions use the cached_db engine: reads come from the "sessions"
+# cache, writes still go to the database. AUTH_CACHE_URL (see Cache below)
+# shares both caches between workers (SESSION_ENGINE can then be switched
+# to django.contrib.sessions.backends.cache to skip the database entirely).
+
+AUTHENTICATION_BACKENDS = [
+    "backend.authentication.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+AUTH_USER_CACHE_TTL = int(os.environ.get("AUTH_USER_CACHE_TTL", "300"))
+SESSION_ENGINE = os.environ.get("SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
+SESSION_CACHE_ALIAS = "sessions"
+
+# Password hashing
+# The login and signup views hash passwords on a bounded thread pool (see
+# backend.utils.password_pool): PASSWORD_HASH_WORKERS hashes at once (0 = one
+# per CPU) plus PASSWORD_HASH_QUEUE waiting. Requests beyond that get a 503
+# with Retry-After instead of queueing behind the storm.
+
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "0"))
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", "32"))
+
+# Celery
+# Playlist generation runs on a worker pool (`celery -A software worker`).
+# Set CELERY_TASK_ALWAYS_EAGER=1 to run jobs in-process (tests, local dev
+# without a broker) and PLAYLIST_GENERATION_ASYNC=0 to go back to generating
+# playlists inside the POST request.
+
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://redis:6379/0")
+CELERY_TASK_ALWAYS_EAGER = os.environ.get("CELERY_TASK_ALWAYS_EAGER", "0") == "1"
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+PLAYLIST_GENERATION_ASYNC = os.environ.get("PLAYLIST_GENERATION_ASYNC", "1") == "1"
+# Generation leaves the web process: progress and cache invalidations must be shared.
+GENERATION_ON_WORKERS = PLAYLIST_GENERATION_ASYNC and not CELERY_TASK_ALWAYS_EAGER
+
+# Maximum number of playlists accepted by one POST /api/playlists/bulk/.
+PLAYLIST_BULK_MAX = int(os.environ.get("PLAYLIST_BULK_MAX", "50"))
+
+# Admin
+# Changelists count rows exactly up to ADMIN_EXACT_COUNT_LIMIT and fall back
+# to Postgres planner estimates beyond it (0 = always count exactly).
+
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get("ADMIN_EXACT_COUNT_LIMIT", "10000"))
+
+# Export
+# GET /api/playlists/export/ and `manage.py export_playlists` read rows through a
+# server-side cursor EXPORT_CHUNK_SIZE at a time, so memory stays flat however
+# many playlists are exported. EXPORT_ZSTD_LEVEL applies to compressed exports.
+
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000"))
+EXPORT_ZSTD_LEVEL = int(os.environ.get("EXPORT_ZSTD_LEVEL", "3"))
+
+# Spotify HTTP client
+# One keep-alive session per process is shared by every Spotify call, and
+# per-user Spotipy clients are kept in a bounded LRU (see spotify_helpers).
+# SPOTIFY_API_URL / SPOTIFY_ACCOUNTS_URL can point at a stand-in server such
+# as `python -m benchmarks.fake_spotify` for load tests.
+
+SPOTIFY_API_URL = os.environ.get("SPOTIFY_API_URL", "https://api.spotify.com/v1").rstrip("/")
+SPOTIFY_ACCOUNTS_URL = os.environ.get("SPOTIFY_ACCOUNTS_URL", "https://accounts.spotify.com").rstrip("/")
+SPOTIFY_HTTP_POOL_SIZE = int(os.environ.get("SPOTIFY_HTTP_POOL_SIZE", "20"))
+SPOTIFY_HTTP_RETRIES = int(os.environ.get("SPOTIFY_HTTP_RETRIES", "3"))
+SPOTIFY_HTTP_TIMEOUT = float(os.environ.get("SPOTIFY_HTTP_TIMEOUT", "10"))
+SPOTIFY_CLIENT_CACHE_SIZE = int(os.environ.get("SPOTIFY_CLIENT_CACHE_SIZE", "1024"))
+# Independent Spotify calls run concurrently on a bounded pool, with at most
+# SPOTIFY_PER_USER_CONCURRENCY calls in flight per user.
+SPOTIFY_FANOUT_WORKERS = int(os.environ.get("SPOTIFY_FANOUT_WORKERS", "16"))
+SPOTIFY_PER_USER_CONCURRENCY = int(os.environ.get("SPOTIFY_PER_USER_CONCURRENCY", "4"))
+# Outbound rate limit shared by all Spotify calls: a token bucket in Redis when
+# SPOTIFY_RATE_LIMIT_URL is set (shared by every worker), otherwise per process.
+SPOTIFY_RATE_LIMIT_URL = os.environ.get("SPOTIFY_RATE_LIMIT_URL", "")
+SPOTIFY_RATE_LIMIT_PER_SEC = float(os.environ.get("SPOTIFY_RATE_LIMIT_PER_SEC", "8"))
+SPOTIFY_RATE_LIMIT_BURST = float(os.environ.get("SPOTIFY_RATE_LIMIT_BURST", "20"))
+SPOTIFY_RATE_LIMIT_RETRIES = int(os.environ.get("SPOTIFY_RATE_LIMIT_RETRIES", "3"))
+# Connection pool of the httpx client behind the async endpoints (/api/async/...).
+SPOTIFY_ASYNC_MAX_CONNECTIONS = int(os.environ.get("SPOTIFY_ASYNC_MAX_CONNECTIONS", "200"))
+
+# Local track catalog (backend.Track) answers prompts before Spotify is called.
+TRACK_CATALOG_LOOKUP = os.environ.get("TRACK_CATALOG_LOOKUP", "1") == "1"
+# In-process embedding index over the catalog (see `manage.py build_track_index`).
+TRACK_INDEX_LOOKUP = os.environ.get("TRACK_INDEX_LOOKUP", "1") == "1"
+TRACK_INDEX_PATH = os.environ.get("TRACK_INDEX_PATH", str(BASE_DIR / "var" / "track_index"))
+TRACK_INDEX_DIM = int(os.environ.get("TRACK_INDEX_DIM", "128"))
+TRACK_INDEX_MIN_SCORE = float(os.environ.get("TRACK_INDEX_MIN_SCORE", "0.3"))
+
+# Seen-track filter: a Bloom filter per user (stored on SpotifyAccount) of the
+# tracks already put in their playlists, so new playlists avoid repeats. It
+# holds SEEN_TRACKS_CAPACITY tracks at a SEEN_TRACKS_FP_RATE false-positive
+# rate (~2.4 kB per user at the defaults) and starts over when full.
+# Recommendation sources are asked for SEEN_TRACKS_OVERFETCH times the
+# playlist size to make up for the skipped tracks.
+SEEN_TRACKS_FILTER = os.environ.get("SEEN_TRACKS_FILTER", "1") == "1"
+SEEN_TRACKS_CAPACITY = int(os.environ.get("SEEN_TRACKS_CAPACITY", "2000"))
+SEEN_TRACKS_FP_RATE = float(os.environ.get("SEEN_TRACKS_FP_RATE", "0.01"))
+SEEN_TRACKS_OVERFETCH = int(os.environ.get("SEEN_TRACKS_OVERFETCH", "2"))
+
+# Cache
+# The "spotify" alias holds search/recommendation results keyed on the
+# normalized prompt. It lives in local memory unless SPOTIFY_CACHE_URL points
+# at Redis (e.g. redis://redis:6379/1), which shares it between workers.
+
+SPOTIFY_CACHE_URL = os.environ.get("SPOTIFY_CACHE_URL", "")
+SPOTIFY_CACHE_TTL = int(os.environ.get("SPOTIFY_CACHE_TTL", "900"))
+
+# The "pages" alias holds rendered per-user page fragments (the playlists
+# table). Entries are invalidated on change, so the TTL only bounds memory.
+# "auth" and "sessions" hold resolved users and sessions (see Authentication).
+# Workers invalidate these caches too, so while generation runs on them
+# PAGE_CACHE_URL and AUTH_CACHE_URL default to the broker's Redis (databases 3
+# and 4); with another broker they must be set. Otherwise they live in local
+# memory unless pointed at Redis.
+
+
+def broker_redis_db(db: int) -> str:
+    """URL of database `db` on the broker's Redis, if generation runs on workers behind one."""
+    if not GENERATION_ON_WORKERS or not CELERY_BROKER_URL.startswith(("redis://", "rediss://")):
+        return ""
+    return urlsplit(CELERY_BROKER_URL)._replace(path=f"/{db}").geturl()
+
+
+PAGE_CACHE_URL = os.environ.get("PAGE_CACHE_URL", broker_redis_db(3))
+PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", "3600"))
+AUTH_CACHE_URL = os.environ.get("AUTH_CACHE_URL", broker_redis_db(4))
+
+if GENERATION_ON_WORKERS and not (PAGE_CACHE_URL and AUTH_CACHE_URL):
+    raise ImproperlyConfigured(
+        "Playlists are generated on Celery workers, whose cache invalidations never reach "
+        "local-memory caches: set PAGE_CACHE_URL and AUTH_CACHE_URL to Redis URLs."
+    )
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "spotify": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": SPOTIFY_CACHE_URL,
+        "TIMEOUT": SPOTIFY_CACHE_TTL,
+        "KEY_PREFIX": "spotify",
+    } if SPOTIFY_CACHE_URL else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "spotify",
+        "TIMEOUT": SPOTIFY_CACHE_TTL,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    "pages": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": PAGE_CACHE_URL,
+        "TIMEOUT": PAGE_CACHE_TTL,
+        "KEY_PREFIX": "pages",
+    } if PAGE_CACHE_URL else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pages",
+        "TIMEOUT": PAGE_CACHE_TTL,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    "auth": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": AUTH_CACHE_URL,
+        "KEY_PREFIX": "auth",
+    } if AUTH_CACHE_URL else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "auth",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    "sessions": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": AUTH_CACHE_URL,
+        "KEY_PREFIX": "sessions",
+    } if AUTH_CACHE_URL else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "sessions",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+# Channels
+# Generation progress is pushed to browsers over /ws/playlists/ (see
+# backend.consumers). When playlists are generated on Celery workers the
+# progress is published from another process, so the layer defaults to the
+# broker's Redis (override with CHANNEL_LAYER_URL); the Redis pub/sub layer
+# keeps no per-socket state in Redis, so idle connections cost nothing between
+# messages. The in-process layer is only used when generation stays in the
+# web process: PLAYLIST_GENERATION_ASYNC=0 or CELERY_TASK_ALWAYS_EAGER=1
+# (which `manage.py test` sets; export it under other test runners).
+
+CHANNEL_LAYER_URL = os.environ.get(
+    "CHANNEL_LAYER_URL",
+    CELERY_BROKER_URL if GENERATION_ON_WORKERS and CELERY_BROKER_URL.startswith(("redis://", "rediss://")) else "",
+)
+
+if not CHANNEL_LAYER_URL:
+    if GENERATION_ON_WORKERS:
+        raise ImproperlyConfigured(
+            "Playlists are generated on Celery workers, which cannot reach an in-process channel "
+            "layer: set CHANNEL_LAYER_URL to a Redis URL shared with the web processes."
+        )
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {"hosts": [CHANNEL_LAYER_URL], "prefix": "filipy"},
+        },
+    }
+
+# Metrics
+# MetricsMiddleware feeds the Prometheus endpoint at /metrics. Set
+# METRICS_TOKEN to require `Authorization: Bearer <token>` from the scraper.
+# PROMETHEUS_MULTIPROC_DIR (read by prometheus_client itself, so it must be in
+# the environment) makes every process, Celery workers included, write its
+# metrics to that directory, which /metrics aggregates. docker-compose points
+# the web and worker containers at one shared tmpfs volume.
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+# Profiling
+# With PROFILING_ENABLED=1, ProfilingMiddleware runs a request under cProfile
+# when it carries a signed X-Profile-Token header (`manage.py profile_token`),
+# when staff add ?_profile to the URL, or for 1 in PROFILING_SAMPLE_RATE
+# requests (0 = never). Profiles are kept in PROFILING_DIR, newest
+# PROFILING_MAX_PROFILES only, and listed at /django-admin/profiles/.
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILING_DIR = os.environ.get("PROFILING_DIR", str(BASE_DIR / "var" / "profiles"))
+PROFILING_SAMPLE_RATE = int(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_MAX_PROFILES = int(os.environ.get("PROFILING_MAX_PROFILES", "200"))
+PROFILING_TOKEN_MAX_AGE = int(os.environ.get("PROFILING_TOKEN_MAX_AGE", "3600"))
+
 MIDDLEWARE = [
+    "backend.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "frontend.assets.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "backend.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -141,7 +387,28 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Static assets
+# `manage.py build_assets` bundles, purges and minifies the CSS/JS into
+# static/dist/ (see frontend.assets); collectstatic then fingerprints every file
+# and writes gzip, brotli and zstd variants. StaticFilesMiddleware serves them
+# with immutable far-future cache headers. STATIC_MANIFEST=0 (the default with
+# DEBUG) serves the files as they are, without collectstatic.
+# ASSET_CONTENT_GLOBS are scanned for the Bootstrap classes worth keeping.
+
+STATIC_MANIFEST = os.environ.get("STATIC_MANIFEST", "0" if DEBUG else "1") == "1"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "frontend.assets.CompressedManifestStorage"
+        if STATIC_MANIFEST else "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+ASSET_CONTENT_GLOBS = [
+    "frontend/templates/**/*.html",
+    "static/assets/js/*.js",
+]
 
 LOGOUT_REDIRECT_URL = "/logout/"
 LOGIN_REDIRECT_URL = "/"
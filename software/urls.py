@@ -18,10 +18,15 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from backend.views import metrics_view, profile_download_view, profile_list_view
+
 urlpatterns = [
+    path("django-admin/profiles/", profile_list_view, name="profile_list"),
+    path("django-admin/profiles/<str:rid>.<str:kind>", profile_download_view, name="profile_download"),
     path("django-admin/", admin.site.urls),
     path("", include("frontend.urls")),
     path("api/", include("backend.api_urls")),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("metrics", metrics_view, name="metrics"),
 ]